@@ -1,6 +1,13 @@
 from __future__ import annotations
 
+import json
+import sys
+from typing import Dict, Iterator, List
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from postgrest.types import ReturnMethod
 from datetime import datetime, timezone
 
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
@@ -8,12 +15,47 @@ from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 
 CSV_PATH = "./snapshot_260102.csv"   # ✅ 파일 경로에 맞게 수정
 TX_DATE = datetime(2026, 1, 2, tzinfo=timezone.utc)  # ✅ INIT 기준일(오늘)
-
-
-def main():
-    supabase = get_supabase_client()
-
-    df = pd.read_csv(CSV_PATH)
+CSV_KEY_DTYPES = {"account_id": "string", "ticker": "string"}
+# 증권사 CSV의 금액/수량 셀에 섞여 오는 통화기호/콤마/단위/따옴표 (숫자·소수점·부호만 남긴다)
+CURRENCY_NOISE_RE = r"[^0-9.\-]"
+
+# ✅ insert 배치 한도: 행 수 또는 요청 본문 크기(PostgREST 기본 한도보다 여유 있게) 중 먼저 닿는 쪽
+INSERT_BATCH_MAX_ROWS = 1000
+INSERT_BATCH_MAX_BYTES = 900_000
+
+
+def _iter_insert_batches(
+    rows: List[Dict],
+    max_rows: int = INSERT_BATCH_MAX_ROWS,
+    max_bytes: int = INSERT_BATCH_MAX_BYTES,
+) -> Iterator[List[Dict]]:
+    """
+    rows를 순서대로 채워 담는 배치 분할기
+    - 각 행의 JSON 크기를 더해가다가 행 수/바이트 한도 중 하나에 닿으면 배치를 끊는다.
+    - 고정 200행 단위보다 왕복 횟수가 줄고, 긴 memo 등으로 본문이 커져도 한도를 넘지 않는다.
+    """
+    batch: List[Dict] = []
+    batch_bytes = 2  # JSON 배열 괄호 "[]"
+    for row in rows:
+        row_bytes = len(json.dumps(row, ensure_ascii=False, default=str).encode("utf-8")) + 1  # 구분자 ","
+        if batch and (len(batch) >= max_rows or batch_bytes + row_bytes > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 2
+        batch.append(row)
+        batch_bytes += row_bytes
+    if batch:
+        yield batch
+
+
+def load_snapshot_csv(csv_path: str) -> pd.DataFrame:
+    """
+    증권사 잔고 스냅샷 CSV를 읽어 내부 표준 컬럼명/숫자형으로 정리한다.
+    - 파일은 호출 시점에 경로로 직접 읽는다. (모듈 import만으로는 아무것도 읽지 않음)
+    """
+    # ✅ pyarrow CSV 엔진(멀티스레드)으로 읽고, 키 컬럼은 문자열 스키마로 고정
+    # - ticker를 숫자로 추론하면 '005930' 같은 선행 0이 사라져 assets 매핑이 깨진다.
+    # - dtype_backend="pyarrow": 문자열 컬럼을 Arrow 문자열로 유지해 object 변환/복사를 피한다.
+    df = pd.read_csv(csv_path, engine="pyarrow", dtype=CSV_KEY_DTYPES, dtype_backend="pyarrow")
 
     # =========================
     # 1) 한글 컬럼명을 내부 표준명으로 매핑
@@ -26,15 +68,32 @@ def main():
     })
 
     # 숫자형 안전 변환
-    for c in ["quantity", "valuation_price", "purchase_price", "valuation_amount", "purchase_amount"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0.0)
+    # ✅ "₩1,234,000", "$12.5" 같은 문자열은 셀마다 파싱하지 않고 정규식 1회 replace → to_numeric으로 한 번에 정리
+    # - 문자열로 읽힌 컬럼들만 골라 DataFrame 단위로 한 번에 치환한다. (컬럼별 반복 없음)
+    # - Arrow 문자열 컬럼은 astype(str) 복사 없이 그대로 치환된다.
+    num_cols = ["quantity", "valuation_price", "purchase_price", "valuation_amount", "purchase_amount"]
+    text_cols = [c for c in num_cols if not is_numeric_dtype(df[c])]
+    if text_cols:
+        df[text_cols] = df[text_cols].replace(CURRENCY_NOISE_RE, "", regex=True)
+    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce").astype(float).fillna(0.0)
+    return df
+
+
+def main(csv_path: str = CSV_PATH):
+    supabase = get_supabase_client()
+    df = load_snapshot_csv(csv_path)
 
     # =========================
     # 2) assets 테이블에서 ticker -> asset_id 조회 맵 만들기
     # - ticker는 unique 제약이 있다고 하셨으니 가장 안정적인 키입니다.
     # =========================
     assets_rows = supabase.table("assets").select("id, ticker, asset_type, currency").execute().data or []
-    assets_map = {str(r["ticker"]): r for r in assets_rows}
+    assets_df = pd.DataFrame(assets_rows, columns=["id", "ticker", "asset_type", "currency"])
+    assets_df = pd.DataFrame({
+        "ticker": assets_df["ticker"].astype(str),
+        "asset_id": assets_df["id"],
+        "asset_type": assets_df["asset_type"].fillna("").astype(str).str.lower().str.strip(),
+    }).drop_duplicates("ticker")
 
     # =========================
     # 3) transactions insert payload 생성
@@ -43,76 +102,61 @@ def main():
     # - CASH(예수금 등): 가격은 1로 두고, quantity=금액 으로 DEPOSIT로 넣는 편이 운영상 안전
     #   (CASH를 INIT로 넣어도 되지만, 이후 로직이 DEPOSIT/WITHDRAW 기반이면 혼란이 생길 수 있음)
     # =========================
-    payload = []
-
-    missing = []
-    for _, r in df.iterrows():
-        ticker = str(r["ticker"])
-        account_id = str(r["account_id"])
-
-        asset_row = assets_map.get(ticker)
-        if not asset_row:
-            missing.append(ticker)
-            continue
-
-        asset_id = int(asset_row["id"])
-        asset_type = (asset_row.get("asset_type") or "").lower().strip()
-
-        qty = float(r["quantity"])
-        avg_price = float(r["purchase_price"])
-
-        # ✅ CASH는 거래 타입을 DEPOSIT로 넣는 것을 권장
-        if asset_type == "cash":
-            # 평가금액(또는 매입금액)이 "잔고" 성격이라면 quantity로 사용
-            # 우선순위: valuation_amount > purchase_amount > quantity
-            cash_amt = float(r["valuation_amount"] or 0.0)
-            if cash_amt <= 0:
-                cash_amt = float(r["purchase_amount"] or 0.0)
-            if cash_amt <= 0:
-                cash_amt = qty
-
-            payload.append({
-                "transaction_date": TX_DATE.isoformat(),
-                "asset_id": asset_id,
-                "account_id": account_id,
-                "trade_type": "DEPOSIT",
-                "quantity": cash_amt,
-                "price": 1.0,
-                "fee": 0.0,
-                "tax": 0.0,
-                "memo": "초기 포트폴리오 반영(CASH)",
-            })
-        else:
-            payload.append({
-                "transaction_date": TX_DATE.isoformat(),
-                "asset_id": asset_id,
-                "account_id": account_id,
-                "trade_type": "INIT",
-                "quantity": qty,
-                "price": avg_price,   # ✅ 평균매입가를 INIT 단가로 저장
-                "fee": 0.0,
-                "tax": 0.0,
-                "memo": "초기 포트폴리오 반영",
-            })
+    # ✅ 행 단위 iterrows 대신 ticker 기준 left merge + 컬럼 연산으로 payload를 한 번에 만든다.
+    # - CSV에 같은 이름 컬럼이 있어도 assets 테이블 값을 쓰도록 먼저 제거
+    df = (
+        df.drop(columns=["asset_id", "asset_type"], errors="ignore")
+        .assign(ticker=df["ticker"].astype(str))
+        .merge(assets_df, on="ticker", how="left")
+    )
+
+    missing = df.loc[df["asset_id"].isna(), "ticker"].unique().tolist()
+    df = df[df["asset_id"].notna()]
+    asset_ids = df["asset_id"].astype(int)
+    is_cash = (df["asset_type"] == "cash").to_numpy()
+
+    # ✅ CASH는 거래 타입을 DEPOSIT로 넣는 것을 권장
+    # - 평가금액(또는 매입금액)이 "잔고" 성격이라면 quantity로 사용
+    # - 우선순위: valuation_amount > purchase_amount > quantity
+    cash_amt = df["valuation_amount"].where(
+        df["valuation_amount"] > 0,
+        df["purchase_amount"].where(df["purchase_amount"] > 0, df["quantity"]),
+    )
+
+    payload_df = pd.DataFrame({
+        "transaction_date": TX_DATE.isoformat(),
+        "asset_id": asset_ids,
+        "account_id": df["account_id"].astype(str),
+        "trade_type": np.where(is_cash, "DEPOSIT", "INIT"),
+        "quantity": np.where(is_cash, cash_amt, df["quantity"]).astype(float),
+        "price": np.where(is_cash, 1.0, df["purchase_price"]).astype(float),   # ✅ 평균매입가를 INIT 단가로 저장
+        "fee": 0.0,
+        "tax": 0.0,
+        "memo": np.where(is_cash, "초기 포트폴리오 반영(CASH)", "초기 포트폴리오 반영"),
+    })
+    payload = payload_df.to_dict("records")
 
     if missing:
         # ✅ assets에 없는 ticker가 있으면 먼저 assets에 추가해야 함
-        uniq = sorted(set(missing))
+        uniq = sorted(missing)
         raise RuntimeError(f"assets 테이블에 없는 ticker가 있습니다. 먼저 assets에 추가하세요: {uniq[:20]}{'...' if len(uniq)>20 else ''}")
 
     # =========================
     # 4) transactions 일괄 insert
     # - Supabase는 한번에 너무 큰 payload를 보내면 실패할 수 있으니 chunk 권장
+    # - 행 수(최대 1000)와 본문 크기(~0.9MB) 기준으로 배치를 채워 왕복 횟수를 줄인다.
     # =========================
     print(f"rows to insert: {len(payload)}")
 
-    chunk_size = 200
-    for i in range(0, len(payload), chunk_size):
-        chunk = payload[i:i+chunk_size]
-        supabase.table("transactions").insert(chunk).execute()
+    # - 삽입된 행을 돌려받을 필요가 없으므로 return=minimal (응답 본문/JSON 파싱 생략)
+    # - 테이블 빌더는 루프 밖에서 한 번만 만든다. (insert마다 새 요청 빌더가 생성되므로 재사용해도 안전)
+    tx_table = supabase.table("transactions")
+    for batch in _iter_insert_batches(payload):
+        tx_table.insert(batch, returning=ReturnMethod.minimal).execute()
 
     print("DONE: inserted init/deposit transactions")
 
 
 if __name__ == "__main__":
-    main()
+    # 사용법: python scripts/import_init_from_csv.py [CSV 경로] (생략 시 CSV_PATH)
+    main(sys.argv[1] if len(sys.argv) > 1 else CSV_PATH)
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import os
 import sys
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 import traceback
 
@@ -10,11 +11,25 @@ import traceback
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT / "src"))
 
-from asset_portfolio.backend.infra.supabase_client import get_supabase_client
+from postgrest.types import ReturnMethod
+from asset_portfolio.backend.infra.supabase_client import HTTP_MAX_CONNECTIONS, get_supabase_client
 from asset_portfolio.backend.services.price_updater_service import PriceUpdaterService
 from asset_portfolio.backend.services.daily_snapshot_generator import generate_daily_snapshots
 
 
+# ✅ 가격 업데이트 제외 asset_type
+PRICE_UPDATE_EXCLUDED_ASSET_TYPES = {"cash", "manual", "deposit", "bond"}  # ✅ 필요 시 확장
+
+# ✅ 최근 이 시간 안에 성공(ok)한 자산은 재실행 시 다시 조회하지 않는다.
+PRICE_REFRESH_MIN_AGE = timedelta(minutes=15)
+
+# ✅ 계좌별 스냅샷 생성 동시 실행 수
+# - 계좌마다 Supabase 왕복 대기가 대부분이라 스레드로 겹쳐 보낸다.
+# - 계좌 안에서도 자산 계산/upsert를 병렬로 보내므로, 계좌당 요청 수는
+#   HTTP_MAX_CONNECTIONS // 계좌 동시 실행 수로 나눠서 전체가 커넥션 풀 크기를 넘지 않게 한다.
+SNAPSHOT_MAX_WORKERS = 8
+
+
 def _get_all_account_ids() -> list[str]:
     supabase = get_supabase_client()
     rows = supabase.table("accounts").select("id").execute().data or []
@@ -25,24 +40,36 @@ def _get_all_asset_ids_for_price_update() -> list[int]:
     """
     ✅ 가격 업데이트 대상 자산만 선정
     - cash / 수동평가 자산은 제외 (운영 안정성)
-    - 필요 시 asset_type 리스트를 확장하세요.
+    - 필요 시 PRICE_UPDATE_EXCLUDED_ASSET_TYPES를 확장하세요.
+    - ticker가 비어 있거나, 최근 PRICE_REFRESH_MIN_AGE 안에 이미 성공한 자산도 제외
+      (job 재시도 시 이미 갱신된 자산은 yfinance를 다시 호출하지 않음)
+    - 필터는 모두 쿼리에 실어 서버에서 거른다. (asset_type 대소문자 변형까지 not.in 목록에 포함)
+      asset_type은 편집 화면에서 소문자로 저장되므로 파이썬 쪽 재정규화는 하지 않는다.
     """
+    cutoff = (datetime.now(timezone.utc) - PRICE_REFRESH_MIN_AGE).strftime("%Y-%m-%dT%H:%M:%SZ")
+    excluded = sorted({
+        variant
+        for t in PRICE_UPDATE_EXCLUDED_ASSET_TYPES
+        for variant in (t, t.upper(), t.capitalize())
+    })
+
     supabase = get_supabase_client()
     rows = (
         supabase.table("assets")
-        .select("id, asset_type")
+        .select("id")
+        .not_.in_("asset_type", excluded)
+        .neq("ticker", "")
+        .or_(
+            "price_updated_at.is.null,"
+            f"price_updated_at.lt.{cutoff},"
+            "price_update_status.is.null,"
+            "price_update_status.neq.ok"
+        )
         .execute()
         .data or []
     )
 
-    excluded = {"cash", "manual", "deposit", "bond"}  # ✅ 필요 시 확장
-    ids: list[int] = []
-    for r in rows:
-        at = (r.get("asset_type") or "").lower().strip()
-        if at in excluded:
-            continue
-        ids.append(int(r["id"]))
-    return ids
+    return [int(r["id"]) for r in rows]
 
 
 def _upsert_asset_prices_for_date(asset_ids: list[int], price_date: date) -> int:
@@ -89,6 +116,7 @@ def _upsert_asset_prices_for_date(asset_ids: list[int], price_date: date) -> int
     supabase.table("asset_prices").upsert(
         payload,
         on_conflict="price_date,asset_id",
+        returning=ReturnMethod.minimal,
     ).execute()
 
     return len(payload)
@@ -165,19 +193,32 @@ def main():
     start_date = date.today()
     end_date = date.today()
 
+    # ✅ 계좌끼리는 서로 독립적이므로 동시에 생성한다.
+    # - 한 계좌가 실패해도 나머지는 계속 진행 (기존 정책 유지)
     total_pairs = 0
-    for acc_id in account_ids:
-        try:
-            generate_daily_snapshots(
-                account_id=str(acc_id),
-                start_date=start_date,
-                end_date=end_date,
-            )
-            total_pairs += 1
-            print(f"[JOB] snapshots generated: account_id={acc_id}, range={start_date}~{end_date}")
-        except Exception:
-            print(f"[ERROR] snapshot generation failed: account_id={acc_id}")
-            print(traceback.format_exc())
+    if account_ids:
+        workers = max(1, min(SNAPSHOT_MAX_WORKERS, len(account_ids)))
+        per_account_workers = max(1, HTTP_MAX_CONNECTIONS // workers)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {
+                ex.submit(
+                    generate_daily_snapshots,
+                    account_id=str(acc_id),
+                    start_date=start_date,
+                    end_date=end_date,
+                    max_workers=per_account_workers,
+                ): acc_id
+                for acc_id in account_ids
+            }
+            for fut in as_completed(futures):
+                acc_id = futures[fut]
+                try:
+                    fut.result()
+                    total_pairs += 1
+                    print(f"[JOB] snapshots generated: account_id={acc_id}, range={start_date}~{end_date}")
+                except Exception:
+                    print(f"[ERROR] snapshot generation failed: account_id={acc_id}")
+                    print(traceback.format_exc())
 
     print(f"[JOB] done. processed accounts={total_pairs}")
 
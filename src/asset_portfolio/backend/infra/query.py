@@ -1,34 +1,73 @@
-from typing import Optional, List, Any
-from datetime import date, datetime
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Any, Dict, Tuple
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 
 
 ALL_ACCOUNT_TOKEN = "__ALL__"
 
+# ✅ 화면/서비스가 실제로 쓰는 컬럼만 조회한다. (select("*")로 memo 등 불필요한 필드를 받지 않음)
+ACCOUNT_COLUMNS = "id, name, brokerage, type"
+ASSET_COLUMNS = "id, ticker, name_kr, asset_type, currency"
+TRANSACTION_COLUMNS = "id, transaction_date, account_id, asset_id, trade_type, quantity, price, fee, tax"
+
+# PostgREST 오류 코드: 호출한 DB 함수(RPC)가 스키마에 없음 (아직 배포 전)
+RPC_NOT_FOUND_CODE = "PGRST202"
+
+# ✅ user_id -> 계좌 목록을 재사용하는 기간(초)
+# - 한 화면에서 계좌 선택/거래내역/정기주문/스냅샷 조회가 같은 계좌 목록을 매번 다시 조회하게 된다.
+ACCOUNTS_CACHE_TTL_SECONDS = 60
+
+# user_id -> (저장 시각, 계좌 rows) (프로세스 단위로 공유)
+_accounts_cache: Dict[str, Tuple[float, List[dict]]] = {}
+_accounts_cache_lock = threading.Lock()
 
 def get_user_by_password(password: str) -> Optional[dict]:
-    """비밀번호로 사용자를 조회합니다."""
+    """비밀번호로 사용자를 조회합니다. (로그인에 필요한 id/username만 조회)"""
     supabase = get_supabase_client()
-    response = supabase.table("users").select("*").eq("password", password).limit(1).execute()
+    response = supabase.table("users").select("id, username").eq("password", password).limit(1).execute()
     if response.data:
         return response.data[0]
     return None
 
 
 def get_accounts(user_id: str) -> List[dict]:
-    """특정 사용자의 모든 계좌 정보를 불러옵니다."""
-    supabase = get_supabase_client()
-    response = supabase.table("accounts").select("*").eq("user_id", user_id).order("name").execute()
-    return response.data or []
+    """특정 사용자의 모든 계좌 정보를 불러옵니다. (짧은 TTL 동안 프로세스 안에서 재사용)"""
+    with _accounts_cache_lock:
+        hit = _accounts_cache.get(user_id)
+    if hit is None or time.monotonic() - hit[0] >= ACCOUNTS_CACHE_TTL_SECONDS:
+        supabase = get_supabase_client()
+        response = supabase.table("accounts").select(ACCOUNT_COLUMNS).eq("user_id", user_id).order("name").execute()
+        hit = (time.monotonic(), response.data or [])
+        with _accounts_cache_lock:
+            _accounts_cache[user_id] = hit
+    # 호출자가 dict를 수정해도 캐시가 오염되지 않도록 얕은 복사본을 돌려준다.
+    return [dict(acc) for acc in hit[1]]
+
+
+def get_account_ids(user_id: str) -> List[str]:
+    """사용자의 계좌 id 목록 (get_accounts 캐시를 그대로 사용)"""
+    return [acc["id"] for acc in get_accounts(user_id)]
+
+
+def clear_accounts_cache() -> None:
+    """계좌를 추가/삭제/수정한 뒤 즉시 반영이 필요할 때 호출한다."""
+    with _accounts_cache_lock:
+        _accounts_cache.clear()
 
 
 def _as_date_str(x):
     if x is None:
         return None
-    if isinstance(x, (date, datetime)):
+    # date/datetime/pd.Timestamp는 strftime으로, 문자열 등은 앞 10자리로 (isinstance 분기 없이 처리)
+    try:
         return x.strftime("%Y-%m-%d")
-    s = str(x)
-    return s[:10]  # "YYYY-MM-DD..." -> "YYYY-MM-DD"
+    except AttributeError:
+        return str(x)[:10]  # "YYYY-MM-DD..." -> "YYYY-MM-DD"
 
 
 def build_daily_snapshots_query(
@@ -37,18 +76,27 @@ def build_daily_snapshots_query(
     end_date: str,
     user_id: str,
     account_id: Optional[str] = None,
+    desc: bool = False,
 ):
     """
     daily_snapshots 공통 쿼리 빌더
     - account_id가 "__ALL__"이면 user_id에 속한 모든 계좌를 조회한다.
+      (accounts를 inner join으로 묶어 서버에서 user_id로 거른다 → 계좌 목록 선조회/긴 in 목록 없음)
+    - desc=True면 최신 날짜부터 정렬한다(최신 기준일 조회용)
+      (정렬은 여기서만 건다. 호출자가 .order("date")를 다시 붙이면 ORDER BY가 중복된다)
+    - account_id + date 범위 + date 정렬은 idx_daily_snapshots_account_date 인덱스로 처리된다 (docs/DB_SCHEMA.md)
     - execute()는 여기서 하지 않는다(호출자가 마지막에 execute)
     """
     supabase = get_supabase_client()
 
+    all_accounts = not account_id or account_id == ALL_ACCOUNT_TOKEN
+    if all_accounts:
+        select_cols = f"{select_cols.strip()}, accounts!inner(user_id)"
+
     q = (
         supabase.table("daily_snapshots")
         .select(select_cols)
-        .order("date")
+        .order("date", desc=desc)
     )
 
     if start_date is not None:
@@ -57,24 +105,53 @@ def build_daily_snapshots_query(
     if end_date is not None:
         q = q.lte("date", _as_date_str(end_date))
 
-    if account_id and account_id != ALL_ACCOUNT_TOKEN:
-        q = q.eq("account_id", account_id)
+    if all_accounts:
+        q = q.eq("accounts.user_id", user_id)
     else:
-        user_accounts = get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
-        if not user_account_ids:
-            return q.eq("account_id", "00000000-0000-0000-0000-000000000000") # Return empty
-        q = q.in_("account_id", user_account_ids)
+        q = q.eq("account_id", account_id)
 
     return q
 
 
+def get_latest_snapshot_date(
+    user_id: str,
+    account_id: Optional[str],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Optional[str]:
+    """
+    조회 구간 내 최신 스냅샷 날짜(YYYY-MM-DD)를 반환한다.
+    - 서버에서 정렬 + limit(1)로 1행만 받아온다(상세 행 전송 없음)
+    """
+    q = build_daily_snapshots_query(
+        select_cols="date",
+        start_date=start_date,
+        end_date=end_date,
+        user_id=user_id,
+        account_id=account_id,
+        desc=True,
+    )
+    rows = q.limit(1).execute().data or []
+    if not rows:
+        return None
+    return _as_date_str(rows[0].get("date"))
+
+
 def load_asset_contribution_data(
     user_id: str,
     account_id: str,
     start_date: str,
     end_date: str,
 ):
+    """
+    기여도 계산용 (date, asset_id, valuation_amount) 스냅샷 조회
+    - date 범위/계좌 필터는 DB에서 처리된다 (idx_daily_snapshots_account_date)
+    - 시작일이 종료일보다 늦은 빈 구간은 요청 없이 바로 빈 목록을 반환한다
+    """
+    s, e = _as_date_str(start_date), _as_date_str(end_date)
+    if s and e and s > e:
+        return []
+
     query = build_daily_snapshots_query(
         select_cols="date, asset_id, valuation_amount",
         start_date=start_date,
@@ -82,35 +159,34 @@ def load_asset_contribution_data(
         user_id=user_id,
         account_id=account_id,
     )
-    return fetch_all_pagination(query.order("date"))
+    # 정렬(date)은 build_daily_snapshots_query에서 이미 적용됨
+    return fetch_all_pagination(query)
 
 
-def get_transactions(user_id: str) -> List[dict]:
-    """사용자의 모든 거래내역을 불러옵니다."""
-    supabase = get_supabase_client()
-    user_accounts = get_accounts(user_id)
-    user_account_ids = [acc['id'] for acc in user_accounts]
+def get_transactions(user_id: str, columns: str = TRANSACTION_COLUMNS) -> List[dict]:
+    """사용자의 모든 거래내역을 불러옵니다. (columns로 필요한 컬럼만 지정 가능)"""
+    user_account_ids = get_account_ids(user_id)
     if not user_account_ids:
         return []
-    response = supabase.table("transactions").select("*").in_("account_id", user_account_ids).execute()
+    supabase = get_supabase_client()
+    response = supabase.table("transactions").select(columns).in_("account_id", user_account_ids).execute()
     return response.data or []
 
 
-def get_recurring_orders(user_id: str) -> List[dict]:
-    """사용자의 모든 정기주문을 불러옵니다."""
-    supabase = get_supabase_client()
-    user_accounts = get_accounts(user_id)
-    user_account_ids = [acc['id'] for acc in user_accounts]
+def get_recurring_orders(user_id: str, columns: str = "*") -> List[dict]:
+    """사용자의 모든 정기주문을 불러옵니다. (columns로 필요한 컬럼만 지정 가능)"""
+    user_account_ids = get_account_ids(user_id)
     if not user_account_ids:
         return []
-    response = supabase.table("recurring_orders").select("*").in_("account_id", user_account_ids).execute()
+    supabase = get_supabase_client()
+    response = supabase.table("recurring_orders").select(columns).in_("account_id", user_account_ids).execute()
     return response.data or []
 
 
-def get_assets() -> List[dict]:
-    """모든 자산 정보를 불러옵니다."""
+def get_assets(columns: str = ASSET_COLUMNS) -> List[dict]:
+    """모든 자산 정보를 불러옵니다. (columns로 필요한 컬럼만 지정 가능)"""
     supabase = get_supabase_client()
-    response = supabase.table("assets").select("*").execute()
+    response = supabase.table("assets").select(columns).execute()
     return response.data or []
 
 
@@ -134,24 +210,102 @@ def load_asset_prices(asset_id: int, start_date: str, end_date: str) -> List[dic
     return fetch_all_pagination(q)
 
 
-def fetch_all_pagination(query_builder: Any, batch_size: int = 1000) -> List[dict]:
+def _fetch_page(query_builder: Any, start: int, batch_size: int, with_count: bool = False) -> Any:
+    """
+    query_builder를 복제해 [start, start+batch_size-1] 구간 1페이지를 조회한다.
+    - postgrest 빌더의 .range()는 빌더 자체를 변경하므로,
+      여러 스레드가 같은 빌더를 공유하지 않도록 request 설정을 얕은 복사한다.
+    - with_count=True면 Prefer: count=exact를 붙여 응답의 count로 전체 행 수를 함께 받는다.
+    반환값: postgrest 응답 (data, count)
+    """
+    q = copy.copy(query_builder)
+    q.request = copy.copy(query_builder.request)
+    if with_count and "prefer" not in q.request.headers:
+        q.request.headers = q.request.headers.copy()
+        q.request.headers["Prefer"] = "count=exact"
+    return q.range(start, start + batch_size - 1).execute()
+
+
+def fetch_all_pagination(query_builder: Any, batch_size: int = 1000, max_workers: int = 4) -> List[dict]:
     """
     Supabase 1000행 제한을 우회하기 위한 페이지네이션 헬퍼.
     query_builder는 .select()까지 완료된 상태여야 함.
+
+    - 첫 페이지는 count=exact로 단독 조회(대부분의 조회는 1페이지로 끝남)
+    - 전체 행 수(count)를 알면 남은 페이지를 한 번에 max_workers개 스레드로 동시에 조회
+    - count를 못 받으면 offset 기준으로 max_workers개씩 끝 페이지가 나올 때까지 조회
+    - 결과 순서는 offset 순서를 그대로 유지
     """
-    all_rows = []
-    start = 0
-    while True:
-        # .range(start, end)는 inclusive index
-        end = start + batch_size - 1
-        response = query_builder.range(start, end).execute()
-        rows = response.data or []
-        
-        all_rows.extend(rows)
-        
-        if len(rows) < batch_size:
-            break
-            
-        start += batch_size
-        
+    first = _fetch_page(query_builder, 0, batch_size, with_count=True)
+    all_rows = first.data or []
+    if len(all_rows) < batch_size:
+        return all_rows
+
+    workers = max(int(max_workers), 1)
+    total = getattr(first, "count", None)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        if isinstance(total, int):
+            starts = range(batch_size, total, batch_size)
+            for response in ex.map(lambda s: _fetch_page(query_builder, s, batch_size), starts):
+                all_rows.extend(response.data or [])
+            return all_rows
+
+        start = batch_size
+        while True:
+            starts = [start + i * batch_size for i in range(workers)]
+            pages = ex.map(lambda s: _fetch_page(query_builder, s, batch_size).data or [], starts)
+
+            last_page_full = True
+            for rows in pages:
+                all_rows.extend(rows)
+                if len(rows) < batch_size:
+                    last_page_full = False
+                    break
+
+            if not last_page_full:
+                break
+
+            start = starts[-1] + batch_size
+
     return all_rows
+
+
+def is_missing_rpc_error(exc: BaseException) -> bool:
+    """RPC 실패가 '함수 없음'(PGRST202)인지 판별 (이 경우에만 기존 조회 방식으로 대체한다)"""
+    return isinstance(exc, APIError) and exc.code == RPC_NOT_FOUND_CODE
+
+
+def upsert_in_chunks(
+    table_name: str,
+    rows: List[Dict],
+    on_conflict: Optional[str] = None,
+    chunk_size: int = 500,
+    max_workers: int = 4,
+) -> int:
+    """
+    대량 upsert 헬퍼 (페이로드를 chunk_size 단위로 나눠 동시에 전송)
+    - 한 번에 너무 큰 요청을 보내면 타임아웃/실패할 수 있으므로 나눠 보낸다.
+    - chunk끼리는 서로 독립적이므로 max_workers개까지 동시에 전송해 왕복 대기 시간을 겹친다.
+    - 같은 conflict 키가 여러 chunk에 나뉘어 들어가지 않도록 rows는 키 기준으로 유일해야 한다.
+    반환값: upsert 요청에 실린 행 수
+    """
+    if not rows:
+        return 0
+
+    supabase = get_supabase_client()
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    def _upsert(chunk: List[Dict]) -> int:
+        # 응답 본문(반영된 행 echo)은 쓰지 않으므로 return=minimal로 받지 않는다.
+        if on_conflict:
+            supabase.table(table_name).upsert(chunk, on_conflict=on_conflict, returning=ReturnMethod.minimal).execute()
+        else:
+            supabase.table(table_name).upsert(chunk, returning=ReturnMethod.minimal).execute()
+        return len(chunk)
+
+    if len(chunks) == 1:
+        return _upsert(chunks[0])
+
+    workers = max(1, min(int(max_workers), len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return sum(ex.map(_upsert, chunks))
@@ -1,15 +1,60 @@
 # backend/supabase_client.py
 import os
-from supabase import create_client
+import threading
+from typing import Optional
+
+import httpx
+from supabase import Client, ClientOptions, create_client
 from dotenv import load_dotenv
 
 # -------------------------------------------------------------------
 # 1. Supabase 연결 초기화
 # -------------------------------------------------------------------
 load_dotenv()
-def get_supabase_client():
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
-    if not url or not key:
-        raise RuntimeError("Supabase env not set")
-    return create_client(url, key)
+
+# ✅ 프로세스당 클라이언트 1개를 재사용한다.
+# - 호출할 때마다 create_client를 하면 매번 새 HTTP 세션(TLS 핸드셰이크 포함)을 열게 된다.
+# - httpx.Client는 스레드 간 공유가 가능하므로 병렬 조회/업서트(ThreadPoolExecutor)에서도 같은 커넥션 풀을 쓴다.
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+# 유휴 keep-alive 연결 유지 시간(초). httpx 기본값(5초)이면 화면 재실행 사이에 연결이 닫혀 TLS 핸드셰이크를 다시 하게 된다.
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30
+POSTGREST_TIMEOUT_SECONDS = 30
+
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
+def _build_http_client() -> httpx.Client:
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=httpx.Timeout(POSTGREST_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+def get_supabase_client() -> Client:
+    global _client
+    if _client is not None:
+        return _client
+
+    with _client_lock:
+        if _client is None:
+            url = os.environ.get("SUPABASE_URL")
+            key = os.environ.get("SUPABASE_KEY")
+            if not url or not key:
+                raise RuntimeError("Supabase env not set")
+            _client = create_client(
+                url,
+                key,
+                options=ClientOptions(
+                    postgrest_client_timeout=POSTGREST_TIMEOUT_SECONDS,
+                    httpx_client=_build_http_client(),
+                ),
+            )
+    return _client
@@ -1,9 +1,25 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from pandas.tseries.offsets import BDay
 from asset_portfolio.backend.services.data_contracts import normalize_benchmark_df
 
 
+# ✅ 같은 조회 구간의 S&P 500 시계열을 재사용하는 기간(초)
+# - 화면 재실행/탭 이동마다 같은 (시작일, 종료일)로 yf.download를 다시 호출하지 않는다.
+# - 키는 날짜 단위로 정규화하므로 같은 날 안의 호출은 모두 같은 항목을 쓴다.
+BENCHMARK_CACHE_TTL_SECONDS = 3600
+# 종료일이 매일 바뀌어 새 키가 계속 생기므로 보관 개수 상한 (초과 시 가장 오래된 항목부터 제거)
+BENCHMARK_CACHE_MAX_ENTRIES = 16
+
+# (시작일, 종료일) -> (저장 시각, benchmark DataFrame) (프로세스 단위로 공유)
+_sp500_cache: Dict[Tuple[pd.Timestamp, pd.Timestamp], Tuple[float, pd.DataFrame]] = {}
+_sp500_cache_lock = threading.Lock()
+
+
 def load_cash_benchmark_series(start_date, end_date):
     """
     현금 기준 benchmark
@@ -13,7 +29,7 @@ def load_cash_benchmark_series(start_date, end_date):
 
     return normalize_benchmark_df(pd.DataFrame({
         "date": dates,
-        "benchmark_return": [0.0] * len(dates),
+        "benchmark_return": np.zeros(len(dates), dtype=np.float64),
     }))
 
 
@@ -39,6 +55,17 @@ def merge_portfolio_and_benchmark(
     return df
 
 
+def _ensure_dt(s: pd.Series, errors: str = "raise") -> pd.Series:
+    """
+    date 컬럼을 datetime64로 맞춘다.
+    - 이미 datetime64면 변환 없이 그대로 반환 (파이프라인 단계마다 to_datetime을 반복하지 않음)
+    - date 객체/ISO 문자열은 format="ISO8601"로 dateutil 추론 경로를 건너뛴다
+    """
+    if s.dtype.kind == "M":
+        return s
+    return pd.to_datetime(s, errors=errors, format="ISO8601", cache=True)
+
+
 def _normalize_yf_download_df(df: pd.DataFrame) -> pd.DataFrame:
     """
     yfinance.download 결과가
@@ -64,12 +91,12 @@ def _normalize_yf_download_df(df: pd.DataFrame) -> pd.DataFrame:
 
     # 3) 날짜 컬럼명 표준화: Date 또는 index 등의 변형 대응
     if "Date" in df.columns:
-        df["date"] = pd.to_datetime(df["Date"])
+        df["date"] = _ensure_dt(df["Date"])
     elif "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"])
+        df["date"] = _ensure_dt(df["date"])
     else:
         # 마지막 방어: 첫 컬럼을 날짜로 간주
-        df["date"] = pd.to_datetime(df.iloc[:, 0], errors="coerce")
+        df["date"] = _ensure_dt(df.iloc[:, 0], errors="coerce")
 
     return df
 
@@ -83,9 +110,9 @@ def load_sp500_benchmark_series(start_date: str, end_date: str) -> pd.DataFrame:
     - yfinance의 end는 'exclusive' 이므로 end_date를 포함하려면 +1 day가 필요.
       또한 start==end가 들어오면 최소 1일 구간으로 보정한다.
     - return: [date, benchmark_return] DataFrame
+    - 같은 (시작일, 종료일)은 BENCHMARK_CACHE_TTL_SECONDS 동안 재사용 (빈 결과/실패는 캐시하지 않음)
+    - 저장할 때 만료 항목을 지우고 BENCHMARK_CACHE_MAX_ENTRIES개까지만 보관
     """
-    ticker = "^GSPC"
-
     # 1) 입력 정규화
     s = pd.to_datetime(start_date).normalize()
     e = pd.to_datetime(end_date).normalize()
@@ -94,10 +121,36 @@ def load_sp500_benchmark_series(start_date: str, end_date: str) -> pd.DataFrame:
     if e <= s:
         e = s  # 같은 날이라면, 아래에서 end_exclusive로 +1 day 해줌
 
+    key = (s, e)
+    with _sp500_cache_lock:
+        hit = _sp500_cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < BENCHMARK_CACHE_TTL_SECONDS:
+        return hit[1].copy()
+
+    out = _download_sp500_benchmark_series(s, e)
+    if not out.empty:
+        with _sp500_cache_lock:
+            now = time.monotonic()
+            for k in [k for k, (saved_at, _) in _sp500_cache.items() if now - saved_at >= BENCHMARK_CACHE_TTL_SECONDS]:
+                del _sp500_cache[k]
+            _sp500_cache.pop(key, None)
+            _sp500_cache[key] = (now, out)
+            # dict는 삽입 순서를 유지하므로 앞쪽이 가장 오래된 항목
+            while len(_sp500_cache) > BENCHMARK_CACHE_MAX_ENTRIES:
+                del _sp500_cache[next(iter(_sp500_cache))]
+    return out.copy()
+
+
+def _download_sp500_benchmark_series(s: pd.Timestamp, e: pd.Timestamp) -> pd.DataFrame:
+    """load_sp500_benchmark_series의 실제 다운로드/계산 (s, e는 정규화된 날짜)"""
+    ticker = "^GSPC"
+
     # yfinance: end는 미포함(exclusive)
     end_exclusive = e + pd.Timedelta(days=1)
 
     def _download(_s, _end_excl):
+        import yfinance as yf  # 무거운 모듈이라 실제 조회 시점에만 로드 (대시보드 콜드 스타트 단축)
+
         # ✅ 안정성 향상을 위해 auto_adjust=True 권장
         # auto_adjust=True이면 보통 'Close' 자체가 조정 종가에 가까워져서
         # 'Adj Close'가 아예 없을 수 있습니다.
@@ -138,8 +191,6 @@ def load_sp500_benchmark_series(start_date: str, end_date: str) -> pd.DataFrame:
         return normalize_benchmark_df(pd.DataFrame())
 
     # 5) 누적 수익률 산출 (Close 기준)
-    df = df.sort_index()
-
     price_col = None
     for col in ["Adj Close", "Close", "Adj_Close", "adj close", "adjclose"]:
         if col in df.columns:
@@ -149,41 +200,22 @@ def load_sp500_benchmark_series(start_date: str, end_date: str) -> pd.DataFrame:
     if price_col is None:
         return normalize_benchmark_df(pd.DataFrame())
 
-    df["benchmark_return"] = (df[price_col] / df[price_col].iloc[0]) - 1.0
-
-    out = df.reset_index()
+    # ✅ 이후 단계(정렬/계산)는 date + 가격 컬럼만으로 처리 (OHLCV 나머지 컬럼은 끌고 다니지 않음)
+    # - date는 _normalize_yf_download_df가 항상 만들어 둔다.
+    df = df[["date", price_col]].sort_values("date", kind="mergesort", ignore_index=True)
 
-    # normalize가 이미 date를 만들었다면 index는 제거
-    if "date" in out.columns and "index" in out.columns:
-        out = out.drop(columns=["index"])
-
-    out["date"] = pd.to_datetime(out["date"], errors="coerce").dt.date
-
-    # ✅ 날짜 컬럼을 1개로 확정 (중복 방지)
-    # yfinance/normalize에 따라 'Date', 'date', 또는 index가 섞일 수 있으므로 우선순위로 선택
-    date_col = None
-    for c in ["Date", "date"]:
-        if c in out.columns:
-            date_col = c
-            break
-
-    if date_col is None:
-        # 보통 reset_index 후 첫 컬럼이 날짜(index)임
-        date_col = out.columns[0]
-
-    # date 컬럼을 단일 Series로 만들어 'date'라는 이름으로 고정
-    out["date"] = pd.to_datetime(out[date_col], errors="coerce").dt.date
-
-    # 혹시 기존에 date/Date가 여러 개면 제거(중복 방지)
-    cols_to_drop = [c for c in ["Date", "date"] if c in out.columns and c != "date"]
-    # 위에서 out["date"]를 만들었기 때문에 기존 date_col이 "date"였다면 중복이 생길 수 있어 제거
-    for c in cols_to_drop:
-        if c != "date":
-            out = out.drop(columns=[c], errors="ignore")
+    # 가격 배열에서 바로 계산: 나눗셈 결과 배열 하나에 in-place로 1을 빼서 중간 Series를 만들지 않는다.
+    prices = df[price_col].to_numpy(dtype=np.float64, copy=False)
+    returns = prices / prices[0]
+    returns -= 1.0
 
+    out = pd.DataFrame({
+        "date": _ensure_dt(df["date"], errors="coerce").dt.date,
+        "benchmark_return": returns,
+    })
     out = out.dropna(subset=["date"])
 
-    return normalize_benchmark_df(out[["date", "benchmark_return"]])
+    return normalize_benchmark_df(out)
 
 
 def align_portfolio_to_benchmark_dates(
@@ -204,32 +236,24 @@ def align_portfolio_to_benchmark_dates(
     if benchmark_df is None or benchmark_df.empty:
         return pd.DataFrame()
 
-    p = portfolio_df.copy()
-    b = benchmark_df.copy()
-
     # =========================
-    # date 타입 표준화
+    # date 타입 표준화 + 정렬
     # =========================
-    p["date"] = pd.to_datetime(p["date"])
-    b["date"] = pd.to_datetime(b["date"])
-
-    # 정렬
-    p = p.sort_values("date")
-    b = b.sort_values("date")
+    # - 전체 copy 후 컬럼 덮어쓰기 대신 assign으로 date만 교체하고 한 번만 정렬(안정 정렬)
+    p = portfolio_df.assign(date=_ensure_dt(portfolio_df["date"])).sort_values("date", kind="mergesort")
 
     # =========================
     # benchmark 날짜를 기준 캘린더로 사용
     # =========================
-    b_index = b.set_index("date").index
+    # - benchmark는 날짜만 필요하므로 DataFrame set_index 없이 날짜 Series로 바로 인덱스를 만든다.
+    b_index = pd.DatetimeIndex(_ensure_dt(benchmark_df["date"]).sort_values(kind="mergesort"), name="date")
 
     # portfolio를 date index로 만들고, benchmark 날짜로 reindex
-    p_indexed = p.set_index("date")
-
     # ✅ forward-fill: benchmark 날짜에 해당하는 값이 없으면 직전 portfolio 값을 사용
-    p_aligned = p_indexed.reindex(b_index, method="ffill")
+    p_aligned = p.set_index("date").reindex(b_index, method="ffill")
 
     # reindex 후 date 컬럼 복원
-    p_aligned = p_aligned.reset_index().rename(columns={"index": "date"})
+    p_aligned = p_aligned.reset_index()
 
     return p_aligned
 
@@ -249,17 +273,24 @@ def merge_portfolio_and_benchmark_ffill(
     if benchmark_df is None or benchmark_df.empty:
         return pd.DataFrame()
 
-    p_aligned = align_portfolio_to_benchmark_dates(portfolio_df, benchmark_df)
-    if p_aligned.empty:
-        return pd.DataFrame()
-
-    b = benchmark_df.copy()
-    b["date"] = pd.to_datetime(b["date"])
-
     # =========================
-    # merge (date가 benchmark 거래일만 남음)
+    # merge_asof (benchmark 거래일 기준 backward 매칭 = portfolio forward-fill)
     # =========================
-    df = p_aligned.merge(b, on="date", how="inner")
+    # - reindex(ffill) 후 다시 inner merge하던 2단계를 정렬된 1회 병합으로 처리한다.
+    # - 두 키의 datetime 단위가 다르면 merge_asof가 거부하므로 ns로 맞춘다.
+    p = portfolio_df.assign(
+        date=_ensure_dt(portfolio_df["date"]).astype("datetime64[ns]")
+    ).sort_values("date", kind="mergesort")
+    b = benchmark_df.assign(
+        date=_ensure_dt(benchmark_df["date"]).astype("datetime64[ns]")
+    ).sort_values("date", kind="mergesort")
+
+    # 겹치는 컬럼은 기존 merge(p, b)와 같은 이름(_x: portfolio, _y: benchmark)이 되도록 suffixes를 지정
+    df = pd.merge_asof(b, p, on="date", direction="backward", suffixes=("_y", "_x"))
+    # 컬럼 순서는 기존(portfolio 컬럼 → benchmark 컬럼)과 동일하게 유지
+    # - merge_asof(b, p)는 benchmark 컬럼이 앞에 오므로, 결과 컬럼에서 benchmark 쪽만 뒤로 보낸다.
+    b_cols = {c if c not in p.columns else f"{c}_y" for c in b.columns if c != "date"}
+    df = df[[c for c in df.columns if c not in b_cols] + [c for c in df.columns if c in b_cols]]
 
     # =========================
     # 차트 표시용 %
@@ -285,17 +316,15 @@ def align_portfolio_to_benchmark_calendar(
     if portfolio_df.empty or benchmark_df.empty:
         return portfolio_df
 
-    p = portfolio_df.copy()
-    b = benchmark_df.copy()
-
-    p["date"] = pd.to_datetime(p["date"])
-    b["date"] = pd.to_datetime(b["date"])
-
-    p = p.sort_values("date").set_index("date")
-    b = b.sort_values("date").set_index("date")
+    p = (
+        portfolio_df.assign(date=_ensure_dt(portfolio_df["date"]))
+        .sort_values("date", kind="mergesort")
+        .set_index("date")
+    )
+    b_index = pd.DatetimeIndex(_ensure_dt(benchmark_df["date"]).sort_values(kind="mergesort"), name="date")
 
     # ✅ 벤치마크 캘린더로 reindex
-    p = p.reindex(b.index)
+    p = p.reindex(b_index)
 
     # ✅ forward-fill: 평가금액/매입금액/수익률 모두 ffill (휴장일 대응)
     # - 첫 값이 NaN이면 ffill로도 안 채워지므로 남는다(정상)
@@ -303,5 +332,5 @@ def align_portfolio_to_benchmark_calendar(
         p[["valuation_amount", "purchase_amount", "portfolio_return"]].ffill()
     )
 
-    p = p.reset_index().rename(columns={"index": "date"})
+    p = p.reset_index()
     return p
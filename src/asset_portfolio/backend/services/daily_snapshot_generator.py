@@ -1,7 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from asset_portfolio.backend.services.portfolio_calculator import (
     calculate_daily_snapshots_for_asset
 )
+from asset_portfolio.backend.infra.query import is_missing_rpc_error, upsert_in_chunks
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 
 
@@ -12,64 +14,101 @@ from asset_portfolio.backend.services.portfolio_calculator import (
 )
 
 
-def generate_daily_snapshots(account_id: str, start_date: date, end_date: date):
-    """
-    특정 account에 대해
-    거래가 존재하는 모든 자산의 daily snapshot을 생성한다.
-    """
-    
-    supabase = get_supabase_client()
+# ✅ 계좌 1개 안에서 동시에 보내는 요청 수 (기본값, 단독 실행 기준)
+# - 자산별 계산(거래/자산 조회) 단계와 bulk upsert 단계가 같은 값을 쓴다. (두 단계는 겹치지 않음)
+# - 계좌를 병렬로 돌리는 호출자(run_daily_job)는 공유 HTTP 커넥션 풀 크기를 계좌 수로 나눈 값을
+#   max_workers로 넘겨서, 계좌 × 계좌당 요청 수가 풀 크기를 넘지 않게 한다.
+SNAPSHOT_ASSET_MAX_WORKERS = 4
+
+# ✅ daily_snapshots bulk upsert 1회당 행 수 (자산별로 요청을 나누지 않고 모아서 보낸다)
+SNAPSHOT_UPSERT_CHUNK_SIZE = 1000
+
+
+def _load_transaction_asset_ids(supabase, account_id: str) -> list:
+    """계좌에 거래가 존재하는 asset_id 목록(중복 제거, 정렬)"""
+    # 서버 DISTINCT 함수(transaction_asset_ids, docs/DB_SCHEMA.md)가 없을 때만 전체 조회로 대체
+    try:
+        rows = supabase.rpc("transaction_asset_ids", {"p_account_id": account_id}).execute().data or []
+        return sorted({row["asset_id"] for row in rows if row and row.get("asset_id") is not None})
+    except Exception as e:
+        if not is_missing_rpc_error(e):
+            print(f"[ERROR] transaction_asset_ids rpc failed: account_id={account_id}, {e!r}")
+            raise
 
-    # =========================
-    # 1. 거래가 존재하는 asset_id 목록 조회
-    # =========================
     tx_resp = (
         supabase.table("transactions")
         .select("asset_id")
         .eq("account_id", account_id)
         .execute()
     )
-
-    asset_ids = sorted({
+    return sorted({
         row.get("asset_id")
         for row in (tx_resp.data or [])
         if row and row.get("asset_id") is not None
     })
 
+
+def generate_daily_snapshots(
+    account_id: str,
+    start_date: date,
+    end_date: date,
+    max_workers: int = SNAPSHOT_ASSET_MAX_WORKERS,
+):
+    """
+    특정 account에 대해
+    거래가 존재하는 모든 자산의 daily snapshot을 생성한다.
+    - max_workers: 이 계좌에서 동시에 보내는 요청 수 상한 (자산 계산/upsert 공통)
+    """
+    
+    supabase = get_supabase_client()
+
+    # =========================
+    # 1. 거래가 존재하는 asset_id 목록 조회
+    # =========================
+    asset_ids = _load_transaction_asset_ids(supabase, account_id)
+
     if not asset_ids:
         print(f"[INFO] account_id={account_id} 에 대한 거래 내역이 없습니다.")
         return {"account_id": account_id, "asset_count": 0, "total_rows": 0}
     
-    total_rows = 0
-    
     # =========================
-    # 2. 자산별 snapshot 생성
+    # 2. 자산별 snapshot 계산 (자산끼리는 독립적이므로 동시에 처리)
     # =========================
-    for asset_id in asset_ids:
+    def _compute_asset(asset_id):
         snapshots = calculate_daily_snapshots_for_asset(
             asset_id=asset_id,
             account_id=account_id,
             start_date=start_date,
             end_date=end_date,
         )
-        if not snapshots:
-            continue
+        if snapshots:
+            print(f"[OK] asset_id={asset_id}, {len(snapshots)} rows prepared")
+        return snapshots or []
 
-        # -------------------------
-        # 3. DB insert
-        # -------------------------
+    workers = max(1, min(int(max_workers), len(asset_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        per_asset = list(ex.map(_compute_asset, asset_ids))
 
-        # 🔽 날짜 타입을 문자열로 변환 (JSON 직렬화 대응)
-        for row in snapshots:
-            if isinstance(row.get("date"), (date,)):
-                row["date"] = row["date"].isoformat()
+    # -------------------------
+    # 3. DB insert (전체 자산을 모아 chunk 단위 bulk upsert)
+    # - 자산마다 1회씩 보내던 요청을 (전체 행 수 / chunk 크기)회로 줄인다.
+    # -------------------------
 
-        supabase.table("daily_snapshots").upsert(
-            snapshots,
-            on_conflict="date,asset_id,account_id",
-        ).execute()
+    # 🔽 날짜 타입을 문자열로 변환 (JSON 직렬화 대응)
+    all_snapshots = [
+        {**row, "date": row["date"].isoformat()} if isinstance(row.get("date"), date) else row
+        for snapshots in per_asset
+        for row in snapshots
+    ]
 
-        total_rows += len(snapshots)
-        print(f"[OK] asset_id={asset_id}, {len(snapshots)} rows inserted")
+    total_rows = upsert_in_chunks(
+        "daily_snapshots",
+        all_snapshots,
+        on_conflict="date,asset_id,account_id",
+        chunk_size=SNAPSHOT_UPSERT_CHUNK_SIZE,
+        max_workers=max(1, int(max_workers)),
+    )
+    if total_rows:
+        print(f"[OK] account_id={account_id}, {total_rows} rows inserted")
 
     return {"account_id": account_id, "asset_count": len(asset_ids), "total_rows": total_rows}
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Dict, Iterable, List
 
 import pandas as pd
+import pyarrow as pa
 
 
 SNAPSHOT_COLUMNS = [
@@ -45,6 +46,40 @@ BENCHMARK_COLUMNS = [
 ]
 
 
+def rows_to_df(rows: List[Dict]) -> pd.DataFrame:
+    """
+    Supabase 응답 rows(list[dict]) -> DataFrame.
+    - pyarrow 컬럼 빌더로 한 번에 만들어 숫자 컬럼이 object가 아닌 float/int로 들어오게 한다.
+    - 타입이 섞여 Arrow 변환이 실패하면 기존처럼 pd.DataFrame으로 fallback
+    """
+    if not rows:
+        return pd.DataFrame()
+    try:
+        return pa.Table.from_pylist(rows).to_pandas()
+    except (pa.ArrowException, TypeError, ValueError):
+        return pd.DataFrame(rows)
+
+
+def rows_to_typed_df(rows: List[Dict], schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Supabase 응답 rows -> 컬럼/타입이 미리 정해진 DataFrame.
+    - 알고 있는 컬럼 목록으로 from_records 후 astype 한 번으로 타입을 확정한다.
+      (object로 만든 뒤 컬럼마다 pd.to_numeric을 다시 돌리지 않도록)
+    - 응답이 비어 있거나 컬럼이 빠져 있어도 같은 컬럼/타입의 DataFrame을 반환
+    - 숫자가 문자열로 오는 등 astype이 실패하면 숫자 컬럼만 to_numeric으로 보정
+    """
+    df = pd.DataFrame.from_records(rows or [], columns=list(schema))
+    try:
+        return df.astype(schema)
+    except (TypeError, ValueError):
+        for col, dtype in schema.items():
+            if pd.api.types.is_numeric_dtype(pd.Series(dtype=dtype)):
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+            else:
+                df[col] = df[col].astype(dtype)
+        return df
+
+
 def _ensure_columns(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
     for col in columns:
         if col not in df.columns:
@@ -59,7 +94,7 @@ def _ensure_unique_columns(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _to_date_series(series: pd.Series) -> pd.Series:
-    return pd.to_datetime(series, errors="coerce").dt.date
+    return pd.to_datetime(series, format="ISO8601", errors="coerce").dt.date
 
 
 def normalize_snapshot_df(df: pd.DataFrame) -> pd.DataFrame:
@@ -101,6 +136,7 @@ def normalize_weight_df(df: pd.DataFrame) -> pd.DataFrame:
     out["asset_name"] = out["asset_name"].astype("string")
     out["currency"] = (
         out["currency"]
+        .astype(object)  # category로 들어와도 fillna("")가 가능하도록
         .fillna("")
         .astype(str)
         .str.lower()
@@ -131,6 +167,7 @@ def normalize_latest_weight_df(df: pd.DataFrame) -> pd.DataFrame:
     out["valuation_amount_krw"] = pd.to_numeric(out["valuation_amount_krw"], errors="coerce")
     out["currency"] = (
         out["currency"]
+        .astype(object)  # category로 들어와도 fillna("")가 가능하도록
         .fillna("")
         .astype(str)
         .str.lower()
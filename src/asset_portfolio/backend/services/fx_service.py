@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
 
-import yfinance as yf
+
+# ✅ 정상 조회된 환율을 재사용하는 기간(초). 지나면 이전 값을 즉시 돌려주고 백그라운드에서 갱신한다.
+FX_CACHE_TTL_SECONDS = 3600
 
 
 @dataclass
@@ -25,17 +29,69 @@ class FxService:
     - UI/집계에서만 환산
     """
 
+    # stale-while-revalidate 상태 (프로세스 단위로 공유)
+    _cached: Optional[FxRate] = None
+    _cached_at: float = 0.0
+    _refreshing: bool = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_usdkrw(cls) -> FxRate:
+        """
+        ✅ 캐시된 USD/KRW 환율을 반환합니다. (stale-while-revalidate)
+        - 최초 1회만 동기 조회
+        - TTL이 지나면 마지막 정상 환율을 바로 반환하고, 갱신은 백그라운드 스레드에서 수행
+          → 만료 시점에 외부 API 응답을 기다리느라 화면/응답이 멈추지 않음
+        - fallback 값은 캐시하지 않음 (다음 호출에서 다시 조회)
+        """
+        cached = cls._cached
+        if cached is None:
+            return cls._refresh()
+
+        if time.monotonic() - cls._cached_at >= FX_CACHE_TTL_SECONDS:
+            cls._start_background_refresh()
+        return cached
+
+    @classmethod
+    def _refresh(cls) -> FxRate:
+        fx = cls.fetch_usdkrw()
+        if fx.source != "fallback":
+            with cls._lock:
+                cls._cached = fx
+                cls._cached_at = time.monotonic()
+        return fx
+
+    @classmethod
+    def _start_background_refresh(cls) -> None:
+        with cls._lock:
+            if cls._refreshing:
+                return
+            cls._refreshing = True
+
+        def _run():
+            try:
+                cls._refresh()
+            finally:
+                with cls._lock:
+                    cls._refreshing = False
+
+        threading.Thread(target=_run, name="fx-refresh", daemon=True).start()
+
     @staticmethod
     def fetch_usdkrw() -> FxRate:
         """
         ✅ USD/KRW 환율(근사)을 yfinance로 가져옵니다.
         - yfinance ticker: 'KRW=X' 는 'USD->KRW' 환율로 널리 사용됩니다.
+        - 최근 5일 history만 조회합니다.
+          (fast_info.last_price는 내부적으로 1년치 history를 받으므로 쓰지 않음)
         - 실패 시 예외를 던지기보다는 안전한 fallback을 제공합니다.
         """
+        import yfinance as yf  # 무거운 모듈이라 실제 조회 시점에만 로드 (대시보드 콜드 스타트 단축)
+
         now = datetime.now(timezone.utc)
+        tk = yf.Ticker("KRW=X")
 
         try:
-            tk = yf.Ticker("KRW=X")
             hist = tk.history(period="5d", interval="1d")
             if hist is None or hist.empty:
                 raise ValueError("empty fx history")
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from io import BytesIO
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 import pandas as pd
 import requests
@@ -11,6 +14,12 @@ import requests
 
 KST = timezone(timedelta(hours=9))
 
+# ✅ 같은 (bld, 조회 파라미터) CSV를 재사용하는 기간(초)
+# - KRX CSV는 종목 전체 시세라서, 같은 날짜로 여러 종목을 조회하면 동일한 파일을 반복 다운로드하게 된다.
+KRX_CSV_CACHE_TTL_SECONDS = 600
+# 전종목 CSV는 크기가 크므로 보관 개수 상한 (초과 시 가장 오래된 항목부터 제거)
+KRX_CSV_CACHE_MAX_ENTRIES = 8
+
 
 @dataclass
 class KRXPriceResult:
@@ -40,6 +49,25 @@ class KRXPriceFetcher:
     DEFAULT_CODE_FIELDS = ["종목코드", "단축코드", "표준코드", "ISIN코드", "ISIN"]
     DEFAULT_PRICE_FIELDS = ["종가", "종가(원)", "종가(원화)"]
 
+    # (bld, params) -> (저장 시각, CSV DataFrame) (프로세스 단위로 공유)
+    _csv_cache: Dict[Tuple[str, str], Tuple[float, pd.DataFrame]] = {}
+    _csv_cache_lock = threading.Lock()
+
+    # OTP 발급/CSV 다운로드가 함께 쓰는 HTTP 세션 (프로세스 단위로 공유)
+    # - 호출마다 requests.post를 쓰면 매번 새 TCP/TLS 연결을 연다. 세션의 커넥션 풀로 keep-alive 재사용.
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    session.headers.update({"Referer": cls.REFERER})
+                    cls._session = session
+        return cls._session
+
     @staticmethod
     def _normalize_code(code: str) -> str:
         # ✅ KRX 종목코드는 보통 6자리 숫자이므로, 숫자일 때는 0 padding을 보장합니다.
@@ -131,6 +159,12 @@ class KRXPriceFetcher:
             return raw.zfill(6)
         return raw
 
+    @staticmethod
+    def _normalize_code_series(values: pd.Series) -> pd.Series:
+        """_normalize_code_value를 컬럼 전체에 한 번에 적용 (행 단위 map 없이 str 연산으로 처리)"""
+        raw = values.fillna("").astype(str).str.strip().str.upper()
+        return raw.where(~raw.str.isdigit(), raw.str.zfill(6))
+
     @staticmethod
     def _pick_column(df: pd.DataFrame, preferred: str, fallbacks: list[str]) -> Optional[str]:
         if preferred and preferred in df.columns:
@@ -154,11 +188,11 @@ class KRXPriceFetcher:
             **(params or {}),
         }
 
-        # ✅ KRX는 Referer 헤더가 없으면 OTP 발급이 거절되는 경우가 많습니다.
-        otp_res = requests.post(
+        # ✅ KRX는 Referer 헤더가 없으면 OTP 발급이 거절되는 경우가 많습니다. (세션 기본 헤더로 설정)
+        session = KRXPriceFetcher._get_session()
+        otp_res = session.post(
             KRXPriceFetcher.OTP_URL,
             data=payload,
-            headers={"Referer": KRXPriceFetcher.REFERER},
             timeout=30,
         )
         otp_res.raise_for_status()
@@ -166,16 +200,52 @@ class KRXPriceFetcher:
         if not otp_code:
             raise RuntimeError("KRX OTP 발급 실패")
 
-        csv_res = requests.post(
+        csv_res = session.post(
             KRXPriceFetcher.DOWNLOAD_URL,
             data={"code": otp_code},
-            headers={"Referer": KRXPriceFetcher.REFERER},
             timeout=30,
         )
         csv_res.raise_for_status()
 
         # ✅ KRX CSV는 보통 CP949 인코딩입니다.
-        return pd.read_csv(BytesIO(csv_res.content), encoding="cp949")
+        # - 종목코드 계열 컬럼은 파싱 단계에서 문자열로 읽는다. (숫자로 추론되면 선행 0이 사라짐)
+        return pd.read_csv(
+            BytesIO(csv_res.content),
+            encoding="cp949",
+            dtype={name: str for name in KRXPriceFetcher.DEFAULT_CODE_FIELDS},
+        )
+
+    @classmethod
+    def _get_csv_cached(cls, bld: str, params: Dict[str, Any]) -> pd.DataFrame:
+        """
+        ✅ _download_csv 결과를 TTL 동안 재사용한다.
+        - 한 번의 가격 업데이트에서 여러 종목이 같은 bld/거래일 CSV를 조회하므로 OTP+CSV 왕복을 1회로 줄인다.
+        - 다운로드 예외/빈 CSV(휴장일 등)는 캐시하지 않는다. (다음 호출에서 다시 시도)
+        - 저장할 때 만료 항목을 지우고 KRX_CSV_CACHE_MAX_ENTRIES개까지만 보관한다.
+        - 반환된 DataFrame은 여러 호출이 공유하므로 호출 측에서 변경하지 않는다.
+        """
+        key = (bld, json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str))
+        now = time.monotonic()
+        with cls._csv_cache_lock:
+            hit = cls._csv_cache.get(key)
+        if hit is not None and now - hit[0] < KRX_CSV_CACHE_TTL_SECONDS:
+            return hit[1]
+
+        df = cls._download_csv(bld, params)
+        if df is None or df.empty:
+            return df
+
+        with cls._csv_cache_lock:
+            now = time.monotonic()
+            cache = cls._csv_cache
+            for k in [k for k, (saved_at, _) in cache.items() if now - saved_at >= KRX_CSV_CACHE_TTL_SECONDS]:
+                del cache[k]
+            cache.pop(key, None)
+            cache[key] = (now, df)
+            # dict는 삽입 순서를 유지하므로 앞쪽이 가장 오래된 항목
+            while len(cache) > KRX_CSV_CACHE_MAX_ENTRIES:
+                del cache[next(iter(cache))]
+        return df
 
     @staticmethod
     def fetch_reference_price(
@@ -224,7 +294,7 @@ class KRXPriceFetcher:
                 params[date_field] = trade_date
 
             try:
-                df = KRXPriceFetcher._download_csv(bld, params)
+                df = KRXPriceFetcher._get_csv_cached(bld, params)
                 if df is None or df.empty:
                     last_error = f"KRX 데이터 없음: {trade_date}"
                     continue
@@ -241,12 +311,13 @@ class KRXPriceFetcher:
 
                 # ✅ 종목코드 컬럼을 문자열로 정규화해서 비교합니다.
                 # - 숫자 코드는 zfill(6), 영문 혼합은 대문자로 통일
-                df["_code_norm"] = df[code_col].map(KRXPriceFetcher._normalize_code_value)
+                # - 캐시된 DataFrame을 공유하므로 컬럼을 추가하지 않고 별도 Series로 계산
+                code_norm = KRXPriceFetcher._normalize_code_series(df[code_col])
                 candidate_norms = [KRXPriceFetcher._normalize_code_value(c) for c in candidate_codes]
 
                 # ✅ 원본 코드/변환 코드 모두 후보로 비교합니다.
                 # - 예: 0064K0 → ["0064K0", "006420"] 형태로 비교
-                row = df.loc[df["_code_norm"].isin(candidate_norms)]
+                row = df.loc[code_norm.isin(candidate_norms)]
                 if row.empty:
                     last_error = f"KRX 코드 미존재: {candidate_codes}"
                     continue
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 import pandas as pd
+from postgrest.types import ReturnMethod
 
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 from asset_portfolio.backend.infra import query
@@ -37,8 +38,7 @@ def fetch_cost_basis_current(
     manual_asset_cost_basis_current를 조회해 (account_id, asset_id) → 원금 정보를 반환한다.
     이때 user_id에 속한 계좌만 조회하도록 제한한다.
     """
-    user_accounts = query.get_accounts(user_id)
-    user_account_ids = {acc['id'] for acc in user_accounts}
+    user_account_ids = set(query.get_account_ids(user_id))
 
     valid_account_ids = [aid for aid in account_ids if aid and aid in user_account_ids]
     asset_ids = [int(aid) for aid in asset_ids if aid is not None]
@@ -92,14 +92,21 @@ def attach_manual_cost_basis(
         asset_ids=manual_df[asset_id_col].unique().tolist(),
     )
 
-    def _lookup_principal(row) -> Optional[float]:
-        key = (row.get(account_id_col), int(row.get(asset_id_col)))
-        if key not in cost_basis_map:
-            return None
-        return cost_basis_map[key]["cost_basis_amount"]
+    # ✅ (account_id, asset_id) 튜플 키로 행마다 dict를 찾지 않고, 원금 테이블과 두 컬럼 기준 left merge 한 번으로 붙인다.
+    # - left merge는 왼쪽 행 순서를 유지하므로 결과를 manual 행 위치에 그대로 대입할 수 있다.
+    cost_df = pd.DataFrame(
+        [(acc, aid, info["cost_basis_amount"]) for (acc, aid), info in cost_basis_map.items()],
+        columns=["_account_id", "_asset_id", "manual_principal"],
+    )
+    manual_rows = df.loc[is_manual]
+    keys = pd.DataFrame({
+        "_account_id": manual_rows[account_id_col].to_numpy(),
+        "_asset_id": manual_rows[asset_id_col].astype(int).to_numpy(),
+    })
+    principal = keys.merge(cost_df, on=["_account_id", "_asset_id"], how="left")["manual_principal"]
 
     df["manual_principal"] = pd.NA
-    df.loc[is_manual, "manual_principal"] = df.loc[is_manual].apply(_lookup_principal, axis=1)
+    df.loc[is_manual, "manual_principal"] = principal.to_numpy()
     return df
 
 
@@ -113,7 +120,7 @@ def record_cost_basis_events(user_id: str, events: List[Dict]) -> None:
 
     supabase = get_supabase_client()
 
-    supabase.table("manual_asset_cost_basis_events").insert(events).execute()
+    supabase.table("manual_asset_cost_basis_events").insert(events, returning=ReturnMethod.minimal).execute()
 
     delta_map: Dict[Tuple[str, int], Dict[str, object]] = {}
     for ev in events:
@@ -165,4 +172,5 @@ def record_cost_basis_events(user_id: str, events: List[Dict]) -> None:
     supabase.table("manual_asset_cost_basis_current").upsert(
         upsert_rows,
         on_conflict="account_id,asset_id",
+        returning=ReturnMethod.minimal,
     ).execute()
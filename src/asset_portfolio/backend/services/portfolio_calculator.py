@@ -1,4 +1,5 @@
 # src/asset_portfolio/backend/services/portfolio_calculator.py
+import numpy as np
 import pandas as pd
 from collections import defaultdict
 from datetime import datetime, date, timedelta, timezone
@@ -347,15 +348,18 @@ def calculate_asset_return_series_from_snapshots(
     #         valuation_amount - base_purchase_amount
     #     ) / base_purchase_amount
 
-    df["date"] = pd.to_datetime(df["date"])
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601")
     df["valuation_amount"] = df["valuation_amount"].astype(float)
     df["purchase_amount"] = df["purchase_amount"].astype(float)
 
     df = df.sort_values("date")
 
     # ✅ purchase_amount가 0이면 수익률은 계산 불가 → NaN 처리
-    df["portfolio_return"] = (df["valuation_amount"] / df["purchase_amount"]) - 1.0
-    df.loc[df["purchase_amount"] <= 0, "portfolio_return"] = pd.NA
+    # - 나눗셈 결과(±inf)를 만든 뒤 다시 덮어쓰지 않고, np.where 한 번으로 유효 행만 계산한다.
+    val = df["valuation_amount"].to_numpy(dtype=float)
+    base = df["purchase_amount"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["portfolio_return"] = np.where(base > 0, val / base - 1.0, np.nan)
 
     return df[["date", "valuation_amount", "purchase_amount", "portfolio_return"]]
 
@@ -476,12 +480,17 @@ def calculate_daily_snapshots_for_asset(asset_id: int, account_id: str, start_da
     current_date = start_date
     tx_idx = 0
 
+    # ✅ 거래일은 한 번만 파싱해서 위치(index)로 조회
+    # - 날짜 루프가 하루씩 돌 때마다 같은 거래의 transaction_date를 다시 파싱하지 않도록 한다.
+    tx_dates = [_to_date(tx["transaction_date"]) for tx in transactions]
+    tx_count = len(transactions)
+
     while current_date <= end_date:
         processed_tx_on_date = False
         # -------------------------
         # (A) 오늘까지의 거래 반영
         # -------------------------
-        while tx_idx < len(transactions) and _to_date(transactions[tx_idx]["transaction_date"]) <= current_date:
+        while tx_idx < tx_count and tx_dates[tx_idx] <= current_date:
             tx = transactions[tx_idx]
             processed_tx_on_date = True
             trade_type = tx["trade_type"]
@@ -526,7 +535,7 @@ def calculate_daily_snapshots_for_asset(asset_id: int, account_id: str, start_da
             tx_idx += 1
             
         # 마지막 거래 이후에는 0-row를 더 이상 생성하지 않는다.
-        if tx_idx >= len(transactions) and current_qty <= 0 and not processed_tx_on_date:
+        if tx_idx >= tx_count and current_qty <= 0 and not processed_tx_on_date:
             break
 
         # =========================
@@ -596,7 +605,7 @@ def calculate_portfolio_return_series_from_snapshots(
         return pd.DataFrame()
 
     df = pd.DataFrame(snapshots)
-    df["date"] = pd.to_datetime(df["date"])
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601")
     df = df.sort_values("date")
 
     # ✅ 숫자형 변환/결측 방어
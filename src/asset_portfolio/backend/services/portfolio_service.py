@@ -1,4 +1,5 @@
 # src/asset_portfolio/backend/services/portfolio_service.py
+import numpy as np
 import pandas as pd
 from typing import List, Dict
 from asset_portfolio.backend.infra.query import build_daily_snapshots_query, fetch_all_pagination
@@ -130,8 +131,17 @@ def calculate_asset_contributions(
     # =========================
     # 자산별 평가금액 변화
     # =========================
-    df["prev_valuation"] = df.groupby("asset_id")["valuation_amount"].shift(1)
-    df["delta_valuation"] = df["valuation_amount"] - df["prev_valuation"]
+    # - (asset_id, date)로 정렬돼 있으므로 groupby.shift 대신 한 칸 밀린 배열을 만들고
+    #   자산이 바뀌는 첫 행만 NaN으로 둔다. (그룹 분할 없이 numpy 한 번으로 계산)
+    val = df["valuation_amount"].to_numpy(dtype=float)
+    asset = df["asset_id"].to_numpy()
+    prev = np.empty_like(val)
+    if val.size:
+        prev[0] = np.nan
+        prev[1:] = val[:-1]
+        prev[1:][asset[1:] != asset[:-1]] = np.nan
+    df["prev_valuation"] = prev
+    df["delta_valuation"] = val - prev
 
     # =========================
     # 포트폴리오 전일 총 평가금액
@@ -152,8 +162,8 @@ def calculate_asset_contributions(
     # 기여도 "inf%" 표시 방어 로직: inf / NaN 제거
     # 1) 자산 전일값 없는 행 제거 (첫날)
     # 2) 포트폴리오 전일 총액이 0/NaN이면 제거
-    df = df.dropna(subset=["prev_valuation", "portfolio_prev_valuation"])
-    df = df[df["portfolio_prev_valuation"] > 0]
+    # (NaN > 0 은 False이므로 portfolio_prev_valuation의 NaN도 같은 mask에서 걸러짐)
+    df = df.loc[df["prev_valuation"].notna() & (df["portfolio_prev_valuation"] > 0)].copy()
 
     df["contribution"] = df["delta_valuation"] / df["portfolio_prev_valuation"]
 
@@ -1,14 +1,32 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional
-from asset_portfolio.backend.infra.query import build_daily_snapshots_query, fetch_all_pagination
+from asset_portfolio.backend.infra.query import (
+    build_daily_snapshots_query,
+    fetch_all_pagination,
+    get_latest_snapshot_date,
+)
 from asset_portfolio.backend.services.fx_service import FxService
 from asset_portfolio.backend.services.data_contracts import (
     normalize_weight_df,
     normalize_latest_weight_df,
+    rows_to_df,
 )
 
 
+def _currency_category(assets: pd.Series) -> pd.Series:
+    """
+    assets 조인(dict) 컬럼에서 currency를 꺼내 소문자 category로 정규화
+    - 행마다 lower()/strip()을 호출하지 않고, 고유 통화값(categories)에만 한 번 적용한다.
+    - 이후 'usd' 비교는 category 코드 비교로 처리된다.
+    """
+    cat = assets.str.get("currency").fillna("").astype(str).astype("category")
+    norm = cat.cat.categories.str.lower().str.strip()
+    return pd.Series(norm.take(cat.cat.codes.to_numpy()), index=assets.index, dtype="category")
+
+
 def load_asset_weight_timeseries(
     user_id: str,
     account_id: str,
@@ -27,13 +45,15 @@ def load_asset_weight_timeseries(
         user_id=user_id,
         account_id=account_id,
     )
-    rows = fetch_all_pagination(query.order("date"))
+    # 정렬(date)은 build_daily_snapshots_query에서 이미 적용됨
+    rows = fetch_all_pagination(query)
     return rows
 
 
-def build_asset_weight_df(rows: List[Dict]) -> pd.DataFrame:
+def build_asset_weight_df(rows: List[Dict], usdkrw: Optional[float] = None) -> pd.DataFrame:
     """
     ✅ ALL/단일 계좌 모두 안전한 비중 DF 생성 + USD 환산 반영
+    - usdkrw를 넘기면 그 환율을 사용하고, 없으면 FxService로 조회한다.
 
     반환 DF 주요 컬럼:
       - date
@@ -45,21 +65,21 @@ def build_asset_weight_df(rows: List[Dict]) -> pd.DataFrame:
       - total_amount_krw
       - weight_krw
     """
-    df = pd.DataFrame(rows)
+    df = rows_to_df(rows)
     if df.empty:
         return normalize_weight_df(df)
 
     # =========================
     # 1) assets 조인 결과 펼치기
     # =========================
-    df["asset_name"] = df["assets"].apply(lambda x: x.get("name_kr") if isinstance(x, dict) else None)
-    df["currency"] = df["assets"].apply(lambda x: (x.get("currency") or "").lower().strip() if isinstance(x, dict) else "")
+    df["asset_name"] = df["assets"].str.get("name_kr")
+    df["currency"] = _currency_category(df["assets"])
     df.drop(columns=["assets"], inplace=True, errors="ignore")
 
     # =========================
     # 2) 타입 정리
     # =========================
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601", errors="coerce")
     # df["valuation_amount"] = pd.to_numeric(df["valuation_amount"], errors="coerce").fillna(0.0)
     df["asset_id"] = pd.to_numeric(df["asset_id"], errors="coerce")
     df = df.dropna(subset=["date", "asset_id"])
@@ -80,25 +100,22 @@ def build_asset_weight_df(rows: List[Dict]) -> pd.DataFrame:
     # 4) ✅ USD 환산
     # - 합산/비중은 KRW 기준으로 계산해야 Treemap 등에서 정상 비중이 나온다.
     # =========================
-    fx = FxService.fetch_usdkrw()
-    usdkrw = float(fx.rate)
-
-    def _to_krw(row) -> float:
-        # ✅ currency가 'usd'면 환율 곱
-        if (row.get("currency") or "") == "usd":
-            return float(row["valuation_amount"]) * usdkrw
-        return float(row["valuation_amount"])
+    if usdkrw is None:
+        usdkrw = FxService.get_usdkrw().rate
+    usdkrw = float(usdkrw)
 
-    df_agg["valuation_amount_krw"] = df_agg.apply(_to_krw, axis=1)
+    # ✅ currency가 'usd'면 환율 곱 (행 단위 apply 대신 컬럼 전체를 한 번에 계산)
+    val = pd.to_numeric(df_agg["valuation_amount"], errors="coerce").to_numpy(dtype=float)
+    is_usd = df_agg["currency"].eq("usd").to_numpy()
+    df_agg["valuation_amount_krw"] = np.where(is_usd, val * usdkrw, val)
 
     # =========================
     # 5) 날짜별 총액 및 비중(KRW 기준)
     # =========================
     df_agg["total_amount_krw"] = df_agg.groupby("date")["valuation_amount_krw"].transform("sum")
-    df_agg["weight"] = df_agg.apply(
-        lambda r: (r["valuation_amount_krw"] / r["total_amount_krw"]) if r["total_amount_krw"] > 0 else 0.0,
-        axis=1
-    )
+    total = df_agg["total_amount_krw"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df_agg["weight"] = np.where(total > 0, df_agg["valuation_amount_krw"].to_numpy() / total, 0.0)
     df_agg["weight_krw"] = df_agg["weight"]
 
     df_agg = df_agg.sort_values(["date", "valuation_amount_krw"], ascending=[True, False])
@@ -109,18 +126,9 @@ def _safe_float_series(s: pd.Series, col_name: str) -> pd.Series:
     """
     ✅ Supabase 응답에서 numeric이 str/Decimal/None 등으로 섞여 들어와도 안전하게 float로 변환
     - 변환 실패는 NaN으로 두고, 호출부에서 dropna/에러 처리
+    - to_numeric이 Decimal/숫자/문자열을 모두 처리하므로 행 단위 float() 호출 없이 한 번에 변환
     """
-    def _to_float(x):
-        if x is None:
-            return None
-        # Decimal/숫자/문자열 모두 float() 시도
-        try:
-            return float(x)
-        except Exception:
-            return None
-
-    out = s.apply(_to_float)
-    return pd.to_numeric(out, errors="coerce")
+    return pd.to_numeric(s, errors="coerce")
 
 
 def load_latest_asset_weights(user_id: str, account_id: str, start_date: str, end_date: str) -> pd.DataFrame:
@@ -128,56 +136,65 @@ def load_latest_asset_weights(user_id: str, account_id: str, start_date: str, en
     Treemap용 최신 비중 데이터
     정책: (중요) '자산별 최신 1행'이 아니라 '최신 날짜(기준일) 1일치 스냅샷'을 사용한다.
     """
-    query = build_daily_snapshots_query(
-        select_cols="date, asset_id, valuation_amount, assets(currency)",
-        start_date=start_date,
-        end_date=end_date,
-        user_id=user_id,
-        account_id=account_id,
-    )
+    # ✅ 스냅샷 조회(Supabase)와 환율 조회(yfinance)는 서로 독립적인 네트워크 I/O
+    # - 순차 호출 대신 동시에 보내서 대기 시간을 '합'이 아니라 '최댓값'으로 줄인다.
+    # ✅ 기준일 선택은 서버에서 처리
+    # - 기간 전체 스냅샷을 받아 파이썬에서 max(date)를 고르지 않고,
+    #   최신 날짜 1행만 먼저 조회한 뒤 그 날짜의 보유분(>0)만 가져온다.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fx_future = ex.submit(FxService.get_usdkrw)
+        latest = get_latest_snapshot_date(user_id, account_id, start_date, end_date)
+        rows: List[Dict] = []
+        if latest is not None:
+            query = build_daily_snapshots_query(
+                select_cols="date, asset_id, valuation_amount, assets(currency)",
+                start_date=latest,
+                end_date=latest,
+                user_id=user_id,
+                account_id=account_id,
+            )
+            rows = fetch_all_pagination(query.gt("valuation_amount", 0))
+        fx = fx_future.result()
 
-    rows = fetch_all_pagination(query)
     if not rows:
         return normalize_latest_weight_df(pd.DataFrame())
 
-    df = pd.DataFrame(rows)
+    df = rows_to_df(rows)
     if df.empty:
         return normalize_latest_weight_df(df)
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601", errors="coerce")
     df["asset_id"] = pd.to_numeric(df["asset_id"], errors="coerce")
     df["valuation_amount"] = _safe_float_series(df["valuation_amount"], "valuation_amount")
 
-    df["currency"] = df["assets"].apply(
-        lambda x: (x.get("currency") or "").lower().strip() if isinstance(x, dict) else ""
-    )
+    df["currency"] = _currency_category(df["assets"])
     df.drop(columns=["assets"], inplace=True, errors="ignore")
 
-    df = df.dropna(subset=["date", "asset_id", "valuation_amount"])
-    if df.empty:
+    valid = df["date"].notna() & df["asset_id"].notna() & df["valuation_amount"].notna()
+    if not valid.any():
         return normalize_latest_weight_df(pd.DataFrame())
 
-    # ✅ 최신 날짜 기준(포트폴리오 기준일)
-    latest_date = df["date"].max()
-    df = df[df["date"] == latest_date].copy()
-
-    # ✅ 보유분만(0은 제외) + (account_id=ALL이면 중복 합산 방지 차원에서 groupby)
-    df = df[df["valuation_amount"] > 0].copy()
+    # ✅ 최신 날짜 기준(포트폴리오 기준일) + 보유분만(0은 제외)
+    # - 필터마다 DF를 복사하지 않도록 하나의 mask로 합쳐서 한 번만 자른다.
+    latest_date = df.loc[valid, "date"].max()
+    mask = valid & (df["date"] == latest_date) & (df["valuation_amount"] > 0)
+    df = df.loc[mask]
     if df.empty:
         return normalize_latest_weight_df(pd.DataFrame())
 
+    # ✅ (account_id=ALL이면 중복 합산 방지 차원에서 groupby)
+
     df = (
-        df.groupby(["date", "asset_id", "currency"], as_index=False)["valuation_amount"]
+        df.groupby(["date", "asset_id", "currency"], as_index=False, observed=True)["valuation_amount"]
         .sum()
     )
 
     # ✅ USD 환산
-    fx = FxService.fetch_usdkrw()
     usdkrw = float(fx.rate)
 
-    df["valuation_amount_krw"] = df["valuation_amount"]
-    is_usd = df["currency"].fillna("").eq("usd")
-    df.loc[is_usd, "valuation_amount_krw"] = df.loc[is_usd, "valuation_amount_krw"] * usdkrw
+    val = df["valuation_amount"].to_numpy(dtype=float)
+    is_usd = df["currency"].eq("usd").to_numpy()
+    df["valuation_amount_krw"] = np.where(is_usd, val * usdkrw, val)
 
     return normalize_latest_weight_df(
         df[["date", "asset_id", "valuation_amount", "currency", "valuation_amount_krw"]].copy()
@@ -1,16 +1,25 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import math
 import pandas as pd
-import yfinance as yf
 from datetime import date, datetime, timezone
 from typing import Optional, Dict, Any, List, Tuple
+from postgrest.types import ReturnMethod
+from asset_portfolio.backend.infra.query import upsert_in_chunks
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 from asset_portfolio.backend.services.transaction_service import TransactionService
 from asset_portfolio.backend.services.daily_snapshot_generator import generate_daily_snapshots
 from asset_portfolio.backend.services.krx_price_fetcher import KRXPriceFetcher
 
 
+# ✅ 가격 업데이트 판단/기록에 필요한 컬럼만 조회
+ASSET_PRICE_UPDATE_SELECT = "id, ticker, asset_type, currency, market, current_price, price_source, price_update_error"
+
+# ✅ 가격 조회(yfinance) 및 assets update 동시 요청 수
+PRICE_FETCH_MAX_WORKERS = 8
+
+
 @dataclass
 class PriceUpdateResult:
     """
@@ -73,6 +82,8 @@ class PriceUpdaterService:
         if not yf_ticker:
             raise ValueError("empty ticker")
 
+        import yfinance as yf  # 무거운 모듈이라 실제 조회 시점에만 로드 (대시보드 콜드 스타트 단축)
+
         tk = yf.Ticker(yf_ticker)
 
         # ✅ 가장 단순/안전: 최근 5일 hist에서 마지막 close 사용
@@ -128,20 +139,17 @@ class PriceUpdaterService:
         if not candidates:
             return None, None, "ticker가 비어있음"
 
+        import yfinance as yf  # 무거운 모듈이라 실제 조회 시점에만 로드 (대시보드 콜드 스타트 단축)
+
         last_err = None
 
         for t in candidates:
             try:
                 tk = yf.Ticker(t)
 
-                # ✅ 1) fast_info가 있으면 가장 빠르고 간단합니다.
-                fi = getattr(tk, "fast_info", None)
-                if fi:
-                    p = PriceUpdaterService._safe_float(fi.get("last_price"))
-                    if p and p > 0:
-                        return p, t, None
-
-                # ✅ 2) fast_info가 없거나 last_price가 없으면 history로 fallback
+                # ✅ 최근 5일 일봉만 요청해서 마지막 종가 사용
+                # - fast_info.last_price는 내부적으로 1년치 history를 받아 마지막 값만 쓰므로
+                #   전송량이 훨씬 큼 → 필요한 구간만 직접 요청한다.
                 hist = tk.history(period="5d", interval="1d")
                 if hist is None or hist.empty:
                     last_err = "yfinance history가 비어있음"
@@ -160,48 +168,98 @@ class PriceUpdaterService:
 
 
     @staticmethod
-    def update_asset_price(asset_id: int) -> PriceUpdateResult:
+    def _is_price_update_skipped(row: Dict[str, Any]) -> bool:
+        """price_source='manual'(수동평가) 또는 cash 자산은 시세 업데이트 대상이 아니다."""
+        policy_source = (row.get("price_source") or "").lower().strip()
+        asset_type = (row.get("asset_type") or "").lower().strip()
+        return policy_source == "manual" or asset_type == "cash"
+
+    @staticmethod
+    def _batch_fetch_last_closes(tickers: List[str]) -> Dict[str, float]:
         """
-        ✅ 단일 자산 current_price 업데이트 + 메타데이터 기록
-        - (중요) price_source는 '정책 컬럼'이므로 절대 덮어쓰지 않는다.
-        - price_source='manual'이면 무조건 스킵한다. (수동평가 자산 보호)
+        ✅ 여러 ticker의 최근 종가를 yf.download 한 번으로 조회
+        - ticker마다 Ticker().history를 따로 호출하지 않고 요청을 묶어 연결/인증 오버헤드를 줄인다.
+        - 결과에 없거나 비정상(NaN/0)인 ticker는 dict에서 빠지며, 호출 측에서 개별 조회로 대체한다.
         """
-        supabase = get_supabase_client()
+        if not tickers:
+            return {}
 
-        # ✅ price_source까지 반드시 조회해서 manual 보호 로직을 적용
-        row = (
-            supabase.table("assets")
-            .select("id, ticker, asset_type, market, current_price, price_source")
-            .eq("id", asset_id)
-            .single()
-            .execute()
-            .data
+        import yfinance as yf  # 무거운 모듈이라 실제 조회 시점에만 로드 (대시보드 콜드 스타트 단축)
+
+        try:
+            raw = yf.download(
+                tickers,
+                period="5d",
+                interval="1d",
+                threads=True,
+                progress=False,
+            )
+        except Exception:
+            return {}
+        if raw is None or raw.empty or "Close" not in raw.columns.get_level_values(0):
+            return {}
+
+        close = raw["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(name=tickers[0])
+
+        last = close.ffill().iloc[-1]
+        prices: Dict[str, float] = {}
+        for t, v in last.items():
+            p = PriceUpdaterService._safe_float(v)
+            if p and p > 0:
+                prices[str(t)] = p
+        return prices
+
+    @staticmethod
+    def _resolve_price(
+        ticker: str,
+        market: Optional[str],
+        prefetched: Optional[Dict[str, float]] = None,
+    ) -> Tuple[Optional[float], Optional[str], Optional[str]]:
+        """
+        ✅ (ticker, market) 1건의 가격 조회 (일괄 조회 결과 우선, 없으면 개별 조회)
+        - 후보 ticker 순서(.KS → .KQ → 원본)대로 일괄 조회 결과에서 먼저 찾는다.
+        return: (price, used_ticker, reason)
+        """
+        hit = next(
+            (t for t in PriceUpdaterService._candidate_tickers(ticker, market) if prefetched and t in prefetched),
+            None,
         )
-        if not row:
-            return PriceUpdateResult(asset_id=asset_id, ticker="", ok=False, reason="asset not found")
+        if hit is not None:
+            return prefetched[hit], hit, None
+        return PriceUpdaterService.fetch_price_from_yfinance(ticker, market)
 
+    @staticmethod
+    def _plan_price_update(
+        row: Dict[str, Any],
+        now: datetime,
+        prefetched: Optional[Dict[str, float]] = None,
+        fetched: Optional[Tuple[Optional[float], Optional[str], Optional[str]]] = None,
+    ) -> Tuple[PriceUpdateResult, Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        ✅ 자산 1건의 가격 조회 + DB에 쓸 payload 계산 (DB 쓰기는 하지 않음)
+        - fetched(이미 조회한 (price, used_ticker, reason))가 있으면 그대로 사용
+        - prefetched(일괄 조회 결과)에 가격이 있으면 개별 yfinance 호출 없이 사용
+        - (중요) price_source는 '정책 컬럼'이므로 payload에 절대 포함하지 않는다.
+        - price_source='manual'이면 무조건 스킵한다. (수동평가 자산 보호)
+        - assets payload는 id + 바꿀 가격/상태 컬럼만 담는다. (다른 컬럼은 UPDATE로 건드리지 않음)
+        return: (결과, assets payload, asset_prices payload 또는 None)
+        """
+        asset_id = int(row["id"])
         ticker = str(row.get("ticker") or "")
         market = row.get("market")
         old_price = float(row.get("current_price") or 0.0)
 
-        now = datetime.now(timezone.utc)
-        
+        asset_patch: Dict[str, Any] = {"id": asset_id, "price_updated_at": now.isoformat()}
+
         # =========================
         # ✅ 0) manual 자산 보호: 절대 yfinance로 덮지 않음
         # =========================
-        policy_source = (row.get("price_source") or "").lower().strip()
-        asset_type = (row.get("asset_type") or "").lower().strip()
-        
-        if policy_source == "manual" or asset_type == "cash":
-            # manual/cash는 스킵하되, 원하면 메타에 skipped 기록 가능
-            supabase.table("assets").update({
-                "price_updated_at": now.isoformat(),
-                "price_update_status": "skipped",
-                # "price_update_error": "manual or cash",
-                # "price_source": row.get("price_source"),  # ❌ 아예 포함하지 않는 것이 더 안전
-            }).eq("id", asset_id).execute()
-
-            return PriceUpdateResult(
+        if PriceUpdaterService._is_price_update_skipped(row):
+            # manual/cash는 스킵하되, 메타에 skipped 기록 (가격/오류 메시지는 기존 값 유지)
+            asset_patch["price_update_status"] = "skipped"
+            result = PriceUpdateResult(
                 asset_id=asset_id,
                 ticker=ticker,
                 ok=False,
@@ -209,23 +267,20 @@ class PriceUpdaterService:
                 new_price=None,
                 reason="skipped (manual or cash)",
             )
+            return result, asset_patch, None
 
         # =========================
-        # 1) yfinance fetch
+        # 1) yfinance fetch (일괄 조회 결과 우선, 없으면 개별 조회)
         # =========================
-        price, used_ticker, reason = PriceUpdaterService.fetch_price_from_yfinance(ticker, market)
+        if fetched is None:
+            fetched = PriceUpdaterService._resolve_price(ticker, market, prefetched)
+        price, used_ticker, reason = fetched
 
         if price is None or float(price) <= 0:
             # ✅ 실패: current_price 유지 + 메타만 기록
-            # (중요) price_source 절대 변경 금지
-            supabase.table("assets").update({
-                "price_updated_at": now.isoformat(),
-                "price_update_status": "failed",
-                "price_update_error": (str(reason)[:300] if reason else "unknown error"),
-                # "price_source": "yfinance",  # ❌ 절대 쓰면 안 됨
-            }).eq("id", asset_id).execute()
-
-            return PriceUpdateResult(
+            asset_patch["price_update_status"] = "failed"
+            asset_patch["price_update_error"] = str(reason)[:300] if reason else "unknown error"
+            result = PriceUpdateResult(
                 asset_id=asset_id,
                 ticker=ticker,
                 ok=False,
@@ -233,31 +288,26 @@ class PriceUpdaterService:
                 new_price=None,
                 reason=f"{reason} (used={used_ticker})" if used_ticker else str(reason),
             )
+            return result, asset_patch, None
 
         new_price = float(price)
 
         # ✅ 성공: current_price + 메타 기록(정책 컬럼 price_source는 건드리지 않음)
-        # ✅ 성공: current_price + 메타 기록(정책 컬럼 price_source는 건드리지 않음)
-        supabase.table("assets").update({
-            "current_price": new_price,
-            "price_updated_at": now.isoformat(),
-            "price_update_status": "ok",
-            "price_update_error": None,
-            # "price_source": "yfinance",  # ❌ 절대 쓰면 안 됨
-        }).eq("id", asset_id).execute()
-
-        # ✅ [New] history 테이블에도 저장 (스냅샷 생성 시 참조됨)
+        asset_patch["current_price"] = new_price
+        asset_patch["price_update_status"] = "ok"
+        asset_patch["price_update_error"] = None
+
+        # ✅ history 테이블에도 저장 (스냅샷 생성 시 참조됨)
         # - 이를 저장해야 generate_daily_snapshots가 오늘자 가격으로 평가를 수행함
-        supabase.table("asset_prices").upsert({
+        price_row = {
             "price_date": now.date().isoformat(),
             "asset_id": asset_id,
             "close_price": new_price,
             "currency": row.get("currency") or "",
             "source": "yfinance",
             "fetched_at": now.isoformat(),
-        }, on_conflict="price_date,asset_id").execute()
-
-        return PriceUpdateResult(
+        }
+        result = PriceUpdateResult(
             asset_id=asset_id,
             ticker=ticker,
             ok=True,
@@ -265,43 +315,137 @@ class PriceUpdaterService:
             new_price=new_price,
             reason=f"used={used_ticker}" if used_ticker else None,
         )
-        
-    
+        return result, asset_patch, price_row
+
+    @staticmethod
+    def _write_price_updates(asset_patches: List[Dict[str, Any]], price_rows: List[Dict[str, Any]]) -> None:
+        """
+        ✅ 계산된 payload를 DB에 기록
+        - assets: upsert(INSERT ... ON CONFLICT)가 아니라 UPDATE만 보낸다.
+          (실행 중 삭제된 자산을 되살리거나, 편집 화면에서 바꾼 컬럼을 조회 시점 값으로 되돌리지 않음)
+          같은 payload(실패/스킵 상태, 같은 가격)끼리 묶어 .in_("id", ids) 한 번으로 보내고,
+          묶음끼리는 스레드 풀로 동시에 전송한다.
+        - asset_prices: 히스토리 테이블이므로 chunk 단위 bulk upsert
+        """
+        groups: Dict[Tuple[Tuple[str, Any], ...], List[int]] = {}
+        for patch in asset_patches:
+            values = tuple(sorted((k, v) for k, v in patch.items() if k != "id"))
+            groups.setdefault(values, []).append(int(patch["id"]))
+
+        if groups:
+            supabase = get_supabase_client()
+
+            def _update(item: Tuple[Tuple[Tuple[str, Any], ...], List[int]]) -> None:
+                values, ids = item
+                (
+                    supabase.table("assets")
+                    .update(dict(values), returning=ReturnMethod.minimal)
+                    .in_("id", ids)
+                    .execute()
+                )
+
+            workers = max(1, min(PRICE_FETCH_MAX_WORKERS, len(groups)))
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                list(ex.map(_update, groups.items()))
+
+        upsert_in_chunks("asset_prices", price_rows, on_conflict="price_date,asset_id")
+
+    @staticmethod
+    def update_asset_price(asset_id: int) -> PriceUpdateResult:
+        """
+        ✅ 단일 자산 current_price 업데이트 + 메타데이터 기록
+        """
+        results = PriceUpdaterService.update_many([asset_id])
+        return results[0]
+
     @staticmethod
     def update_many(asset_ids: list[int]) -> list[PriceUpdateResult]:
-        results: list[PriceUpdateResult] = []
+        """
+        ✅ 여러 자산의 current_price를 업데이트
+        - 자산 정보는 in_ 한 번으로 조회
+        - 가격 조회 후 assets / asset_prices 쓰기는 테이블별 bulk upsert로 모아서 전송
+        """
+        if not asset_ids:
+            return []
 
-        for aid in asset_ids:
-            try:
-                r = PriceUpdaterService.update_asset_price(int(aid))
-
-                # ✅ 절대 None이 results에 들어가지 않게 방어
-                if r is None:
-                    results.append(
-                        PriceUpdateResult(
-                            asset_id=int(aid),
-                            ticker="",
-                            ok=False,
-                            old_price=None,
-                            new_price=None,
-                            reason="update_asset_price returned None",
-                        )
-                    )
-                else:
-                    results.append(r)
+        supabase = get_supabase_client()
+        ids = [int(aid) for aid in asset_ids]
+        rows = (
+            supabase.table("assets")
+            .select(ASSET_PRICE_UPDATE_SELECT)
+            .in_("id", ids)
+            .execute()
+            .data or []
+        )
+        row_by_id = {int(r["id"]): r for r in rows}
+
+        now = datetime.now(timezone.utc)
+
+        # ✅ 모든 후보 ticker(한국 6자리 코드의 .KS/.KQ 포함)를 yf.download 한 번으로 먼저 묶어서 조회
+        # - 자산별로 후보를 하나씩 history 호출하던 왕복을 1회 요청으로 합친다.
+        # - 일괄 조회에서 가격을 못 얻은 자산만 개별 조회 경로로 떨어진다.
+        batch_tickers = set()
+        for r in rows:
+            if PriceUpdaterService._is_price_update_skipped(r):
+                continue
+            batch_tickers.update(PriceUpdaterService._candidate_tickers(str(r.get("ticker") or ""), r.get("market")))
+        prefetched = PriceUpdaterService._batch_fetch_last_closes(sorted(batch_tickers))
 
+        # ✅ 같은 (ticker, market)를 가진 자산이 여러 개여도 가격 조회는 1번만 하고 결과를 공유한다.
+        def _price_key(r: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+            return str(r.get("ticker") or ""), r.get("market")
+
+        price_keys = list(dict.fromkeys(
+            _price_key(r) for r in rows if not PriceUpdaterService._is_price_update_skipped(r)
+        ))
+
+        def _fetch(key: Tuple[str, Optional[str]]):
+            # ✅ 한 종목의 실패(404/타임아웃 등)가 전체 배치를 멈추지 않도록 워커 안에서 예외 처리
+            try:
+                return PriceUpdaterService._resolve_price(key[0], key[1], prefetched)
             except Exception as e:
-                results.append(
-                    PriceUpdateResult(
-                        asset_id=int(aid),
-                        ticker="",
-                        ok=False,
-                        old_price=None,
-                        new_price=None,
-                        reason=f"exception: {e}",
-                    )
+                return None, None, f"exception: {e}"
+
+        # ✅ 가격 조회는 HTTP 대기(I/O)가 대부분이므로 스레드 풀로 동시에 요청한다.
+        fetched: Dict[Tuple[str, Optional[str]], Tuple[Optional[float], Optional[str], Optional[str]]] = {}
+        if price_keys:
+            workers = max(1, min(PRICE_FETCH_MAX_WORKERS, len(price_keys)))
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                fetched = dict(zip(price_keys, ex.map(_fetch, price_keys)))
+
+        def _plan(aid: int):
+            row = row_by_id.get(aid)
+            if row is None:
+                return PriceUpdateResult(asset_id=aid, ticker="", ok=False, reason="asset not found"), None, None
+            try:
+                return PriceUpdaterService._plan_price_update(row, now, prefetched, fetched.get(_price_key(row)))
+            except Exception as e:
+                result = PriceUpdateResult(
+                    asset_id=aid,
+                    ticker=str(row.get("ticker") or ""),
+                    ok=False,
+                    old_price=None,
+                    new_price=None,
+                    reason=f"exception: {e}",
                 )
+                return result, None, None
+
+        # ✅ results 순서는 asset_ids와 같다.
+        planned = [_plan(aid) for aid in ids]
 
+        results: list[PriceUpdateResult] = []
+        asset_patches: List[Dict[str, Any]] = []
+        price_rows: List[Dict[str, Any]] = []
+
+        for result, asset_patch, price_row in planned:
+            results.append(result)
+            if asset_patch is None:
+                continue
+            asset_patches.append(asset_patch)
+            if price_row is not None:
+                price_rows.append(price_row)
+
+        PriceUpdaterService._write_price_updates(asset_patches, price_rows)
         return results
 
     # =========================
@@ -439,6 +583,9 @@ class PriceUpdaterService:
         failed = 0
         details: list[Dict[str, Any]] = []
 
+        # ✅ 한 번의 갱신 작업에 속한 행은 같은 시각을 공유 (행마다 now() 호출/포맷하지 않음)
+        now_iso = datetime.now(timezone.utc).isoformat()
+
         for row in assets:
             asset_type = (row.get("asset_type") or "").lower().strip()
             if asset_type == "cash":
@@ -472,7 +619,7 @@ class PriceUpdaterService:
                 failed += 1
                 # ✅ 실패는 로그만 남기고 job을 중단하지 않습니다.
                 supabase.table("assets").update({
-                    "price_updated_at": datetime.now(timezone.utc).isoformat(),
+                    "price_updated_at": now_iso,
                     "price_update_status": "failed",
                     "price_update_error": (str(reason)[:300] if reason else "unknown error"),
                 }).eq("id", aid).execute()
@@ -490,7 +637,7 @@ class PriceUpdaterService:
                 "close_price": float(price),
                 "currency": row.get("currency") or "",
                 "source": used_source or "krx",
-                "fetched_at": datetime.now(timezone.utc).isoformat(),
+                "fetched_at": now_iso,
             })
             details.append({
                 "asset_id": aid,
@@ -503,6 +650,7 @@ class PriceUpdaterService:
             supabase.table("asset_prices").upsert(
                 payload,
                 on_conflict="price_date,asset_id",
+                returning=ReturnMethod.minimal,
             ).execute()
 
         return {"inserted": len(payload), "failed": failed, "details": details}
@@ -587,7 +735,7 @@ class PriceUpdaterService:
             return summary
 
         # ✅ account_id별로 최소 시작일을 잡아 리빌드 비용을 줄임
-        tx_df["transaction_date"] = pd.to_datetime(tx_df["transaction_date"], errors="coerce")
+        tx_df["transaction_date"] = pd.to_datetime(tx_df["transaction_date"], format="ISO8601", errors="coerce")
         tx_df = tx_df.dropna(subset=["account_id", "transaction_date"])  # ✅ NaT/None 제거        
         
         if tx_df.empty:
@@ -1,6 +1,7 @@
 # src/asset_portfolio/backend/services/snapshot_frame.py
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
@@ -15,6 +16,9 @@ NUMERIC_COLS = [
     "purchase_amount",
 ]
 
+# ✅ 콤마/공백/통화기호를 한 번에 제거 (호출마다 재컴파일하지 않도록 모듈 레벨에서 컴파일)
+_NUMERIC_NOISE_RE = re.compile(r"[,\s$₩원]")
+
 
 def _flatten_rows(rows: List[Dict[str, Any]]) -> pd.DataFrame:
     """
@@ -43,6 +47,26 @@ def _to_yyyy_mm_dd(v: Any) -> Optional[str]:
         return s
 
 
+def _to_yyyy_mm_dd_series(s: pd.Series) -> pd.Series:
+    """
+    _to_yyyy_mm_dd의 Series 버전.
+    - Supabase date/timestamp는 ISO8601 문자열이므로 format을 지정해 한 번에 파싱(dateutil 추론 생략)
+    - 파싱 실패한 값만 기존 _to_yyyy_mm_dd로 개별 처리
+    """
+    try:
+        parsed = pd.to_datetime(s, format="ISO8601", errors="coerce")
+        out = parsed.dt.strftime("%Y-%m-%d").astype(object)
+    except (TypeError, ValueError, AttributeError):
+        # 타임존이 섞이는 등 벡터 파싱이 불가능하면 기존 방식으로
+        return s.map(_to_yyyy_mm_dd)
+
+    out = out.where(parsed.notna(), None)
+    failed = parsed.isna() & s.notna()
+    if failed.any():
+        out[failed] = s[failed].map(_to_yyyy_mm_dd)
+    return out
+
+
 def _strict_numeric(df: pd.DataFrame, col: str) -> pd.Series:
     """
     숫자 변환은 '조용히 0으로 덮지 않는다'.
@@ -60,14 +84,19 @@ def _strict_numeric(df: pd.DataFrame, col: str) -> pd.Series:
     if s.map(lambda x: isinstance(x, (dict, list))).any():
         return pd.to_numeric(pd.Series([pd.NA] * len(df), index=df.index), errors="coerce")
 
-    # 문자열 정리: 콤마 제거, 공백 제거
-    if s.dtype == "object":
-        s = s.astype(str).str.replace(",", "", regex=False).str.strip()
-
-        # "None", "nan" 같은 문자열 정리
-        s = s.replace({"None": "", "nan": "", "NaN": ""})
+    out = pd.to_numeric(s, errors="coerce")
+    if s.dtype != "object":
+        return out
 
-    return pd.to_numeric(s, errors="coerce")
+    # 문자열 정리: 콤마/공백/통화기호를 단일 패스로 제거
+    # - 대부분의 값은 이미 숫자(또는 "123.4" 같은 순수 숫자 문자열)라 위 to_numeric에서 끝난다.
+    #   변환에 실패한 셀만 골라 정규식을 적용한다.
+    # - "None", "nan", "" 같은 문자열은 to_numeric(errors="coerce")에서 NaN 처리됨
+    failed = out.isna() & s.notna()
+    if failed.any():
+        cleaned = s[failed].astype(str).str.replace(_NUMERIC_NOISE_RE, "", regex=True)
+        out[failed] = pd.to_numeric(cleaned, errors="coerce")
+    return out
 
 
 def to_snapshot_df(
@@ -108,7 +137,7 @@ def to_snapshot_df(
 
     # date normalize
     if "date" in df.columns:
-        df["date"] = df["date"].map(_to_yyyy_mm_dd)
+        df["date"] = _to_yyyy_mm_dd_series(df["date"])
 
     # numeric normalize + validation
     for col in NUMERIC_COLS:
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from datetime import date, datetime
 from typing import Optional, Dict, Any, List
 
+from asset_portfolio.backend.infra.query import upsert_in_chunks
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 from asset_portfolio.backend.services.portfolio_calculator import calculate_daily_snapshots_for_asset
 
@@ -55,11 +56,6 @@ class TransactionService:
             return datetime.fromisoformat(value).date()
         raise ValueError(f"Unsupported date value: {value!r}")
 
-    @staticmethod
-    def _chunk(rows: List[Dict[str, Any]], size: int = 500):
-        for i in range(0, len(rows), size):
-            yield rows[i:i + size]
-
     @staticmethod
     def _is_manual_asset(asset_id: int) -> bool:
         """
@@ -220,16 +216,13 @@ class TransactionService:
                 .execute()
             )
 
-        # 4) upsert
-        inserted = 0
-        for chunk in TransactionService._chunk(snapshots, size=500):
-            supabase.table("daily_snapshots").upsert(
-                chunk,
-                on_conflict="date,asset_id,account_id",
-            ).execute()
-            inserted += len(chunk)
-
-        return inserted
+        # 4) upsert (500행 단위 chunk를 동시에 전송)
+        return upsert_in_chunks(
+            "daily_snapshots",
+            snapshots,
+            on_conflict="date,asset_id,account_id",
+            chunk_size=500,
+        )
 
 
     @staticmethod
@@ -18,6 +18,7 @@ from asset_portfolio.dashboard.render import (
     render_asset_grouping_pie_section,
     render_portfolio_trend_chart,
     render_asset_transaction_history,  # 자산별 거래 내역 조회
+    render_cache_debug_panel,
 )
 from asset_portfolio.dashboard.transaction_editor import render_transaction_editor
 from asset_portfolio.dashboard.transaction_importer import render_transaction_importer
@@ -86,6 +87,10 @@ def render_main_dashboard():
             del st.session_state.user
             st.rerun()
 
+        # DASHBOARD_DEBUG=1이면 캐시 적중 상태를 사이드바에 표시
+        if os.environ.get("DASHBOARD_DEBUG") == "1":
+            render_cache_debug_panel()
+
         page = st.sidebar.radio(
             "화면 선택",
             ["자산 종합/분석", "거래내역 수정", "정기매수 관리", "자산가격 업데이트", "자산 정보 수정", "스냅샷 수정", "Transaction Importer"],
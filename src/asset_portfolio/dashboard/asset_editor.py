@@ -1,9 +1,11 @@
 import json
 import streamlit as st
 import pandas as pd
+from postgrest.types import ReturnMethod
 
 from asset_portfolio.backend.services.asset_service import AssetService
 from asset_portfolio.dashboard.transaction_editor import _load_assets_df  # 이미 있다면 재사용
+from asset_portfolio.dashboard.render import clear_asset_caches
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 
 
@@ -35,6 +37,7 @@ def _upsert_asset_price_source(payload: dict) -> None:
     supabase.table("asset_price_sources").upsert(
         payload,
         on_conflict="asset_id,source_type",
+        returning=ReturnMethod.minimal,
     ).execute()
 
 @st.cache_data(ttl=60)
@@ -143,7 +146,7 @@ def render_asset_editor():
         if krx_df.empty:
             krx_df = assets_df[(assets_df["market"].fillna("").str.lower().str.strip() == "korea") & (assets_df["asset_type"].fillna("").str.lower().str.strip() == "etf")].copy()
 
-        krx_df["krx_label"] = krx_df.apply(lambda r: f"{r['ticker']} | {r['name_kr']}", axis=1)
+        krx_df["krx_label"] = krx_df["ticker"].astype(str) + " | " + krx_df["name_kr"].astype(str)
         krx_options = krx_df["krx_label"].tolist()
         label_to_code = {lb: lb.split("|")[0].strip() for lb in krx_options}
 
@@ -262,7 +265,9 @@ def render_asset_editor():
                         })
 
             st.success("저장 완료")
-            st.cache_data.clear()
+            # 자산 정보를 들고 있는 캐시만 무효화 (스냅샷/환율 캐시는 유지)
+            _load_assets_df.clear()
+            clear_asset_caches()
             st.rerun()
         except Exception as e:
             st.error(f"저장 실패: {e}")
@@ -1,6 +1,7 @@
 import pandas as pd
 import streamlit as st
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
+from asset_portfolio.backend.services.data_contracts import rows_to_df
 
 
 @st.cache_data(ttl=3600)
@@ -20,7 +21,7 @@ def load_assets_lookup() -> pd.DataFrame:
     if not rows:
         return pd.DataFrame(columns=["asset_id", "name_kr", "ticker", "asset_type", "currency", "market"])
 
-    df = pd.DataFrame(rows).rename(columns={"id": "asset_id"})
+    df = rows_to_df(rows).rename(columns={"id": "asset_id"})
     return df
 
 
@@ -2,6 +2,7 @@ from datetime import date
 import streamlit as st
 import pandas as pd
 
+from asset_portfolio.dashboard.render import clear_asset_caches, clear_snapshot_caches
 from asset_portfolio.dashboard.transaction_editor import _load_assets_df
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 from asset_portfolio.backend.services.price_updater_service import PriceUpdaterService
@@ -36,9 +37,8 @@ def render_price_updater():
         df = df[df["asset_type"].fillna("").str.lower() != "cash"]
 
     # ✅ 스테일 판정: price_updated_at이 NULL이거나 N일보다 오래되면 stale
-    # - timezone이 섞일 수 있으니 UTC 기준으로 비교
+    # - price_updated_at은 _load_assets_df에서 이미 UTC datetime으로 파싱되어 있음
     now_utc = pd.Timestamp.utcnow()
-    df["price_updated_at"] = pd.to_datetime(df.get("price_updated_at"), errors="coerce", utc=True)
     df["is_stale"] = df["price_updated_at"].isna() | ((now_utc - df["price_updated_at"]) > pd.Timedelta(days=int(stale_days)))
 
     if only_failed:
@@ -52,10 +52,12 @@ def render_price_updater():
 
     selected_ids = []
     if mode == "선택한 자산만":
-        df["label"] = df.apply(lambda r: f"{r['ticker']} | {r['name_kr']} (id={r['id']})", axis=1)
+        df["label"] = df["ticker"].astype(str) + " | " + df["name_kr"].astype(str) + " (id=" + df["id"].astype(str) + ")"
+        # 라벨 → id 매핑은 numpy 배열 zip으로 한 번만 만든다 (라벨마다 DF 필터링하지 않음)
+        label_to_id = dict(zip(df["label"].to_numpy().tolist(), df["id"].to_numpy().tolist()))
         labels = st.multiselect("업데이트할 자산 선택", df["label"].tolist(), default=[])
         if labels:
-            selected_ids = [int(df.loc[df["label"] == lb, "id"].iloc[0]) for lb in labels]
+            selected_ids = [int(label_to_id[lb]) for lb in labels]
     else:
         selected_ids = [int(x) for x in df["id"].tolist()]
 
@@ -71,7 +73,7 @@ def render_price_updater():
             with st.spinner("가격 업데이트 중..."):
                 results = PriceUpdaterService.update_many(selected_ids)
 
-            asset_name_map = df.set_index("id")["name_kr"].to_dict()
+            asset_name_map = dict(zip(df["id"].to_numpy().tolist(), df["name_kr"].to_numpy().tolist()))
             krx_detail_map = {}
 
             source_asset_ids = []
@@ -152,7 +154,10 @@ def render_price_updater():
             })
             st.dataframe(res_df, width="stretch")
 
-            st.cache_data.clear()
+            # 가격/current_price 갱신 + 스냅샷 리빌드 → 자산/스냅샷 캐시만 무효화
+            _load_assets_df.clear()
+            clear_asset_caches()
+            clear_snapshot_caches()
             st.success("완료되었습니다. (실패 종목은 사유/스테일 상태를 확인하세요)")
         except Exception as e:
             st.error(f"실행 실패: {e}")
@@ -1,29 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
+from postgrest.types import ReturnMethod
 
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
-from asset_portfolio.backend.infra import query as q
+from asset_portfolio.dashboard.transaction_editor import _load_accounts_df, _load_assets_df
 
-
-@st.cache_data(ttl=300)
-def _load_accounts_df(user_id: str) -> pd.DataFrame:
-    rows = q.get_accounts(user_id)
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df["label"] = df.apply(lambda r: f"{r['brokerage']} | {r['name']} ({r['type']})", axis=1)
-    return df
-
-
-@st.cache_data(ttl=300)
-def _load_assets_df() -> pd.DataFrame:
-    rows = q.get_assets()
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df["label"] = df.apply(lambda r: f"{r['ticker']} | {r['name_kr']} [{str(r.get('currency','')).upper()}]", axis=1)
-    return df
+# ✅ 계좌/자산 목록은 거래 입력 탭과 같은 캐시를 공유한다. (탭마다 같은 테이블을 따로 조회하지 않도록)
+# ✅ 정기 매수 목록은 화면에서 실제로 쓰는 컬럼만 조회 (select("*")로 메타 컬럼까지 전부 받지 않도록)
+RECURRING_ORDER_COLUMNS = (
+    "id, asset_id, frequency, day_of_month, day_of_week, timezone, "
+    "quantity, price, amount, currency, start_date, end_date, active, memo"
+)
 
 
 def render_recurring_order_editor(user_id: str):
@@ -93,9 +81,9 @@ def render_recurring_order_editor(user_id: str):
                 "end_date": end_date_val.isoformat() if end_date_val else None,
                 "active": active, "memo": memo or None,
             }
-            supabase.table("recurring_orders").insert(payload).execute()
+            supabase.table("recurring_orders").insert(payload, returning=ReturnMethod.minimal).execute()
             st.success("정기 매수가 등록되었습니다.")
-            st.cache_data.clear()
+            # recurring_orders 목록은 캐시하지 않으므로 캐시 무효화 없이 rerun만 한다.
             st.rerun()
 
     st.divider()
@@ -104,7 +92,7 @@ def render_recurring_order_editor(user_id: str):
     user_account_ids = acc_df["id"].tolist()
     existing_rows = (
         supabase.table("recurring_orders")
-        .select("*")
+        .select(RECURRING_ORDER_COLUMNS)
         .in_("account_id", user_account_ids)
         .order("created_at", desc=True)
         .execute()
@@ -117,24 +105,18 @@ def render_recurring_order_editor(user_id: str):
 
     # Load all assets to map id to info
     all_assets_df = _load_assets_df()
-    # Create a helper to get label
-    # all_assets_df has columns like 'id', 'ticker', 'name_kr', etc.
-    # We can create a dictionary for O(1) lookup
-    asset_info_map = {}
+    # ✅ id -> 라벨 매핑을 컬럼 연산으로 한 번에 만들고, 주문 목록에는 Series.map으로 붙인다.
+    asset_label_map = {}
     if not all_assets_df.empty:
         # Assuming 'id' is unique
-        for _, row in all_assets_df.iterrows():
-            asset_info_map[row['id']] = row
+        labels = all_assets_df["ticker"].astype(str) + " | " + all_assets_df["name_kr"].astype(str)
+        asset_label_map = dict(zip(all_assets_df["id"], labels))
 
     df_orders = pd.DataFrame(existing_rows)
-    
-    def _get_asset_label(asset_id):
-        if asset_id not in asset_info_map:
-            return f"Unknown (id={asset_id})"
-        info = asset_info_map[asset_id]
-        return f"{info.get('ticker')} | {info.get('name_kr')}"
-
-    df_orders["asset_label"] = df_orders["asset_id"].apply(_get_asset_label)
+
+    df_orders["asset_label"] = df_orders["asset_id"].map(asset_label_map).fillna(
+        "Unknown (id=" + df_orders["asset_id"].astype(str) + ")"
+    )
     st.dataframe(
         df_orders[[
             "id", "asset_label", "frequency", "day_of_month", "day_of_week",
@@ -219,11 +201,9 @@ def render_recurring_order_editor(user_id: str):
                 }
                 supabase.table("recurring_orders").update(payload).eq("id", selected_id).execute()
                 st.success("정기 매수가 수정되었습니다.")
-                st.cache_data.clear()
                 st.rerun()
 
         if col_d.button("정기 매수 삭제", type="secondary", key=f"delete_{selected_id}"):
             supabase.table("recurring_orders").delete().eq("id", selected_id).execute()
             st.success("정기 매수가 삭제되었습니다.")
-            st.cache_data.clear()
             st.rerun()
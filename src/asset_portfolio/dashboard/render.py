@@ -1,5 +1,9 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
 import pandas as pd
-import altair as alt
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
@@ -24,6 +28,7 @@ from asset_portfolio.backend.services.benchmark_service import (
     load_sp500_benchmark_series,
     align_portfolio_to_benchmark_calendar
 )
+from asset_portfolio.backend.services.fx_service import FxService
 from asset_portfolio.backend.services.manual_cost_basis_service import attach_manual_cost_basis
 from asset_portfolio.backend.services.transaction_service import (
     TransactionService,
@@ -34,69 +39,214 @@ from asset_portfolio.dashboard.data import load_assets_lookup
 from asset_portfolio.backend.infra.query import fetch_all_pagination, load_asset_prices
 
 
+# ✅ 캐시 관찰용: 캐시 함수 본문은 miss일 때만 실행되므로 본문에서 miss 횟수를 센다.
+_CACHE_MISS_COUNTS: Counter = Counter()
+
+# 환율 버킷: 5원 단위로 반올림한 값이 같으면 같은 캐시 키로 취급한다.
+# (USD/KRW는 조회마다 소수점 단위로 움직이므로, 그보다 큰 단위여야 재계산을 흡수한다)
+FX_RATE_BUCKET_STEP = 5.0
+
+
+def _map_lower_labels(s: pd.Series, mapping: dict) -> pd.Series:
+    """
+    코드값(소문자 기준) → 표시 라벨 매핑
+    - 통화/자산유형은 고유값이 몇 개뿐이므로 factorize 후 고유값에만 lower/map을 적용하고
+      코드 배열로 펼친다. (행 수가 아니라 고유값 수만큼만 문자열 연산)
+    - 매핑에 없는 값/결측은 원래 값을 그대로 둔다.
+    """
+    codes, uniques = pd.factorize(s)
+    if len(uniques) == 0:
+        return s
+    labels = np.array([mapping.get(str(u).lower(), u) for u in uniques], dtype=object)
+    return pd.Series(np.where(codes >= 0, labels.take(codes, mode="clip"), s.to_numpy(dtype=object)), index=s.index)
+
+
+class _FxFallbackRate(Exception):
+    """조회 실패로 fallback 환율이 나왔음을 알린다 (st.cache_data는 예외를 캐시하지 않음)"""
+
+    def __init__(self, rate: float):
+        super().__init__(rate)
+        self.rate = rate
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _load_usdkrw_rate_cached() -> float:
+    _CACHE_MISS_COUNTS["load_usdkrw_rate"] += 1
+    fx = FxService.get_usdkrw()
+    if fx.source == "fallback":
+        raise _FxFallbackRate(float(fx.rate))
+    return float(fx.rate)
+
+
+def load_usdkrw_rate() -> float:
+    """
+    USD/KRW 환율 (rerun마다 yfinance를 호출하지 않도록 캐시)
+    - fallback 환율은 캐시하지 않는다 → 다음 rerun에서 다시 조회 (FxService와 같은 정책)
+    """
+    try:
+        return _load_usdkrw_rate_cached()
+    except _FxFallbackRate as e:
+        return e.rate
+
+
+def get_usdkrw_rate_bucket() -> float:
+    """캐시 키로 쓰기 위해 환율을 버킷 단위로 반올림한다."""
+    return round(load_usdkrw_rate() / FX_RATE_BUCKET_STEP) * FX_RATE_BUCKET_STEP
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_asset_weight_df(
+    user_id: str,
+    account_id: str,
+    start_date: str,
+    end_date: str,
+    usdkrw_bucket: float,
+) -> pd.DataFrame:
+    """
+    자산 비중 시계열(KRW 환산) 캐시
+    - 환율 버킷을 캐시 키에 포함해서, 환율이 의미 있게 바뀌었을 때만 다시 계산한다.
+    """
+    _CACHE_MISS_COUNTS["load_asset_weight_df"] += 1
+    rows = load_asset_weight_timeseries(
+        user_id=user_id,
+        account_id=account_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return build_asset_weight_df(rows, usdkrw=usdkrw_bucket)
+
+
+def render_cache_debug_panel() -> None:
+    """
+    사이드바 디버그 패널: 캐시 miss 횟수 + st.cache_data 함수별 메모리 사용량
+    - app.py에서 DASHBOARD_DEBUG=1일 때만 호출
+    """
+    with st.sidebar.expander("🔎 캐시 상태"):
+        st.caption("miss 횟수 (캐시 함수 본문 실행 횟수)")
+        st.json(dict(_CACHE_MISS_COUNTS))
+
+        try:
+            from streamlit.runtime.caching import get_data_cache_stats_provider
+
+            stats = get_data_cache_stats_provider().get_stats()
+        except Exception as e:  # streamlit 내부 API라 버전에 따라 없을 수 있음
+            st.caption(f"캐시 메모리 통계를 가져오지 못했습니다: {e}")
+            return
+
+        # get_stats()는 캐시 항목마다 1개씩 반환하므로 함수(cache_name)별로 합산한다.
+        usage: Counter = Counter()
+        for s in stats:
+            usage[s.cache_name] += s.byte_length
+
+        st.caption("st.cache_data 메모리 사용량 (bytes)")
+        st.json(dict(usage))
+
+
 @st.cache_data(ttl=600)
 def load_portfolio_return_series_cached(user_id: str, account_id: str, start_date: str, end_date: str) -> pd.DataFrame:
     """cached wrapper for get_portfolio_return_series"""
     return get_portfolio_return_series(user_id, account_id, start_date, end_date)
 
 
+def _load_asset_grouping_summary_rpc(user_id: str, account_id: str) -> Optional[pd.DataFrame]:
+    """
+    ✅ asset_summary_live 합계를 Postgres 함수(asset_grouping_summary)로 서버에서 집계
+    - 자산 행 전체 대신 (asset_type, underlying_asset_class)별 합계 몇 행만 내려받는다.
+    - 함수가 아직 배포되지 않았으면(PGRST202) None → 기존 파이썬 집계로 대체
+    - 함수는 있는데 합계가 0행이면 빈 DataFrame (그 외 오류는 그대로 올린다)
+    - 함수 정의는 docs/DB_SCHEMA.md 참고
+    """
+    if account_id and account_id != "__ALL__":
+        account_ids = [account_id]
+    else:
+        account_ids = query.get_account_ids(user_id)
+        if not account_ids:
+            return None
+
+    try:
+        rows = (
+            get_supabase_client()
+            .rpc("asset_grouping_summary", {"p_account_ids": account_ids})
+            .execute()
+            .data
+            or []
+        )
+    except Exception as e:
+        if query.is_missing_rpc_error(e):
+            return None
+        raise
+
+    df = pd.DataFrame(rows, columns=["asset_type", "underlying_asset_class", "total_valuation_amount"])
+    df["total_valuation_amount"] = pd.to_numeric(df["total_valuation_amount"], errors="coerce").fillna(0)
+    return df
+
+
 @st.cache_data(ttl=600)
 def load_asset_grouping_summary(user_id: str, account_id: str) -> pd.DataFrame:
     """
     자산 분류 기준(자산 유형/기초자산 클래스)별 평가금액 합계를 가져옵니다.
 
     - 캐시를 사용해서 동일한 계좌/사용자 요청을 빠르게 처리합니다.
-    - Supabase에서 원본 데이터를 가져오고, 파이썬에서 그룹 집계를 수행합니다.
+    - DB 함수(asset_grouping_summary)가 있으면 서버에서 합계까지 계산된 몇 행만 받습니다.
+    - 함수가 없으면 Supabase에서 원본 데이터를 가져오고, 파이썬에서 그룹 집계를 수행합니다.
     - asset_summary_live가 비어 있으면 daily_snapshots의 최신 날짜 데이터를 대체로 사용합니다.
     """
     supabase = get_supabase_client()
 
-    # 기본 조회: asset_summary_live + assets 조인
-    query_builder = (
-        supabase.table("asset_summary_live")
-        .select(
-            "asset_id, account_id, total_valuation_amount, "
-            "assets (asset_type, underlying_asset_class)"
-        )
-    )
-
-    # 계좌 선택이 "전체"인지 여부에 따라 필터 조건이 달라짐
-    if account_id and account_id != "__ALL__":
-        query_builder = query_builder.eq("account_id", account_id)
-    else:
-        # 전체 계좌 조회 시, 로그인 사용자의 계좌 리스트를 가져와서 IN 조건으로 조회
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc["id"] for acc in user_accounts]
-        if not user_account_ids:
-            return pd.DataFrame(
-                columns=["asset_type", "underlying_asset_class", "total_valuation_amount"]
-            )
-        query_builder = query_builder.in_("account_id", user_account_ids)
-
-    rows = query_builder.execute().data or []
-
     # ============================================
-    # 1) 우선 asset_summary_live 기반 데이터 정규화
+    # 0) 서버 측 집계(RPC) 우선 시도
     # ============================================
-    df = pd.json_normalize(rows, sep=".") if rows else pd.DataFrame()
-
-    # 데이터 안전성: 숫자 변환 + 결측치 기본값 처리
-    if not df.empty:
-        df["total_valuation_amount"] = pd.to_numeric(
-            df["total_valuation_amount"], errors="coerce"
-        ).fillna(0)
-        df["assets.asset_type"] = df["assets.asset_type"].fillna("미분류")
-        df["assets.underlying_asset_class"] = df["assets.underlying_asset_class"].fillna("미분류")
-
-        # 표준화된 컬럼명으로 정리
-        df = df.rename(
-            columns={
-                "assets.asset_type": "asset_type",
-                "assets.underlying_asset_class": "underlying_asset_class",
-            }
+    rpc_df = _load_asset_grouping_summary_rpc(user_id, account_id)
+    if rpc_df is not None and not rpc_df.empty:
+        return rpc_df
+
+    # RPC가 0행을 돌려줬다면 asset_summary_live도 비어 있다는 뜻 → 재조회 없이 스냅샷 대체(2)로 간다.
+    if rpc_df is None:
+        # 기본 조회: asset_summary_live + assets 조인
+        query_builder = (
+            supabase.table("asset_summary_live")
+            .select(
+                "asset_id, account_id, total_valuation_amount, "
+                "assets (asset_type, underlying_asset_class)"
+            )
         )
 
-        return df[["asset_type", "underlying_asset_class", "total_valuation_amount"]]
+        # 계좌 선택이 "전체"인지 여부에 따라 필터 조건이 달라짐
+        if account_id and account_id != "__ALL__":
+            query_builder = query_builder.eq("account_id", account_id)
+        else:
+            # 전체 계좌 조회 시, 로그인 사용자의 계좌 리스트를 가져와서 IN 조건으로 조회
+            user_account_ids = query.get_account_ids(user_id)
+            if not user_account_ids:
+                return pd.DataFrame(
+                    columns=["asset_type", "underlying_asset_class", "total_valuation_amount"]
+                )
+            query_builder = query_builder.in_("account_id", user_account_ids)
+
+        rows = query_builder.execute().data or []
+
+        # ============================================
+        # 1) 우선 asset_summary_live 기반 데이터 정규화
+        # ============================================
+        df = pd.json_normalize(rows, sep=".") if rows else pd.DataFrame()
+
+        # 데이터 안전성: 숫자 변환 + 결측치 기본값 처리
+        if not df.empty:
+            df["total_valuation_amount"] = pd.to_numeric(
+                df["total_valuation_amount"], errors="coerce"
+            ).fillna(0)
+            df["assets.asset_type"] = df["assets.asset_type"].fillna("미분류")
+            df["assets.underlying_asset_class"] = df["assets.underlying_asset_class"].fillna("미분류")
+
+            # 표준화된 컬럼명으로 정리
+            df = df.rename(
+                columns={
+                    "assets.asset_type": "asset_type",
+                    "assets.underlying_asset_class": "underlying_asset_class",
+                }
+            )
+
+            return df[["asset_type", "underlying_asset_class", "total_valuation_amount"]]
 
     # ==========================================================
     # 2) asset_summary_live가 비어 있으면 최신 스냅샷으로 대체
@@ -110,8 +260,7 @@ def load_asset_grouping_summary(user_id: str, account_id: str) -> pd.DataFrame:
     if account_id and account_id != "__ALL__":
         latest_query = latest_query.eq("account_id", account_id)
     else:
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc["id"] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         if not user_account_ids:
             return pd.DataFrame(
                 columns=["asset_type", "underlying_asset_class", "total_valuation_amount"]
@@ -137,8 +286,7 @@ def load_asset_grouping_summary(user_id: str, account_id: str) -> pd.DataFrame:
     if account_id and account_id != "__ALL__":
         snapshot_query = snapshot_query.eq("account_id", account_id)
     else:
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc["id"] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         if not user_account_ids:
             return pd.DataFrame(
                 columns=["asset_type", "underlying_asset_class", "total_valuation_amount"]
@@ -169,6 +317,83 @@ def load_asset_grouping_summary(user_id: str, account_id: str) -> pd.DataFrame:
     return snapshot_df[["asset_type", "underlying_asset_class", "total_valuation_amount"]]
 
 
+@st.cache_data(ttl=600, show_spinner=False)
+def load_transactions_rows(user_id: str, account_id: str, start_date: str, end_date: str) -> list:
+    """
+    거래 내역 탭용 transactions 조회 (assets/accounts 조인 포함)
+    - rerun마다 Supabase를 다시 조회하지 않도록 캐시
+    - 거래 수정/삭제 후에는 clear_transaction_caches()로 필요한 캐시만 무효화
+    """
+    supabase = get_supabase_client()
+    q = (
+        supabase.table("transactions")
+        .select("""
+            id,
+            account_id,
+            asset_id,
+            transaction_date,
+            trade_type,
+            quantity,
+            price,
+            fee,
+            tax,
+            memo,
+            assets ( ticker, name_kr, currency ),
+            accounts ( name, brokerage, old_owner, type )
+        """)
+        .order("transaction_date", desc=True)
+    )
+
+    if start_date is not None:
+        q = q.gte("transaction_date", start_date)
+    if end_date is not None:
+        q = q.lte("transaction_date", end_date)
+
+    if account_id and account_id != "__ALL__":
+        q = q.eq("account_id", account_id)
+    else:
+        user_account_ids = query.get_account_ids(user_id)
+        if not user_account_ids:
+            return []
+        q = q.in_("account_id", user_account_ids)
+
+    return q.execute().data or []
+
+
+def clear_snapshot_caches() -> None:
+    """
+    daily_snapshots/asset_summary_live 기반 집계 캐시만 비운다.
+    - 스냅샷 저장/리빌드 후 호출 (환율/계좌/거래 목록 캐시는 유지)
+    """
+    load_portfolio_return_series_cached.clear()
+    load_asset_grouping_summary.clear()
+    load_asset_weight_df.clear()
+
+
+def clear_transaction_caches() -> None:
+    """
+    거래 저장/수정/삭제 후 무효화가 필요한 캐시만 비운다.
+    - 거래 변경 → 해당 자산 daily_snapshots 리빌드 → 스냅샷 기반 집계 캐시도 함께 무효화
+    - 자산/계좌 lookup 등 거래와 무관한 캐시는 유지 (st.cache_data.clear() 전체 삭제 방지)
+    """
+    load_transactions_rows.clear()
+    clear_snapshot_caches()
+
+
+def clear_asset_caches() -> None:
+    """
+    자산 정보(assets) 변경 후 비울 캐시
+    - 자산 lookup + assets 조인 결과(자산명/유형)를 들고 있는 캐시만 무효화
+    """
+    load_assets_lookup.clear()
+    load_transactions_rows.clear()
+    load_asset_grouping_summary.clear()
+
+
+# ✅ 섹션 내부 위젯(selectbox/slider/radio 등)을 바꿀 때는 해당 섹션만 다시 실행한다.
+# - st.fragment가 없으면 위젯 하나만 바꿔도 모든 탭의 조회/집계/차트가 다시 실행된다.
+# - 데이터가 바뀌는 동작(거래 수정/삭제)은 기존처럼 st.rerun()으로 전체를 다시 그린다.
+@st.fragment
 def render_asset_grouping_pie_section(user_id: str, account_id: str):
     st.subheader("🧩 동적 그룹화 차트")
 
@@ -195,8 +420,10 @@ def render_asset_grouping_pie_section(user_id: str, account_id: str):
         return
 
     # 선택한 기준으로 평가금액 합계를 계산
+    # - total_valuation_amount는 load_asset_grouping_summary에서 이미 숫자로 변환되어 있으므로 재변환하지 않음
+    # - 바로 아래에서 금액 기준으로 정렬하므로 groupby 키 정렬은 생략(sort=False)
     grouped_df = (
-        raw_df.groupby(group_key, as_index=False)["total_valuation_amount"]
+        raw_df.groupby(group_key, as_index=False, sort=False)["total_valuation_amount"]
         .sum()
         .sort_values("total_valuation_amount", ascending=False)
     )
@@ -245,13 +472,14 @@ def render_asset_grouping_pie_section(user_id: str, account_id: str):
     st.plotly_chart(fig, width='stretch')
 
     # 표 형태로도 확인할 수 있도록 데이터프레임 출력
-    display_df = grouped_df.copy()
-    display_df[group_key] = display_df["display_label"] # 맵핑된 한글 적용
-    
+    # - 맵핑된 한글 라벨 컬럼을 바로 골라 이름만 바꿔 전달(전체 복사 없이)
+    # - 합계는 정수(%d)로만 표시하므로 nullable 정수(Int64)로 넘긴다.
     st.dataframe(
-        display_df[[group_key, "total_valuation_amount"]].rename(
+        grouped_df[["display_label"]]
+        .assign(total_valuation_amount=grouped_df["total_valuation_amount"].round().astype("Int64"))
+        .rename(
             columns={
-                group_key: "분류 기준",
+                "display_label": "분류 기준",
                 "total_valuation_amount": "평가금액 합계",
             }
         ),
@@ -276,11 +504,7 @@ def render_kpi_section(user_id: str, account_id: str, start_date: str, end_date:
     # =========================
     # 1) 포트폴리오 시계열 (Cached)
     # =========================
-    @st.cache_data(ttl=600)
-    def _load_portfolio_series(u_id, acc_id, s_date, e_date):
-        return get_portfolio_return_series(u_id, acc_id, s_date, e_date)
-
-    portfolio_df = _load_portfolio_series(user_id, account_id, start_date, end_date)
+    portfolio_df = load_portfolio_return_series_cached(user_id, account_id, start_date, end_date)
 
     if portfolio_df.empty:
         st.warning("조회된 데이터가 없습니다.")
@@ -290,7 +514,7 @@ def render_kpi_section(user_id: str, account_id: str, start_date: str, end_date:
     # 4) KPI 요약 카드
     # =========================
     # portfolio_return이 NaN인 경우가 있을 수 있으니, 마지막 유효값 기준으로 계산
-    pf_valid = portfolio_df.dropna(subset=["portfolio_return"]).copy()
+    pf_valid = portfolio_df.dropna(subset=["portfolio_return"])
 
     if not pf_valid.empty:
         last = pf_valid.sort_values("date").iloc[-1]
@@ -351,9 +575,10 @@ def render_portfolio_trend_chart(user_id: str, account_id: str, start_date: str,
 
     # Y축 범위 계산 (데이터의 min/max 기준)
     # 0을 포함하지 않고 변화량을 잘 보여주도록 설정
-    all_values = pd.concat([df["valuation_amount"], df["purchase_amount"]])
-    min_val = all_values.min()
-    max_val = all_values.max()
+    # - 두 컬럼을 concat으로 이어 붙이지 않고 2차원 배열에서 바로 min/max
+    all_values = df[["valuation_amount", "purchase_amount"]].to_numpy(dtype=float)
+    min_val = np.nanmin(all_values)
+    max_val = np.nanmax(all_values)
     margin = (max_val - min_val) * 0.1 if max_val != min_val else max_val * 0.05
     
     fig.update_layout(
@@ -381,31 +606,34 @@ def render_benchmark_comparison_section(user_id: str, account_id: str, start_dat
         return
 
     # =========================
-    # 1) 포트폴리오 수익률 (Cached)
+    # 1) 포트폴리오 수익률 (Cached) + 벤치마크 수익률 (S&P 500)
+    # - 기간이 정해져 있으면 두 조회는 서로 의존하지 않으므로 yfinance 다운로드를 동시에 시작한다.
+    #   (왕복 대기 시간이 합이 아니라 둘 중 긴 쪽만큼만 걸림)
     # =========================
-    portfolio_df = load_portfolio_return_series_cached(user_id, account_id, start_date, end_date)
+    benchmark_df = pd.DataFrame()
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        benchmark_future = None
+        if start_date is not None and end_date is not None:
+            benchmark_future = ex.submit(load_sp500_benchmark_series, start_date=start_date, end_date=end_date)
+
+        portfolio_df = load_portfolio_return_series_cached(user_id, account_id, start_date, end_date)
+        if benchmark_future is not None:
+            benchmark_df = benchmark_future.result()
 
     if portfolio_df.empty:
         st.warning("조회 가능한 데이터가 없습니다.")
         return
 
     # =========================
-    # 2) 벤치마크 수익률 (S&P 500)
+    # 2) 기간이 비어 있으면 포트폴리오 날짜 범위로 벤치마크 조회
     # =========================
-    benchmark_start = start_date
-    benchmark_end = end_date
-    if benchmark_start is None or benchmark_end is None:
+    if start_date is None or end_date is None:
         portfolio_dates = pd.to_datetime(portfolio_df["date"], errors="coerce").dropna()
         if not portfolio_dates.empty:
-            benchmark_start = portfolio_dates.min().date()
-            benchmark_end = portfolio_dates.max().date()
-
-    benchmark_df = pd.DataFrame()
-    if benchmark_start is not None and benchmark_end is not None:
-        benchmark_df = load_sp500_benchmark_series(
-            start_date=benchmark_start,
-            end_date=benchmark_end,
-        )
+            benchmark_df = load_sp500_benchmark_series(
+                start_date=portfolio_dates.min().date(),
+                end_date=portfolio_dates.max().date(),
+            )
 
     # =========================
     # 3) 벤치마크 캘린더에 맞춰 forward-fill
@@ -418,28 +646,29 @@ def render_benchmark_comparison_section(user_id: str, account_id: str, start_dat
     # =========================
     # 4) 차트 데이터 준비
     # =========================
-    chart_df = portfolio_df[["date", "portfolio_return"]].copy()
-    chart_df["date"] = pd.to_datetime(chart_df["date"]).dt.date
-    chart_df["portfolio_return_pct"] = chart_df["portfolio_return"] * 100
+    # 원본 DF를 복사하지 않고 차트에 필요한 컬럼만 새로 구성
+    # - date는 파이썬 date 객체(object)로 바꾸지 않고 datetime64로 유지 → merge/차트 직렬화가 벡터 경로를 탄다.
+    chart_df = pd.DataFrame({
+        "date": pd.to_datetime(portfolio_df["date"]).dt.normalize(),
+        "portfolio_return_pct": portfolio_df["portfolio_return"] * 100,
+    })
 
     if not benchmark_df.empty:
-        b = benchmark_df.copy()
-        b["date"] = pd.to_datetime(b["date"]).dt.date
-        b["benchmark_return_pct"] = b["benchmark_return"] * 100
-        chart_df = chart_df.merge(
-            b[["date", "benchmark_return_pct"]],
-            on="date",
-            how="left",
-        )
+        b = pd.DataFrame({
+            "date": pd.to_datetime(benchmark_df["date"]).dt.normalize(),
+            "benchmark_return_pct": benchmark_df["benchmark_return"] * 100,
+        })
+        chart_df = chart_df.merge(b, on="date", how="left")
 
     # =========================
     # 5) 이중 Y축 라인 차트 (좌: 포트폴리오, 우: 벤치마크)
     # =========================
     fig = make_subplots(specs=[[{"secondary_y": True}]])
+    x_dates = chart_df["date"]  # 두 라인이 같은 x축 배열을 공유
 
     fig.add_trace(
         go.Scatter(
-            x=chart_df["date"],
+            x=x_dates,
             y=chart_df["portfolio_return_pct"],
             name="포트폴리오 수익률(%)",
             mode="lines",
@@ -450,7 +679,7 @@ def render_benchmark_comparison_section(user_id: str, account_id: str, start_dat
     if "benchmark_return_pct" in chart_df.columns:
         fig.add_trace(
             go.Scatter(
-                x=chart_df["date"],
+                x=x_dates,
                 y=chart_df["benchmark_return_pct"],
                 name="벤치마크(S&P500) 수익률(%)",
                 mode="lines",
@@ -473,6 +702,7 @@ def render_benchmark_comparison_section(user_id: str, account_id: str, start_dat
     )
 
 
+@st.fragment
 def render_asset_return_section(
     user_id: str,
     account_id: str,
@@ -580,7 +810,7 @@ def render_asset_return_section(
     # ============================
     # 6. 차트 출력 (Dual Axis: 수익률(L) vs 가격(R))
     # ============================
-    asset_df["date"] = pd.to_datetime(asset_df["date"]).dt.date  # 시간 제거
+    asset_df["date"] = pd.to_datetime(asset_df["date"]).dt.normalize()  # 시간 제거 (datetime64 유지)
     
     # 가격 데이터 조회
     price_rows = load_asset_prices(selected_asset_id, start_date, end_date)
@@ -588,7 +818,7 @@ def render_asset_return_section(
     
     # 가격 데이터 전처리 & 병합
     if not price_df.empty:
-        price_df["date"] = pd.to_datetime(price_df["price_date"]).dt.date
+        price_df["date"] = pd.to_datetime(price_df["price_date"]).dt.normalize()
         price_df.rename(columns={"close_price": "price"}, inplace=True)
         # 필요한 컬럼만 남기고 병합
         combined_df = pd.merge(
@@ -598,16 +828,16 @@ def render_asset_return_section(
             how="left"
         )
     else:
-        combined_df = asset_df.copy()
-        combined_df["price"] = None
+        combined_df = asset_df.assign(price=None)
 
     # Plotly Dual Axis Chart 생성
     fig = make_subplots(specs=[[{"secondary_y": True}]])
+    x_dates = combined_df["date"]  # 수익률/가격 라인이 같은 x축 배열을 공유
 
     # 1) 수익률 (Left Y)
     fig.add_trace(
         go.Scatter(
-            x=combined_df["date"],
+            x=x_dates,
             y=combined_df["return_rate"] * 100, # % 단위
             name="수익률(%)",
             mode="lines",
@@ -624,7 +854,7 @@ def render_asset_return_section(
         
         fig.add_trace(
             go.Scatter(
-                x=combined_df["date"],
+                x=x_dates,
                 y=combined_df["price"],
                 name=price_label,
                 mode="lines",
@@ -646,7 +876,7 @@ def render_asset_return_section(
     fig.update_yaxes(title_text="수익률(%)", secondary_y=False)
     
     # Streamlit에 표시
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, width='stretch')
 
     # ============================
     # 7. 테이블 (확인용)
@@ -660,7 +890,8 @@ def render_asset_return_section(
                     "purchase_amount",
                     "return_rate",
                 ]
-            ]
+            ],
+            column_config={"date": st.column_config.DateColumn("date", format="YYYY-MM-DD")},
         )
 
 
@@ -685,8 +916,7 @@ def render_latest_snapshot_table(user_id: str, account_id: str):
     if account_id != "__ALL__":
         latest_query = latest_query.eq("account_id", account_id)
     else:
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         if not user_account_ids:
             st.info("daily_snapshots 데이터가 없습니다.")
             return
@@ -713,8 +943,7 @@ def render_latest_snapshot_table(user_id: str, account_id: str):
     if account_id != "__ALL__":
         rows_query = rows_query.eq("account_id", account_id)
     else:
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         rows_query = rows_query.in_("account_id", user_account_ids)
 
 
@@ -734,30 +963,25 @@ def render_latest_snapshot_table(user_id: str, account_id: str):
 
     df = attach_manual_cost_basis(df, user_id=user_id)
 
-    df["purchase_amount"] = pd.to_numeric(df["purchase_amount"], errors="coerce")
-    df["valuation_amount"] = pd.to_numeric(df["valuation_amount"], errors="coerce")
-    if "manual_principal" in df.columns:
-        df["manual_principal"] = pd.to_numeric(df["manual_principal"], errors="coerce")
+    # ✅ 숫자 컬럼은 컬럼 목록 기준으로 한 번의 assign으로 변환
+    num_cols = [c for c in ["purchase_amount", "valuation_amount", "manual_principal"] if c in df.columns]
+    df = df.assign(**{c: pd.to_numeric(df[c], errors="coerce") for c in num_cols})
 
     df["profit_base_amount"] = df["purchase_amount"]
     manual_mask = df["assets.price_source"].fillna("").str.lower().str.strip().eq("manual")
     df.loc[manual_mask, "profit_base_amount"] = df.loc[manual_mask, "manual_principal"]
 
     df["profit_amount"] = df["valuation_amount"] - df["profit_base_amount"]
-    df["profit_rate"] = df.apply(
-        lambda r: (r["profit_amount"] / r["profit_base_amount"] * 100)
-        if float(r["profit_base_amount"] or 0) > 0
-        else 0.0,
-        axis=1,
-    )
+    # ✅ 행 단위 apply 대신 컬럼 전체를 한 번에 계산 (원금 0/결측이면 수익률 0)
+    base = df["profit_base_amount"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["profit_rate"] = np.where(base > 0, df["profit_amount"].to_numpy(dtype=float) / base * 100, 0.0)
 
     currency_map = {
         "krw": "원화",
         "usd": "달러",
     }
-    df["currency"] = df["currency"].apply(
-        lambda x: currency_map.get(str(x).lower(), x) if x is not None else x
-    )
+    df["currency"] = _map_lower_labels(df["currency"], currency_map)
 
     asset_type_map = {
         "cash": "예수금",
@@ -767,9 +991,7 @@ def render_latest_snapshot_table(user_id: str, account_id: str):
         "fund": "펀드류",
         "tdf": "TDF",
     }
-    df["assets.asset_type"] = df["assets.asset_type"].apply(
-        lambda x: asset_type_map.get(str(x).lower(), x) if x is not None else x
-    )
+    df["assets.asset_type"] = _map_lower_labels(df["assets.asset_type"], asset_type_map)
 
     df = df.rename(
         columns={
@@ -803,58 +1025,50 @@ def render_latest_snapshot_table(user_id: str, account_id: str):
 
     st.caption(f"기준일: {latest_date}")
 
-    display_df = df[columns].copy()
-
-    profit_amount_col = columns[7]
-    profit_rate_col = columns[8]
-    asset_name_col = columns[1]
-    def _format_quantity(value):
-        if pd.isna(value):
-            return ""
-        try:
-            num = float(value)
-        except (TypeError, ValueError):
-            return value
-        if num.is_integer():
-            return f"{num:,.0f}"
-        return f"{num:,.2f}"
-
-    format_map = {
-        columns[2]: _format_quantity,
-        columns[3]: "{:,.2f}",
-        columns[4]: "{:,.2f}",
-        columns[5]: "{:,.0f}",
-        columns[6]: "{:,.0f}",
-        columns[7]: "{:,.0f}",
-        profit_rate_col: "{:.2f}%",
+    # ✅ 숫자는 숫자 그대로 두고(반올림만) 표시 포맷은 column_config로 지정
+    # - Styler(format/apply)는 셀마다 문자열/CSS를 만들어 HTML 렌더 경로를 타므로 사용하지 않는다.
+    # - 수익 방향은 색상 대신 자산명 앞 ▲(수익)/▼(손실) 표시 + 수익률 부호(+/-)로 나타낸다.
+    round_map = {
+        columns[3]: 2,
+        columns[4]: 2,
+        columns[5]: 0,
+        columns[6]: 0,
+        columns[7]: 0,
+        columns[8]: 2,
     }
+    numeric_cols = [columns[2], *round_map]
+    # 원 단위 금액(반올림 0자리)은 nullable 정수로 넘겨 표시 시 float→정수 변환을 생략
+    # - 세 컬럼을 2D 배열 하나로 모아 np.rint 한 번으로 반올림한다. (컬럼별 round → astype 두 단계를 거치지 않음)
+    int_cols = [c for c, digits in round_map.items() if digits == 0]
+    frac_round_map = {c: digits for c, digits in round_map.items() if digits > 0}
+    numeric = {c: pd.to_numeric(df[c], errors="coerce") for c in numeric_cols}
+    int_vals = np.rint(np.column_stack([numeric[c].to_numpy(dtype=float) for c in int_cols]))
+    # 컬럼 선택 결과에 필요한 숫자 컬럼만 덮어쓰므로 별도 .copy()가 필요 없다.
+    display_df = (
+        df[columns]
+        .assign(**numeric)
+        .round(frac_round_map)
+        .assign(**{c: pd.array(int_vals[:, i], dtype="Int64") for i, c in enumerate(int_cols)})
+    )
+    # ✅ 수익 방향 표시: 수익률 부호로 접두사를 컬럼 단위로 한 번에 만든다. (0/결측은 접두사 없음)
+    rate = numeric[columns[8]].to_numpy(dtype=float)
+    direction = np.select([rate > 0, rate < 0], ["▲ ", "▼ "], default="")
+    display_df[columns[1]] = direction + display_df[columns[1]].fillna("").astype(str)
 
-    for col in format_map:
-        display_df[col] = pd.to_numeric(display_df[col], errors="coerce")
-
-    profit_amount_idx = display_df.columns.get_loc(profit_amount_col)
-    profit_rate_idx = display_df.columns.get_loc(profit_rate_col)
-    asset_name_idx = display_df.columns.get_loc(asset_name_col)
-
-    def _profit_color(row):
-        rate = row[profit_rate_col]
-        if pd.isna(rate):
-            return [""] * len(row)
-        if rate > 0:
-            color = "color: red"
-        elif rate < 0:
-            color = "color: blue"
-        else:
-            color = ""
-        styles = [""] * len(row)
-        styles[asset_name_idx] = color
-        styles[profit_amount_idx] = color
-        styles[profit_rate_idx] = color
-        return styles
-
-    styled_df = display_df.style.format(format_map).apply(_profit_color, axis=1)
-
-    st.dataframe(styled_df, width='stretch')
+    st.dataframe(
+        display_df,
+        width="stretch",
+        hide_index=True,
+        column_config={
+            columns[2]: st.column_config.NumberColumn(columns[2], format="localized"),
+            columns[3]: st.column_config.NumberColumn(columns[3], format="localized"),
+            columns[4]: st.column_config.NumberColumn(columns[4], format="localized"),
+            columns[5]: st.column_config.NumberColumn(columns[5], format="localized"),
+            columns[6]: st.column_config.NumberColumn(columns[6], format="localized"),
+            columns[7]: st.column_config.NumberColumn(columns[7], format="localized"),
+            columns[8]: st.column_config.NumberColumn(columns[8], format="%+.2f%%"),
+        },
+    )
 
 
 def render_account_selector(accounts: list):
@@ -903,8 +1117,7 @@ def _get_min_snapshot_date(user_id: str, account_id: str):
     else:
         # '전체'일 경우 user_id에 속한 모든 계좌를 대상으로 함
         from asset_portfolio.backend.infra import query
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         if not user_account_ids:
             return None
         q = q.in_("account_id", user_account_ids)
@@ -966,17 +1179,11 @@ def render_period_selector(user_id: str, account_id: str):
 
 
 
+@st.fragment
 def render_asset_weight_section(user_id: str, account_id: str, start_date: str, end_date: str):
     st.subheader("📊 자산 비중 변화")
 
-    rows = load_asset_weight_timeseries(
-        user_id=user_id,
-        account_id=account_id,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    
-    df = build_asset_weight_df(rows)
+    df = load_asset_weight_df(user_id, account_id, start_date, end_date, get_usdkrw_rate_bucket())
     
     # 총액이 0인 날짜는 제거(의미 없는 구간 제거)
     # df는 build_asset_weight_df 결과(valuation_amount_krw, total_amount_krw가 있음)
@@ -999,41 +1206,9 @@ def render_asset_weight_section(user_id: str, account_id: str, start_date: str,
             st.dataframe(df.head(50))
         return
 
-    # =========================
-    # ✅ ALL 모드: (date, asset_id) 기준으로 유일화 + weight 재계산
-    # =========================
-    if account_id == "__ALL__":
-        # valuation_amount가 있어야 전체 평가금액 합산 가능
-        if "valuation_amount" not in df.columns:
-            st.error("ALL 모드 합산을 위해 valuation_amount 컬럼이 필요합니다.")
-            with st.expander("🔎 디버깅: df 확인"):
-                st.write("columns =", list(df.columns))
-                st.dataframe(df.head(50))
-            return
-
-        df["valuation_amount"] = pd.to_numeric(df["valuation_amount"], errors="coerce").fillna(0.0)
-        df["asset_id"] = pd.to_numeric(df["asset_id"], errors="coerce")
-        df = df.dropna(subset=["asset_id"])
-        df["asset_id"] = df["asset_id"].astype(int)
-
-        # ✅ (date, asset_id)로 합산
-        df_agg = (
-            df.groupby(["date", "asset_id"], as_index=False)
-              .agg(
-                  valuation_amount=("valuation_amount", "sum"),
-                  asset_name=("asset_name", "first"),
-              )
-        )
-
-        # ✅ date_total 계산
-        df_agg["date_total"] = df_agg.groupby("date")["valuation_amount"].transform("sum")
-
-        # ✅ 0 division 방지
-        df_agg["weight"] = 0.0
-        mask = df_agg["date_total"] > 0
-        df_agg.loc[mask, "weight"] = df_agg.loc[mask, "valuation_amount"] / df_agg.loc[mask, "date_total"]
-
-        df = df_agg[["date", "asset_id", "asset_name", "weight"]].copy()
+    # ✅ ALL/단일 계좌 공통: build_asset_weight_df가 이미 (date, asset_id) 유일화 +
+    #    KRW 환산(valuation_amount_krw/total_amount_krw/weight)까지 계산해 두었으므로 그대로 재사용
+    # - 여기서 원통화 valuation_amount로 다시 합산/비중을 계산하면 USD 자산 비중이 왜곡되고 연산도 중복됨
 
     # =========================
     # ✅ 시각화 개선 (Plotly Area Chart + Top N + Others)
@@ -1156,6 +1331,7 @@ def render_asset_contribution_section(
     st.caption("※ 전일 포트폴리오 대비 기여도 (%)")
 
 
+@st.fragment
 def render_asset_contribution_stacked_area(
     user_id: str,
     account_id: str,
@@ -1207,6 +1383,8 @@ def render_asset_contribution_stacked_area(
     # =========================
     # Altair stacked area
     # =========================
+    import altair as alt  # 이 차트에서만 쓰므로 첫 사용 시점에 로드
+
     chart = (
         alt.Chart(df_plot)
         .mark_area()
@@ -1238,6 +1416,7 @@ def render_asset_contribution_stacked_area(
 
 
 
+@st.fragment
 def render_portfolio_treemap(
     user_id: str,
     account_id: str,
@@ -1412,8 +1591,8 @@ def render_asset_contribution_section_full(
     st.markdown("#### 📌 이번 기간 ‘성과 만든 자산’ / ‘성과 까먹은 자산’")
 
     top_n = 3
-    top = latest.head(top_n).copy()
-    bottom = latest.tail(top_n).sort_values("cum_contribution").copy()
+    top = latest.head(top_n)
+    bottom = latest.tail(top_n).sort_values("cum_contribution")
 
     colL, colR = st.columns(2)
 
@@ -1422,10 +1601,10 @@ def render_asset_contribution_section_full(
         if top.empty:
             st.info("Top 기여 자산이 없습니다.")
         else:
-            for i, (_, r) in enumerate(top.iterrows(), start=1):
+            for i, r in enumerate(top.itertuples(index=False), start=1):
                 st.metric(
-                    label=f"{i}. {r['name_kr']}",
-                    value=f"{r['cum_contribution_pct']:.2f}%",
+                    label=f"{i}. {r.name_kr}",
+                    value=f"{r.cum_contribution_pct:.2f}%",
                 )
 
     with colR:
@@ -1433,10 +1612,10 @@ def render_asset_contribution_section_full(
         if bottom.empty:
             st.info("Bottom 기여 자산이 없습니다.")
         else:
-            for i, (_, r) in enumerate(bottom.iterrows(), start=1):
+            for i, r in enumerate(bottom.itertuples(index=False), start=1):
                 st.metric(
-                    label=f"{i}. {r['name_kr']}",
-                    value=f"{r['cum_contribution_pct']:.2f}%",
+                    label=f"{i}. {r.name_kr}",
+                    value=f"{r.cum_contribution_pct:.2f}%",
                 )
 
     st.caption("※ 누적 기여도는 ‘전일 포트폴리오 평가금액 대비 일간 기여도’를 누적한 값입니다.")
@@ -1466,55 +1645,19 @@ def render_asset_contribution_section_full(
         )
 
 
+@st.fragment
 def render_transactions_table_section(user_id: str, account_id: str, start_date: str, end_date: str):
     st.subheader("거래 내역")
 
-    supabase = get_supabase_client()
-    q = (
-        supabase.table("transactions")
-        .select("""
-            id,
-            account_id,
-            asset_id,
-            transaction_date,
-            trade_type,
-            quantity,
-            price,
-            fee,
-            tax,
-            memo,
-            assets ( ticker, name_kr, currency ),
-            accounts ( name, brokerage, old_owner, type )
-        """)
-        .order("transaction_date", desc=True)
-    )
-
-    if start_date is not None:
-        q = q.gte("transaction_date", start_date)
-    if end_date is not None:
-        q = q.lte("transaction_date", end_date)
-
-    if account_id and account_id != "__ALL__":
-        q = q.eq("account_id", account_id)
-    else:
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
-        if not user_account_ids:
-            st.info("선택한 기간에 거래 내역이 없습니다.")
-            return
-        q = q.in_("account_id", user_account_ids)
-
-    response = q.execute()
-    rows = response.data or []
+    rows = load_transactions_rows(user_id, account_id, start_date, end_date)
 
     if not rows:
         st.info("선택한 기간에 거래 내역이 없습니다.")
         return
 
-    df = pd.DataFrame(rows)
-    df_raw = df.copy()
+    df_raw = pd.DataFrame(rows)
 
-    # 수정/삭제 UI용 라벨 계산 (표시용 컬럼은 원본과 분리)
+    # 수정/삭제 UI용 라벨 계산
     if "accounts" not in df_raw.columns:
         df_raw["accounts"] = None
     if "assets" not in df_raw.columns:
@@ -1526,76 +1669,59 @@ def render_transactions_table_section(user_id: str, account_id: str, start_date:
         "DEPOSIT": "입금",
         "WITHDRAW": "출금",
     }
-    df_raw["transaction_date"] = pd.to_datetime(df_raw["transaction_date"]).dt.date
+    df_raw["transaction_date"] = pd.to_datetime(df_raw["transaction_date"], format="ISO8601").dt.date
     df_raw["trade_type_kr"] = df_raw["trade_type"].map(trade_type_kr_map).fillna(df_raw["trade_type"])
-    df_raw["asset_label"] = df_raw["assets"].apply(
-        lambda x: f"{(x or {}).get('ticker', '')} | {(x or {}).get('name_kr', '')}".strip(" |")
-    )
-    df_raw["account_label"] = df_raw["accounts"].apply(
-        lambda x: f"{(x or {}).get('brokerage', '')} | {(x or {}).get('name', '')} ({(x or {}).get('owner', '')})".strip(" |")
-    )
-
-    # accounts 컬럼이 dict(JSON)로 내려오면 name만 추출해 표시
-    if "accounts" in df.columns:
-        df["account_name"] = df["accounts"].apply(
-            lambda x: (x or {}).get("name")
-        )
-        df = df.drop(columns=["accounts"], errors="ignore")
-
-    # assets dict에서 표시용 컬럼 추출
-    df["ticker"] = df["assets"].apply(lambda x: (x or {}).get("ticker"))
-    df["asset_name"] = df["assets"].apply(lambda x: (x or {}).get("name_kr"))
-    df["asset_currency"] = df["assets"].apply(lambda x: (x or {}).get("currency"))
+    # ✅ join된 dict 컬럼(assets/accounts)에서 필드를 행마다 lambda로 꺼내지 않고 .str.get으로 컬럼 단위 추출
+    asset_ticker = df_raw["assets"].str.get("ticker")
+    asset_name = df_raw["assets"].str.get("name_kr")
+    account_name = df_raw["accounts"].str.get("name")
+    df_raw["asset_label"] = (
+        asset_ticker.fillna("").astype(str) + " | " + asset_name.fillna("").astype(str)
+    ).str.strip(" |")
+    df_raw["account_label"] = (
+        df_raw["accounts"].str.get("brokerage").fillna("").astype(str)
+        + " | " + account_name.fillna("").astype(str)
+        + " (" + df_raw["accounts"].str.get("owner").fillna("").astype(str) + ")"
+    ).str.strip(" |")
 
+    # =========================
+    # 표시용 DF
+    # - 원본 전체를 copy()한 뒤 변환/삭제하지 않고, 표시할 컬럼(Series)만 모아서 새로 구성
+    # - 거래일/거래구분은 위에서 계산한 값을 그대로 재사용 (중복 파싱 제거)
+    # =========================
     currency_map = {
         "krw": "원",
         "usd": "달러",
     }
-    df["asset_currency"] = df["asset_currency"].apply(
-        lambda x: currency_map.get(str(x).lower(), x) if x is not None else x
+    asset_currency = df_raw["assets"].str.get("currency")
+
+    df_display = pd.DataFrame({
+        "거래일": df_raw["transaction_date"],
+        "거래구분": df_raw["trade_type_kr"],
+        "티커": asset_ticker,
+        "자산명": asset_name,
+        "통화": _map_lower_labels(asset_currency, currency_map),
+        "수량/금액": pd.to_numeric(df_raw["quantity"], errors="coerce"),
+        "가격": pd.to_numeric(df_raw["price"], errors="coerce"),
+        "수수료": pd.to_numeric(df_raw["fee"], errors="coerce"),
+        "세금": pd.to_numeric(df_raw["tax"], errors="coerce"),
+        "계좌": account_name,
+        "메모": df_raw["memo"],
+    })
+
+    # 숫자 컬럼은 숫자 그대로 넘기고 표시 포맷만 column_config로 지정
+    # (문자열 포맷/Styler를 거치지 않아 Arrow 변환이 그대로 적용됨)
+    st.dataframe(
+        df_display,
+        width="stretch",
+        column_config={
+            "수량/금액": st.column_config.NumberColumn("수량/금액", format="localized"),
+            "가격": st.column_config.NumberColumn("가격", format="localized"),
+            "수수료": st.column_config.NumberColumn("수수료", format="localized"),
+            "세금": st.column_config.NumberColumn("세금", format="localized"),
+        },
     )
 
-    # id/내부키/원본 dict 컬럼 숨기기
-    df = df.drop(columns=["id", "account_id", "asset_id", "assets"], errors="ignore")
-
-    # =========================
-    # 컬럼명 표시용 매핑
-    # =========================
-    COL_KR = {
-        "transaction_date": "거래일",
-        "trade_type": "거래구분",
-        "ticker": "티커",
-        "asset_name": "자산명",
-        "asset_currency": "통화",
-        "quantity": "수량/금액",
-        "price": "가격",
-        "fee": "수수료",
-        "tax": "세금",
-        "memo": "메모",
-        "account_name": "계좌",
-    }
-    TRADE_TYPE_KR = {
-        "BUY": "매수",
-        "SELL": "매도",
-        "DEPOSIT": "입금",
-        "WITHDRAW": "출금",
-    }
-
-    df["trade_type"] = df["trade_type"].map(TRADE_TYPE_KR).fillna(df["trade_type"])
-    df["transaction_date"] = pd.to_datetime(df["transaction_date"]).dt.date
-
-    df_display = df.rename(columns=COL_KR)
-
-    display_order = [
-        "거래일", "거래구분", "티커", "자산명", "통화",
-        "수량/금액", "가격", "수수료", "세금", "계좌", "메모"
-    ]
-
-    cols = [c for c in display_order if c in df_display.columns] + [c for c in df_display.columns if c not in display_order]
-    df_display = df_display[cols]
-
-    st.dataframe(df_display, width="stretch")
-
     with st.expander("✏️ 거래 수정/삭제"):
         tx_rows = df_raw.sort_values("transaction_date", ascending=False).to_dict("records")
         if not tx_rows:
@@ -1675,7 +1801,7 @@ def render_transactions_table_section(user_id: str, account_id: str, start_date:
                 st.success(
                     f"수정 완료. (리빌드: {result['rebuilt_start_date']} ~ {result['rebuilt_end_date']})"
                 )
-                st.cache_data.clear()
+                clear_transaction_caches()
                 st.rerun()
             except Exception as e:
                 st.error(f"수정 실패: {e}")
@@ -1690,12 +1816,13 @@ def render_transactions_table_section(user_id: str, account_id: str, start_date:
                 st.success(
                     f"삭제 완료. (리빌드: {result['rebuilt_start_date']} ~ {result['rebuilt_end_date']})"
                 )
-                st.cache_data.clear()
+                clear_transaction_caches()
                 st.rerun()
             except Exception as e:
                 st.error(f"삭제 실패: {e}")
 
 
+@st.fragment
 def render_asset_transaction_history(user_id: str, account_id: str):
     """
     보유 중인 자산을 선택하여 해당 자산의 전체 거래 내역을 조회합니다.
@@ -1727,8 +1854,7 @@ def render_asset_transaction_history(user_id: str, account_id: str):
         q_snapshots = q_snapshots.eq("account_id", account_id)
     else:
         # '전체'일 경우 user_id에 속한 모든 계좌
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         if not user_account_ids:
             st.info("등록된 계좌가 없습니다.")
             return
@@ -1769,18 +1895,20 @@ def render_asset_transaction_history(user_id: str, account_id: str):
         return
     
     # assets 정보 추출
-    df_holding["ticker"] = df_holding["assets"].apply(lambda x: (x or {}).get("ticker", ""))
-    df_holding["name_kr"] = df_holding["assets"].apply(lambda x: (x or {}).get("name_kr", ""))
-    df_holding["currency"] = df_holding["assets"].apply(lambda x: (x or {}).get("currency", ""))
+    # - 행마다 lambda를 호출하지 않고 .str.get으로 dict 필드를 컬럼 단위로 꺼낸다.
+    df_holding["ticker"] = df_holding["assets"].str.get("ticker").fillna("")
+    df_holding["name_kr"] = df_holding["assets"].str.get("name_kr").fillna("")
+    df_holding["currency"] = df_holding["assets"].str.get("currency").fillna("")
     
     # 드롭다운 표시용 라벨 생성: "티커 | 자산명 (통화)"
-    df_holding["display_label"] = df_holding.apply(
-        lambda row: f"{row['ticker']} | {row['name_kr']} ({row['currency']}) - 보유: {row['quantity']:.2f}",
-        axis=1
+    df_holding["display_label"] = (
+        df_holding["ticker"].astype(str) + " | " + df_holding["name_kr"].astype(str)
+        + " (" + df_holding["currency"].astype(str) + ") - 보유: "
+        + df_holding["quantity"].map("{:.2f}".format)
     )
     
-    # asset_id를 키로 하는 딕셔너리 생성
-    asset_options = df_holding.set_index("asset_id")["display_label"].to_dict()
+    # asset_id를 키로 하는 딕셔너리 생성 (Index/Series를 거치지 않고 배열 zip으로 바로 생성)
+    asset_options = dict(zip(df_holding["asset_id"].to_numpy().tolist(), df_holding["display_label"].to_numpy().tolist()))
     
     if not asset_options:
         st.info("보유 중인 자산이 없습니다.")
@@ -1830,8 +1958,7 @@ def render_asset_transaction_history(user_id: str, account_id: str):
     if account_id and account_id != "__ALL__":
         q_transactions = q_transactions.eq("account_id", account_id)
     else:
-        user_accounts = query.get_accounts(user_id)
-        user_account_ids = [acc['id'] for acc in user_accounts]
+        user_account_ids = query.get_account_ids(user_id)
         if user_account_ids:
             q_transactions = q_transactions.in_("account_id", user_account_ids)
     
@@ -1848,7 +1975,7 @@ def render_asset_transaction_history(user_id: str, account_id: str):
     df_tx = pd.DataFrame(tx_rows)
     
     # 날짜 변환
-    df_tx["transaction_date"] = pd.to_datetime(df_tx["transaction_date"]).dt.date
+    df_tx["transaction_date"] = pd.to_datetime(df_tx["transaction_date"], format="ISO8601").dt.date
     
     # quantity를 숫자 타입으로 명시적 변환
     df_tx["quantity"] = pd.to_numeric(df_tx["quantity"], errors="coerce").fillna(0)
@@ -1872,9 +1999,10 @@ def render_asset_transaction_history(user_id: str, account_id: str):
     
     # 계좌 정보 추출
     if "accounts" in df_tx.columns:
-        df_tx["account_label"] = df_tx["accounts"].apply(
-            lambda x: f"{(x or {}).get('brokerage', '')} | {(x or {}).get('name', '')}".strip(" |") if x else ""
-        )
+        df_tx["account_label"] = (
+            df_tx["accounts"].str.get("brokerage").fillna("").astype(str)
+            + " | " + df_tx["accounts"].str.get("name").fillna("").astype(str)
+        ).str.strip(" |")
         df_tx = df_tx.drop(columns=["accounts"], errors="ignore")
     
     # 표시용 컬럼 선택 및 순서 지정
@@ -1890,7 +2018,7 @@ def render_asset_transaction_history(user_id: str, account_id: str):
     }
     
     # 존재하는 컬럼만 선택
-    df_display = df_tx[[col for col in display_columns.keys() if col in df_tx.columns]].copy()
+    df_display = df_tx[[col for col in display_columns.keys() if col in df_tx.columns]]
     
     # 컬럼명 한글화
     df_display = df_display.rename(columns=display_columns)
@@ -1918,7 +2046,17 @@ def render_asset_transaction_history(user_id: str, account_id: str):
     # st.divider()
     
     # 거래 내역 테이블 표시
-    st.dataframe(df_display, width="stretch", height=400)
+    st.dataframe(
+        df_display,
+        width="stretch",
+        height=400,
+        column_config={
+            "수량/금액": st.column_config.NumberColumn("수량/금액", format="localized"),
+            "단가": st.column_config.NumberColumn("단가", format="localized"),
+            "수수료": st.column_config.NumberColumn("수수료", format="localized"),
+            "세금": st.column_config.NumberColumn("세금", format="localized"),
+        },
+    )
     
     st.caption(
         "※ 이 자산에 대한 모든 거래 내역입니다. "
@@ -3,16 +3,52 @@ from __future__ import annotations
 from datetime import date
 import pandas as pd
 import streamlit as st
+from postgrest.types import ReturnMethod
 
+from asset_portfolio.backend.infra.query import upsert_in_chunks
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
+from asset_portfolio.backend.services.data_contracts import rows_to_typed_df
 from asset_portfolio.backend.services.manual_cost_basis_service import record_cost_basis_events
+from asset_portfolio.dashboard.render import clear_snapshot_caches
 from asset_portfolio.dashboard.transaction_editor import _load_accounts_df, _load_assets_df
 
 MANUAL_TYPES = {"manual", "deposit", "bond", "pension"}
 
+# ✅ daily_snapshots 조회 결과 컬럼/타입 (생성 시점에 타입을 확정해 이후 to_numeric 재변환을 생략)
+SNAPSHOT_EDIT_SCHEMA = {
+    "date": "object",
+    "account_id": "object",
+    "asset_id": "Int64",
+    "quantity": "float64",
+    "valuation_price": "float64",
+    "purchase_price": "float64",
+    "valuation_amount": "float64",
+    "purchase_amount": "float64",
+}
+
+# ✅ data_editor 컬럼 설정은 고정값이므로 모듈 로드 시 한 번만 만든다.
+# - 편집할 때마다 rerun되는 화면에서 매번 column_config 객체를 새로 생성하지 않기 위함
+# - st.data_editor는 전달받은 설정을 내부에서 복사해 쓰므로 공유해도 안전하다.
+SNAPSHOT_EDITOR_COLUMN_CONFIG = {
+    "계좌": st.column_config.TextColumn("계좌", disabled=True),
+    "name_kr": st.column_config.TextColumn("자산명", disabled=True),
+    "ticker": st.column_config.TextColumn("Ticker", disabled=True),
+    "currency": st.column_config.TextColumn("통화", disabled=True),
+    "asset_type": st.column_config.TextColumn("유형", disabled=True),
+    "평가금액": st.column_config.NumberColumn("평가금액", min_value=0.0, step=1000.0),
+    "원금 증감": st.column_config.NumberColumn("원금 증감", step=1000.0),
+}
+
 
 def _load_manual_assets_df() -> pd.DataFrame:
-    df = _load_assets_df()
+    return _prepare_manual_assets_df(_load_assets_df())
+
+
+# ✅ 편집 화면은 셀 하나만 바꿔도 전체가 rerun되므로, 전처리는 입력 DataFrame 해시를 키로 캐시한다.
+# - st.cache_data가 인자 DataFrame 내용을 해시하므로 원본 데이터가 바뀌면 자동으로 다시 계산된다.
+# - 별도 무효화 호출이 필요 없도록 네트워크 조회가 아닌 순수 변환 함수에만 적용한다.
+@st.cache_data(ttl=300, show_spinner=False)
+def _prepare_manual_assets_df(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
@@ -20,13 +56,59 @@ def _load_manual_assets_df() -> pd.DataFrame:
     df = df[df["price_source_norm"].isin(MANUAL_TYPES)].copy()
 
     # ✅ 표시 라벨: ticker만 애매하면 name_kr가 더 중요하므로 둘 다 노출 + id도 붙임
-    df["label"] = df.apply(
-        lambda r: f"{r['name_kr']} ({r['ticker']}) [{str(r.get('currency','')).upper()}]  #id={r['id']}",
-        axis=1,
+    df["label"] = (
+        df["name_kr"].astype(str) + " (" + df["ticker"].astype(str) + ") ["
+        + df["currency"].astype(str).str.upper() + "]  #id=" + df["id"].astype(str)
     )
     return df
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_snapshot_edit_df(
+    grid: pd.DataFrame,
+    snap_df: pd.DataFrame,
+    snap_date_iso: str,
+    acc_map: pd.DataFrame,
+    ast_map: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    ✅ (account_id, asset_id) pair + 당일 스냅샷 + 계좌/자산 메타를 합쳐 편집용 base_df 생성
+
+    - 입력이 같으면 rerun마다 merge/형변환을 반복하지 않도록 캐시한다.
+    """
+    if snap_df.empty:
+        base_df = grid.copy()
+        base_df["date"] = snap_date_iso
+        base_df["quantity"] = 0.0
+        base_df["valuation_price"] = 1.0
+        base_df["purchase_price"] = 1.0
+        base_df["valuation_amount"] = 0.0
+        base_df["purchase_amount"] = 0.0
+    else:
+        snap_df = snap_df.assign(date=snap_date_iso)  # 날짜 고정
+        base_df = grid.merge(snap_df, on=["account_id", "asset_id"], how="left")
+
+        # ✅ 결측 보정(없는 조합은 생성)
+        base_df["date"] = base_df["date"].fillna(snap_date_iso)
+        # ✅ snap_df는 로드 시점에 float으로 확정되어 있으므로 merge로 생긴 결측만 채운다.
+        amount_cols = ["quantity", "valuation_amount", "purchase_amount"]
+        price_cols = ["valuation_price", "purchase_price"]
+        base_df[amount_cols] = base_df[amount_cols].fillna(0.0)
+        base_df[price_cols] = base_df[price_cols].fillna(1.0)
+
+    # 원금 증감 입력 칼럼 (추가 납입/인출 용도)
+    base_df["원금 증감"] = 0.0
+
+    # 보기용 메타 조인: 계좌 라벨 + 자산 라벨
+    base_df = base_df.merge(acc_map, on="account_id", how="left")
+    base_df = base_df.merge(ast_map, on="asset_id", how="left")
+
+    # ✅ 사용자가 편집할 필드: 평가금액
+    base_df["평가금액"] = base_df["valuation_amount"].fillna(0.0)
+
+    return base_df
+
+
 def _load_snapshots_for_date_multi(account_ids: list[str], snap_date: date, asset_ids: list[int]) -> pd.DataFrame:
     """
     ✅ 여러 계좌에 대해 (date=고정) 스냅샷 로드
@@ -42,14 +124,19 @@ def _load_snapshots_for_date_multi(account_ids: list[str], snap_date: date, asse
         .execute()
         .data or []
     )
-    return pd.DataFrame(rows)
+    return rows_to_typed_df(rows, SNAPSHOT_EDIT_SCHEMA)
+
+
+UPSERT_CHUNK_SIZE = 500
 
 
 def _upsert_snapshots(rows: list[dict]) -> None:
-    if not rows:
-        return
-    supabase = get_supabase_client()
-    supabase.table("daily_snapshots").upsert(rows).execute()
+    """
+    daily_snapshots 일괄 업서트
+    - 리스트 payload는 요청 1번(단일 POST)으로 전송된다.
+    - 너무 큰 payload는 실패할 수 있으므로 UPSERT_CHUNK_SIZE 단위로 나눠 동시에 보낸다.
+    """
+    upsert_in_chunks("daily_snapshots", rows, chunk_size=UPSERT_CHUNK_SIZE)
 
 
 def _upsert_asset_prices(rows: list[dict]) -> None:
@@ -63,6 +150,7 @@ def _upsert_asset_prices(rows: list[dict]) -> None:
     supabase.table("asset_prices").upsert(
         rows,
         on_conflict="price_date,asset_id",
+        returning=ReturnMethod.minimal,
     ).execute()
 
 
@@ -167,41 +255,12 @@ def render_snapshot_editor(user_id: str):
 
     grid = pairs_df.copy()  # ✅ 이제 grid는 실제 존재하는 pair만 포함
 
-    if snap_df.empty:
-        base_df = grid.copy()
-        base_df["date"] = snap_date.isoformat()
-        base_df["quantity"] = 0.0
-        base_df["valuation_price"] = 1.0
-        base_df["purchase_price"] = 1.0
-        base_df["valuation_amount"] = 0.0
-        base_df["purchase_amount"] = 0.0
-    else:
-        snap_df["date"] = snap_date.isoformat()  # 날짜 고정
-        base_df = grid.merge(snap_df, on=["account_id", "asset_id"], how="left")
-
-        # ✅ 결측 보정(없는 조합은 생성)
-        base_df["date"] = base_df["date"].fillna(snap_date.isoformat())
-        for c in ["quantity", "valuation_amount", "purchase_amount"]:
-            base_df[c] = pd.to_numeric(base_df[c], errors="coerce").fillna(0.0)
-        for c in ["valuation_price", "purchase_price"]:
-            base_df[c] = pd.to_numeric(base_df[c], errors="coerce").fillna(1.0)
-
-    # 원금 증감 입력 칼럼 (추가 납입/인출 용도)
-    base_df["원금 증감"] = 0.0
-
     # =========================
-    # 4) 보기용 메타 조인: 계좌 라벨 + 자산 라벨
+    # 4) 편집용 base_df 생성 (계좌 라벨 + 자산 메타 조인 포함)
     # =========================
-    # 계좌 라벨
     acc_map = selected_accounts[["id", "label"]].rename(columns={"id": "account_id", "label": "계좌"})
-    base_df = base_df.merge(acc_map, on="account_id", how="left")
-
-    # 자산 메타
     ast_map = manual_assets[["id", "name_kr", "ticker", "currency", "asset_type"]].rename(columns={"id": "asset_id"})
-    base_df = base_df.merge(ast_map, on="asset_id", how="left")
-
-    # ✅ 사용자가 편집할 필드: 평가금액
-    base_df["평가금액"] = pd.to_numeric(base_df["valuation_amount"], errors="coerce").fillna(0.0)
+    base_df = _build_snapshot_edit_df(grid, snap_df, snap_date.isoformat(), acc_map, ast_map)
 
     # 표시 컬럼(계좌가 반드시 보이도록)
     view_cols = ["계좌", "name_kr", "ticker", "currency", "asset_type", "평가금액", "원금 증감"]
@@ -213,15 +272,7 @@ def render_snapshot_editor(user_id: str):
         base_df[view_cols],
         width='stretch',
         disabled=st.session_state["snap_busy"],
-        column_config={
-            "계좌": st.column_config.TextColumn("계좌", disabled=True),
-            "name_kr": st.column_config.TextColumn("자산명", disabled=True),
-            "ticker": st.column_config.TextColumn("Ticker", disabled=True),
-            "currency": st.column_config.TextColumn("통화", disabled=True),
-            "asset_type": st.column_config.TextColumn("유형", disabled=True),
-            "평가금액": st.column_config.NumberColumn("평가금액", min_value=0.0, step=1000.0),
-            "원금 증감": st.column_config.NumberColumn("원금 증감", step=1000.0),
-        },
+        column_config=SNAPSHOT_EDITOR_COLUMN_CONFIG,
     )
 
     # =========================
@@ -232,65 +283,62 @@ def render_snapshot_editor(user_id: str):
         st.session_state["snap_busy"] = True
         try:
             with st.spinner("스냅샷 저장 중..."):
-                save_rows = []
-                cost_basis_events = []
-
-                # edited는 account_id/asset_id가 없으므로 base_df의 동일 index를 이용해 매핑
-                for i, row in edited.iterrows():
-                    account_id = str(base_df.iloc[i]["account_id"])
-                    asset_id = int(base_df.iloc[i]["asset_id"])
-                    ccy = str(base_df.iloc[i].get("currency") or "").upper() or None
-                    amt = float(row["평가금액"] or 0.0)
-                    delta = float(row["원금 증감"] or 0.0)
-
-                    save_rows.append({
-                        "date": snap_date.isoformat(),
-                        "account_id": account_id,
-                        "asset_id": asset_id,
-                        "quantity": amt,
-                        "valuation_price": 1.0,
-                        "purchase_price": 1.0,
-                        "valuation_amount": amt,
-                        "purchase_amount": amt,
-                        "currency": ccy,
-                    })
-
-                    if delta != 0:
-                        # 수동 자산의 추가 납입/인출은 cost basis 이벤트로 기록한다.
-                        cost_basis_events.append({
-                            "account_id": account_id,
-                            "asset_id": asset_id,
-                            "event_date": snap_date.isoformat(),
-                            "delta_amount": delta,
-                            "currency": ccy or "",
-                            "reason": "snapshot_editor",
-                            "memo": None,
-                        })
+                # edited는 account_id/asset_id가 없으므로 base_df의 동일 위치(index)를 이용해 매핑
+                # - 행 단위 iterrows/iloc 대신 컬럼 전체를 한 번에 잘라서 payload를 만든다.
+                amt = pd.to_numeric(edited["평가금액"], errors="coerce").fillna(0.0).to_numpy()
+                delta = pd.to_numeric(edited["원금 증감"], errors="coerce").fillna(0.0).to_numpy()
+                ccy = base_df["currency"].fillna("").astype(str).str.upper()
+
+                save_df = pd.DataFrame({
+                    "date": snap_date.isoformat(),
+                    "account_id": base_df["account_id"].astype(str).to_numpy(),
+                    "asset_id": base_df["asset_id"].astype(int).to_numpy(),
+                    "quantity": amt,
+                    "valuation_price": 1.0,
+                    "purchase_price": 1.0,
+                    "valuation_amount": amt,
+                    "purchase_amount": amt,
+                    "currency": ccy.where(ccy != "", None).to_numpy(),
+                })
+                save_rows = save_df.to_dict("records")
+
+                # 수동 자산의 추가 납입/인출은 cost basis 이벤트로 기록한다.
+                events_df = save_df.loc[delta != 0, ["account_id", "asset_id", "date", "currency"]].copy()
+                events_df["delta_amount"] = delta[delta != 0]
+                cost_basis_events = [
+                    {
+                        "account_id": r["account_id"],
+                        "asset_id": r["asset_id"],
+                        "event_date": r["date"],
+                        "delta_amount": r["delta_amount"],
+                        "currency": r["currency"] or "",
+                        "reason": "snapshot_editor",
+                        "memo": None,
+                    }
+                    for r in events_df.to_dict("records")
+                ]
 
                 _upsert_snapshots(save_rows)
                 # 수동자산은 평가 입력 시점에만 가격 히스토리를 저장한다.
                 # 동일 자산이 여러 계좌에 있어도 가격은 동일하므로 자산 기준으로만 업서트한다.
-                price_rows = []
-                seen_assets = set()
-                for r in save_rows:
-                    if r["asset_id"] in seen_assets:
-                        continue
-                    seen_assets.add(r["asset_id"])
-                    price_rows.append({
+                price_rows = [
+                    {
                         "price_date": r["date"],
                         "asset_id": r["asset_id"],
                         "close_price": r["valuation_price"],
-                        "currency": r.get("currency") or "",
+                        "currency": r["currency"] or "",
                         "source": "manual_snapshot",
                         "fetched_at": None,
-                    })
+                    }
+                    for r in save_df.drop_duplicates("asset_id").to_dict("records")
+                ]
                 _upsert_asset_prices(price_rows)
                 # 원금 증감 입력이 있으면 cost basis current까지 갱신한다.
                 if cost_basis_events:
                     record_cost_basis_events(cost_basis_events)
 
             st.success("저장 완료. 대시보드에 즉시 반영됩니다.")
-            st.cache_data.clear()
+            clear_snapshot_caches()
             st.rerun()
         except Exception as e:
             st.error(f"저장 실패: {e}")
@@ -324,10 +372,12 @@ def _load_existing_pairs_for_manual_assets(
         .execute()
         .data or []
     )
-    snap_df = pd.DataFrame(snap_rows)
+    snap_df = rows_to_typed_df(
+        snap_rows,
+        {"account_id": "object", "asset_id": "Int64", "valuation_amount": "float64"},
+    )
     if not snap_df.empty:
-        snap_df["valuation_amount"] = pd.to_numeric(snap_df["valuation_amount"], errors="coerce").fillna(0.0)
-        snap_df = snap_df[snap_df["valuation_amount"] > 0].copy()
+        snap_df = snap_df[snap_df["valuation_amount"].fillna(0.0) > 0]
         if not snap_df.empty:
             return snap_df[["account_id", "asset_id"]].drop_duplicates()
 
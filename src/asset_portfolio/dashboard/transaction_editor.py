@@ -7,6 +7,7 @@ from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 from asset_portfolio.backend.services.transaction_service import TransactionService
 from asset_portfolio.backend.services.asset_service import AssetService
 from asset_portfolio.backend.services.transaction_service import CreateTransactionRequest
+from asset_portfolio.dashboard.render import clear_asset_caches, clear_transaction_caches
 
 
 @st.cache_data(ttl=300)
@@ -25,7 +26,7 @@ def _load_accounts_df(user_id: str) -> pd.DataFrame:
     df = pd.DataFrame(rows)
     if df.empty:
         return df
-    df["label"] = df.apply(lambda r: f"{r['brokerage']} | {r['name']} ({r['type']})", axis=1)
+    df["label"] = df["brokerage"].astype(str) + " | " + df["name"].astype(str) + " (" + df["type"].astype(str) + ")"
     return df
 
 
@@ -48,7 +49,13 @@ def _load_assets_df() -> pd.DataFrame:
     df = pd.DataFrame(rows)
     if df.empty:
         return df
-    df["label"] = df.apply(lambda r: f"{r['ticker']} | {r['name_kr']} [{str(r.get('currency','')).upper()}]", axis=1)
+    # ✅ 파생 컬럼(라벨/시각 파싱)은 캐시된 로더 안에서 한 번만 계산한다.
+    # - 캐시 적중(rerun) 시에는 계산된 결과 복사본만 받으므로 화면마다 다시 파싱하지 않는다.
+    df["label"] = (
+        df["ticker"].astype(str) + " | " + df["name_kr"].astype(str)
+        + " [" + df["currency"].astype(str).str.upper() + "]"
+    )
+    df["price_updated_at"] = pd.to_datetime(df["price_updated_at"], errors="coerce", utc=True)
     return df
 
 
@@ -79,8 +86,7 @@ def _load_latest_holding_asset_ids(account_id: str) -> set[int]:
     return {int(r["asset_id"]) for r in rows if r.get("asset_id") is not None}
 
 
-def _find_cash_asset_id(currency: str) -> int:
-    df = _load_assets_df()
+def _find_cash_asset_row(currency: str, df: pd.DataFrame) -> pd.Series:
     currency = str(currency).upper().strip()
     cash_rows = df[
         (df["asset_type"].fillna("").str.lower() == "cash")
@@ -88,7 +94,7 @@ def _find_cash_asset_id(currency: str) -> int:
     ]
     if cash_rows.empty:
         raise ValueError(f"{currency} CASH 자산이 없습니다. assets에 asset_type='cash' & currency='{currency}' 자산을 추가하세요.")
-    return int(cash_rows.iloc[0]["id"])
+    return cash_rows.iloc[0]
 
 
 def render_transaction_editor(user_id: str):
@@ -122,6 +128,8 @@ def render_transaction_editor(user_id: str):
     else:
         asset_mode = "기존 자산에서 선택"
 
+    # ✅ 자산 목록은 렌더링 1회당 한 번만 꺼낸다.
+    # - st.cache_data는 호출할 때마다 캐시된 DataFrame 복사본을 역직렬화해서 돌려주므로, 아래 분기에서 재호출하지 않고 재사용
     assets_df = _load_assets_df()
     if assets_df.empty and not (trade_type in {"BUY", "SELL"} and asset_mode == "새 자산 생성 후 거래"):
         st.error("assets 테이블에 자산이 없습니다.")
@@ -131,11 +139,11 @@ def render_transaction_editor(user_id: str):
     if trade_type in {"DEPOSIT", "WITHDRAW"}:
         cash_ccy = st.selectbox("입출금 통화", ["krw", "usd"], index=0)
         try:
-            asset_id = _find_cash_asset_id(cash_ccy)
+            cash_row = _find_cash_asset_row(cash_ccy, assets_df)
         except Exception as e:
             st.error(str(e))
             return
-        cash_row = _load_assets_df().loc[_load_assets_df()["id"] == asset_id].iloc[0]
+        asset_id = int(cash_row["id"])
         st.info(f"입금/출금은 현금(CASH) 자산으로만 입력됩니다: {cash_row['ticker']} | {cash_row['name_kr']} [{cash_ccy}]")
         price = 1.0
 
@@ -157,7 +165,8 @@ def render_transaction_editor(user_id: str):
                         currency=new_currency, market=new_market,
                     )
                 st.success(f"자산 생성 완료: id={created['id']}, ticker={created['ticker']}")
-                st.cache_data.clear()
+                _load_assets_df.clear()
+                clear_asset_caches()
                 st.rerun()
             except Exception as e:
                 st.error(f"자산 생성 실패: {e}")
@@ -165,7 +174,6 @@ def render_transaction_editor(user_id: str):
                 st.session_state["tx_busy"] = False
         st.divider()
         st.subheader("🧾 거래 입력")
-        assets_df = _load_assets_df()
         if not assets_df.empty:
             if auto_cash:
                 assets_df = assets_df[assets_df["asset_type"].fillna("").str.lower() != "cash"].copy()
@@ -233,7 +241,9 @@ def render_transaction_editor(user_id: str):
                     f"저장 완료. (원자산 리빌드 {result['rebuilt_rows_main']}행)\n"
                     f"기간: {result['rebuilt_start_date']} ~ {result['rebuilt_end_date']}"
                 )
-            st.cache_data.clear()
+            # ✅ 거래/스냅샷 관련 캐시만 무효화 (자산/계좌 lookup 캐시는 유지)
+            clear_transaction_caches()
+            _load_latest_holding_asset_ids.clear()
             st.rerun()
         except Exception as e:
             st.error(f"처리 실패: {e}")
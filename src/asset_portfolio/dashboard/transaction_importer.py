@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import date
 import re
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from asset_portfolio.backend.infra.query import fetch_all_pagination
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
 from asset_portfolio.backend.services.asset_service import AssetService
 from asset_portfolio.backend.services.transaction_service import (
@@ -17,6 +18,10 @@ from asset_portfolio.backend.services.transaction_service import (
 from asset_portfolio.dashboard.transaction_editor import _load_accounts_df, _load_assets_df
 
 
+# ✅ 컬럼명 비교용 정규식은 모듈 로드 시 한 번만 컴파일해서 재사용
+_COLUMN_KEY_NOISE_RE = re.compile(r"[^0-9a-zA-Z가-힣]")
+
+
 @dataclass
 class PreparedTransaction:
     request: CreateTransactionRequest
@@ -25,7 +30,7 @@ class PreparedTransaction:
 
 def _normalize_column_key(value: str) -> str:
     """컬럼명을 비교하기 위해 공백/특수문자를 제거하고 소문자로 통일한다."""
-    cleaned = re.sub(r"[^0-9a-zA-Z가-힣]", "", str(value)).lower()
+    cleaned = _COLUMN_KEY_NOISE_RE.sub("", str(value)).lower()
     return cleaned
 
 
@@ -108,49 +113,144 @@ def _map_columns(df: pd.DataFrame, aliases: Dict[str, List[str]]) -> Tuple[pd.Da
     return df.rename(columns=rename_map), missing_fields
 
 
-def _get_account_id_by_name(accounts_df: pd.DataFrame, account_name: str) -> Tuple[Optional[str], Optional[str]]:
+def _clean_text_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    문자열 컬럼을 결측치 -> "" 처리 + 앞뒤 공백 제거한 numpy 문자열 배열로 만든다.
+    - 행마다 str()/strip()을 호출하지 않고 numpy 문자열 연산으로 한 번에 처리
+    - 컬럼이 없으면 전부 빈 문자열
+    """
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=str)
+    values = df[column]
+    arr = values.where(values.notna(), "").astype(str).to_numpy(dtype=str)
+    return np.strings.strip(arr)
+
+
+def _numeric_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    숫자 컬럼을 한 번에 float 배열로 변환한다. (변환 불가/결측 -> NaN)
+    - 컬럼이 없으면 전부 NaN
+    """
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+
+
+def _build_account_lookup(accounts_df: pd.DataFrame) -> Dict[str, List[str]]:
+    """계좌명 -> account_id 목록 매핑을 한 번만 만든다. (행마다 DataFrame 필터링 방지)"""
+    if accounts_df.empty:
+        return {}
+    return accounts_df.groupby("name")["id"].agg(lambda s: [str(v) for v in s]).to_dict()
+
+
+def _build_asset_lookup(assets_df: pd.DataFrame) -> Dict[str, Dict]:
+    """티커(대문자) -> 자산 row(dict) 매핑을 한 번만 만든다. 중복 티커는 첫 행을 사용한다."""
+    if assets_df.empty:
+        return {}
+    lookup: Dict[str, Dict] = {}
+    tickers = assets_df["ticker"].fillna("").astype(str).str.upper()
+    for ticker, record in zip(tickers, assets_df.to_dict("records")):
+        lookup.setdefault(ticker, record)
+    return lookup
+
+
+def _get_account_id_by_name(account_lookup: Dict[str, List[str]], account_name: str) -> Tuple[Optional[str], Optional[str]]:
     """계좌명을 account_id로 매칭하고, 문제 발생 시 오류 메시지를 돌려준다."""
-    matched = accounts_df[accounts_df["name"] == account_name]
-    if matched.empty:
+    matched = account_lookup.get(account_name) or []
+    if not matched:
         return None, f"계좌명 '{account_name}' 이(가) 등록된 계좌와 일치하지 않습니다."
     if len(matched) > 1:
         return None, f"계좌명 '{account_name}' 이(가) 중복되어 계좌를 확정할 수 없습니다."
-    return str(matched.iloc[0]["id"]), None
+    return matched[0], None
 
 
-def _get_asset_row_by_ticker(assets_df: pd.DataFrame, ticker: str) -> Optional[pd.Series]:
-    matched = assets_df[assets_df["ticker"].fillna("").str.upper() == ticker]
-    if matched.empty:
-        return None
-    return matched.iloc[0]
-
-
-def _find_existing_duplicate(
-    *,
-    account_id: str,
-    asset_id: int,
-    transaction_date: date,
-    trade_type: str,
-    quantity: float,
-    price: float,
-    tax: float,
-) -> bool:
-    """기존 transactions 테이블에 같은 거래가 있는지 확인한다."""
+def _get_asset_row_by_ticker(asset_lookup: Dict[str, Dict], ticker: str) -> Optional[Dict]:
+    return asset_lookup.get(ticker)
+
+
+def _utc_timestamp(value) -> pd.Timestamp:
+    """date/문자열/timestamptz 값을 UTC Timestamp로 통일한다. (naive 값은 UTC 자정으로 간주)"""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _transaction_key(account_id, asset_id, transaction_date, trade_type, quantity, price) -> Tuple:
+    """기존 거래 중복 판정 키. (세금은 판정 조건에서 제외)"""
+    return (
+        str(account_id),
+        int(asset_id),
+        _utc_timestamp(transaction_date),
+        str(trade_type),
+        float(quantity),
+        float(price),
+    )
+
+
+def _load_existing_transaction_keys(requests: List[CreateTransactionRequest]) -> set:
+    """
+    업로드 대상 거래와 겹칠 수 있는 기존 transactions를 한 번에 조회해 중복 판정 키 집합으로 만든다.
+    - 행마다 SELECT 1회씩 보내던 방식 대신 계좌/자산/기간 범위로 1회(페이지네이션) 조회 후 메모리에서 비교
+    """
+    if not requests:
+        return set()
+
+    account_ids = sorted({str(req.account_id) for req in requests})
+    asset_ids = sorted({int(req.asset_id) for req in requests})
+    dates = [req.transaction_date for req in requests]
+
     supabase = get_supabase_client()
-    resp = (
+    q = (
         supabase.table("transactions")
-        .select("id")
-        .eq("account_id", account_id)
-        .eq("asset_id", asset_id)
-        .eq("transaction_date", transaction_date.isoformat())
-        .eq("trade_type", trade_type)
-        .eq("quantity", quantity)
-        .eq("price", price)
-        # .eq("tax", tax)   // 세금은 필터링 조건에서 제외
-        .limit(1)
-        .execute()
+        .select("account_id, asset_id, transaction_date, trade_type, quantity, price")
+        .in_("account_id", account_ids)
+        .in_("asset_id", asset_ids)
+        .gte("transaction_date", min(dates).isoformat())
+        .lte("transaction_date", max(dates).isoformat())
+        .order("id")
     )
-    return bool(resp.data)
+    rows = fetch_all_pagination(q)
+    return {
+        _transaction_key(
+            r["account_id"],
+            r["asset_id"],
+            r["transaction_date"],
+            r["trade_type"],
+            r["quantity"],
+            r["price"],
+        )
+        for r in rows
+    }
+
+
+def _sort_errors_by_row(errors: List[str]) -> List[str]:
+    """'{행번호}행: ...' 메시지를 행 번호 순으로 정렬한다. (DB 중복 오류가 검증 오류 뒤에 몰리지 않도록)"""
+    return sorted(errors, key=lambda message: int(message.split("행", 1)[0]))
+
+
+def _drop_existing_duplicates(
+    pending: List[Tuple[int, PreparedTransaction]],
+    message: str,
+) -> Tuple[List[PreparedTransaction], List[str]]:
+    """
+    검증을 통과한 행 중 DB에 이미 있는 거래를 걸러낸다.
+    - 신규 자산(asset_id=-1) 거래는 DB에 있을 수 없으므로 비교 대상에서 제외
+    """
+    existing_requests = [item.request for _, item in pending if item.created_asset_payload is None]
+    existing_keys = _load_existing_transaction_keys(existing_requests)
+
+    prepared: List[PreparedTransaction] = []
+    errors: List[str] = []
+    for row_number, item in pending:
+        if item.created_asset_payload is None:
+            req = item.request
+            key = _transaction_key(
+                req.account_id, req.asset_id, req.transaction_date, req.trade_type, req.quantity, req.price
+            )
+            if key in existing_keys:
+                errors.append(f"{row_number}행: {message}")
+                continue
+        prepared.append(item)
+    return prepared, errors
 
 
 def _render_required_fields_table(field_rows: List[Dict[str, str]]) -> None:
@@ -210,35 +310,48 @@ def _read_uploaded_file(uploaded_file) -> Optional[pd.DataFrame]:
     if uploaded_file is None:
         return None
     file_name = uploaded_file.name.lower()
+    # ✅ 모든 셀을 문자열로 읽는다. (타입 추론 생략)
+    # - 추론하면 '005930' 같은 종목코드가 정수 5930으로 바뀌어 assets 매핑이 깨진다.
+    # - 수량/단가/날짜는 이후 단계에서 컬럼별로 명시적으로 변환한다.
     if file_name.endswith(".csv"):
-        return pd.read_csv(uploaded_file)
+        return pd.read_csv(uploaded_file, dtype=str)
     if file_name.endswith(".xlsx") or file_name.endswith(".xls"):
-        return pd.read_excel(uploaded_file)
+        return pd.read_excel(uploaded_file, dtype=str)
     st.error("지원하지 않는 파일 형식입니다. CSV 또는 XLSX를 업로드하세요.")
     return None
 
 
 def _prepare_trade_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[PreparedTransaction], List[str]]:
     errors: List[str] = []
-    prepared: List[PreparedTransaction] = []
-    accounts_df = _load_accounts_df(user_id)
-    assets_df = _load_assets_df()
+    pending: List[Tuple[int, PreparedTransaction]] = []
+    account_lookup = _build_account_lookup(_load_accounts_df(user_id))
+    asset_lookup = _build_asset_lookup(_load_assets_df())
 
     seen_keys = set()
 
-    for idx, row in df.iterrows():
+    # ✅ 계좌명/티커 정규화 + 빈 값 판정은 컬럼 단위로 한 번에 계산
+    account_names = _clean_text_column(df, "account_name")
+    tickers = np.strings.upper(_clean_text_column(df, "ticker"))
+    quantities = _numeric_column(df, "quantity")
+    prices = _numeric_column(df, "price")
+    fees = _numeric_column(df, "fee")
+    taxes = _numeric_column(df, "tax")
+
+    # ✅ iterrows는 행마다 Series(+dtype 통합)를 만들기 때문에 dict 레코드로 한 번에 변환해 순회
+    # - 선택 컬럼(memo/asset_name 등)이 없을 수 있어 itertuples 대신 row.get을 그대로 쓸 수 있는 dict 사용
+    for pos, (idx, row) in enumerate(zip(df.index, df.to_dict("records"))):
         row_number = idx + 2  # CSV 헤더 포함을 고려한 행 번호 표시
-        account_name = str(row.get("account_name") or "").strip()
+        account_name = str(account_names[pos])
         if not account_name:
             errors.append(f"{row_number}행: 계좌명이 비어 있습니다.")
             continue
 
-        account_id, account_error = _get_account_id_by_name(accounts_df, account_name)
+        account_id, account_error = _get_account_id_by_name(account_lookup, account_name)
         if account_error:
             errors.append(f"{row_number}행: {account_error}")
             continue
 
-        ticker = str(row.get("ticker") or "").strip().upper()
+        ticker = str(tickers[pos])
         if not ticker:
             errors.append(f"{row_number}행: 티커가 비어 있습니다.")
             continue
@@ -248,10 +361,10 @@ def _prepare_trade_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[PreparedTr
             errors.append(f"{row_number}행: 거래 타입이 매수/매도/BUY/SELL 중 하나여야 합니다.")
             continue
 
-        quantity = pd.to_numeric(row.get("quantity"), errors="coerce")
-        price = pd.to_numeric(row.get("price"), errors="coerce")
-        fee = pd.to_numeric(row.get("fee"), errors="coerce")
-        tax = pd.to_numeric(row.get("tax"), errors="coerce")
+        quantity = quantities[pos]
+        price = prices[pos]
+        fee = fees[pos]
+        tax = taxes[pos]
 
         if pd.isna(quantity) or quantity <= 0:
             errors.append(f"{row_number}행: 수량(quantity)은 0보다 커야 합니다.")
@@ -267,7 +380,7 @@ def _prepare_trade_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[PreparedTr
 
         normalized_currency = _normalize_currency(row.get("currency"))
         normalized_market = _normalize_market(row.get("market"))
-        asset_row = _get_asset_row_by_ticker(assets_df, ticker)
+        asset_row = _get_asset_row_by_ticker(asset_lookup, ticker)
         created_asset_payload: Optional[Dict[str, str]] = None
 
         if asset_row is None:
@@ -308,21 +421,8 @@ def _prepare_trade_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[PreparedTr
             continue
         seen_keys.add(dedupe_key)
 
-        # ✅ 기존 DB 중복 체크 (자산이 이미 있는 경우에만)
-        if asset_row is not None:
-            if _find_existing_duplicate(
-                account_id=account_id,
-                asset_id=int(asset_row["id"]),
-                transaction_date=tx_date.date(),
-                trade_type=trade_type,
-                quantity=float(quantity),
-                price=float(price),
-                tax=tax_value,
-            ):
-                errors.append(f"{row_number}행: 동일한 거래가 이미 등록되어 있습니다.")
-                continue
-
-        prepared.append(
+        pending.append((
+            row_number,
             PreparedTransaction(
                 request=CreateTransactionRequest(
                     account_id=account_id,
@@ -336,32 +436,40 @@ def _prepare_trade_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[PreparedTr
                     memo=memo,
                 ),
                 created_asset_payload=created_asset_payload,
-            )
-        )
+            ),
+        ))
 
-    return prepared, errors
+    # ✅ 기존 DB 중복 체크 (자산이 이미 있는 경우에만) - 검증 통과 행을 모아 한 번에 조회
+    prepared, duplicate_errors = _drop_existing_duplicates(pending, "동일한 거래가 이미 등록되어 있습니다.")
+    return prepared, _sort_errors_by_row(errors + duplicate_errors)
 
 
 def _prepare_dividend_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[PreparedTransaction], List[str]]:
     errors: List[str] = []
-    prepared: List[PreparedTransaction] = []
-    accounts_df = _load_accounts_df(user_id)
+    pending: List[Tuple[int, PreparedTransaction]] = []
+    account_lookup = _build_account_lookup(_load_accounts_df(user_id))
 
     seen_keys = set()
+    cash_asset_ids: Dict[str, int] = {}
 
-    for idx, row in df.iterrows():
+    account_names = _clean_text_column(df, "account_name")
+    tickers = np.strings.upper(_clean_text_column(df, "ticker"))
+    grosses = _numeric_column(df, "dividend_gross")
+    nets = _numeric_column(df, "dividend_net")
+
+    for pos, (idx, row) in enumerate(zip(df.index, df.to_dict("records"))):
         row_number = idx + 2
-        account_name = str(row.get("account_name") or "").strip()
+        account_name = str(account_names[pos])
         if not account_name:
             errors.append(f"{row_number}행: 계좌명이 비어 있습니다.")
             continue
 
-        account_id, account_error = _get_account_id_by_name(accounts_df, account_name)
+        account_id, account_error = _get_account_id_by_name(account_lookup, account_name)
         if account_error:
             errors.append(f"{row_number}행: {account_error}")
             continue
 
-        ticker = str(row.get("ticker") or "").strip().upper()
+        ticker = str(tickers[pos])
         asset_name = str(row.get("asset_name") or "").strip()
         market = _normalize_market(row.get("market"))
         currency = _normalize_currency(row.get("currency"))
@@ -373,8 +481,8 @@ def _prepare_dividend_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[Prepare
             errors.append(f"{row_number}행: 통화(currency)가 비어 있습니다.")
             continue
 
-        gross = pd.to_numeric(row.get("dividend_gross"), errors="coerce")
-        net = pd.to_numeric(row.get("dividend_net"), errors="coerce")
+        gross = grosses[pos]
+        net = nets[pos]
         if pd.isna(gross) or pd.isna(net):
             errors.append(f"{row_number}행: 배당금(세전/세후) 값을 숫자로 읽을 수 없습니다.")
             continue
@@ -388,7 +496,10 @@ def _prepare_dividend_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[Prepare
             continue
 
         try:
-            cash_asset_id = TransactionService._get_cash_asset_id_by_currency(currency)
+            # ✅ 통화별 CASH 자산 조회는 assets 전체 조회라서 업로드 1회당 통화별 1번만 호출
+            if currency not in cash_asset_ids:
+                cash_asset_ids[currency] = TransactionService._get_cash_asset_id_by_currency(currency)
+            cash_asset_id = cash_asset_ids[currency]
         except Exception as exc:
             errors.append(f"{row_number}행: {exc}")
             continue
@@ -404,19 +515,8 @@ def _prepare_dividend_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[Prepare
             continue
         seen_keys.add(dedupe_key)
 
-        if _find_existing_duplicate(
-            account_id=account_id,
-            asset_id=cash_asset_id,
-            transaction_date=payout_date.date(),
-            trade_type="DEPOSIT",
-            quantity=float(net),
-            price=1.0,
-            tax=tax_value,
-        ):
-            errors.append(f"{row_number}행: 동일한 배당금 입금 거래가 이미 등록되어 있습니다.")
-            continue
-
-        prepared.append(
+        pending.append((
+            row_number,
             PreparedTransaction(
                 request=CreateTransactionRequest(
                     account_id=account_id,
@@ -429,15 +529,17 @@ def _prepare_dividend_rows(df: pd.DataFrame, user_id: str) -> Tuple[List[Prepare
                     tax=tax_value,
                     memo=memo,
                 )
-            )
-        )
+            ),
+        ))
 
-    return prepared, errors
+    prepared, duplicate_errors = _drop_existing_duplicates(pending, "동일한 배당금 입금 거래가 이미 등록되어 있습니다.")
+    return prepared, _sort_errors_by_row(errors + duplicate_errors)
 
 
 def _execute_upload(prepared_rows: List[PreparedTransaction], auto_cash: bool) -> Tuple[int, List[str]]:
     """검증이 끝난 거래를 실제로 insert한다."""
     created_assets: List[str] = []
+    created_asset_ids: Dict[str, int] = {}
     success_count = 0
 
     for prepared in prepared_rows:
@@ -445,10 +547,15 @@ def _execute_upload(prepared_rows: List[PreparedTransaction], auto_cash: bool) -
 
         if prepared.created_asset_payload:
             # ✅ 신규 자산을 먼저 생성하고 asset_id를 갱신한다.
-            created = AssetService.create_asset_minimal(**prepared.created_asset_payload)
+            # - 같은 신규 티커가 여러 행에 있으면 최초 1회만 생성하고 이후 행은 같은 asset_id를 재사용
+            ticker = prepared.created_asset_payload["ticker"]
+            if ticker not in created_asset_ids:
+                created = AssetService.create_asset_minimal(**prepared.created_asset_payload)
+                created_asset_ids[ticker] = int(created["id"])
+                created_assets.append(created["ticker"])
             req = CreateTransactionRequest(
                 account_id=req.account_id,
-                asset_id=int(created["id"]),
+                asset_id=created_asset_ids[ticker],
                 transaction_date=req.transaction_date,
                 trade_type=req.trade_type,
                 quantity=req.quantity,
@@ -457,7 +564,6 @@ def _execute_upload(prepared_rows: List[PreparedTransaction], auto_cash: bool) -
                 tax=req.tax,
                 memo=req.memo,
             )
-            created_assets.append(created["ticker"])
 
         TransactionService.create_transaction_and_rebuild(req, auto_cash=auto_cash)
         success_count += 1
@@ -6,6 +6,7 @@ from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 
 from asset_portfolio.mobile.data import (
     ALL_ACCOUNT_TOKEN,
@@ -52,6 +53,9 @@ def _read_index_html() -> str:
     return index_path.read_text(encoding="utf-8")
 
 
+# ✅ 아래 /api/* 핸들러는 async def라서, 안에서 동기 Supabase/yfinance 호출을 그대로 하면
+#    이벤트 루프가 막혀 프론트의 Promise.all 동시 요청 5개가 하나씩 순서대로 처리된다.
+#    run_in_threadpool로 넘겨서 네트워크 대기 시간이 '합'이 아니라 '최댓값'이 되도록 한다.
 app = FastAPI()
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
@@ -81,7 +85,7 @@ async def mobile_page():
 @app.get("/api/accounts")
 async def api_accounts():
     """모바일 화면에서 사용할 계좌 목록을 제공합니다."""
-    accounts = list_accounts()
+    accounts = await run_in_threadpool(list_accounts)
     return JSONResponse({
         "accounts": [
             {"id": ALL_ACCOUNT_TOKEN, "label": "전체 계좌 (ALL)"},
@@ -99,21 +103,21 @@ async def api_accounts():
 @app.get("/api/kpi")
 async def api_kpi(account_id: str = ALL_ACCOUNT_TOKEN, days: int = 30):
     """KPI 카드 데이터"""
-    data = get_kpi_summary(account_id, days)
+    data = await run_in_threadpool(get_kpi_summary, account_id, days)
     return JSONResponse({"kpi": data, "days": days})
 
 
 @app.get("/api/latest-snapshot")
 async def api_latest_snapshot(account_id: str = ALL_ACCOUNT_TOKEN):
     """최신 스냅샷 테이블 데이터"""
-    data = get_latest_snapshot_table(account_id)
+    data = await run_in_threadpool(get_latest_snapshot_table, account_id)
     return JSONResponse(data)
 
 
 @app.get("/api/transactions")
 async def api_transactions(account_id: str = ALL_ACCOUNT_TOKEN, days: int = 30):
     """최근 거래 내역"""
-    data = get_recent_transactions(account_id, days)
+    data = await run_in_threadpool(get_recent_transactions, account_id, days)
     return JSONResponse({"rows": data, "days": days})
 
 
@@ -124,14 +128,14 @@ async def api_top_contributions(
     top_k: int = 5,
 ):
     """수익률 기여 Top K"""
-    data = get_top_contributions(account_id, days, top_k)
+    data = await run_in_threadpool(get_top_contributions, account_id, days, top_k)
     return JSONResponse({"rows": data, "days": days, "top_k": top_k})
 
 
 @app.get("/api/treemap")
 async def api_treemap(account_id: str = ALL_ACCOUNT_TOKEN, days: int = 30):
     """Treemap 데이터"""
-    data = get_portfolio_treemap(account_id, days)
+    data = await run_in_threadpool(get_portfolio_treemap, account_id, days)
     return JSONResponse(data)
 
 
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from asset_portfolio.backend.infra.query import load_asset_contribution_data
 from asset_portfolio.backend.infra.supabase_client import get_supabase_client
+from asset_portfolio.backend.services.data_contracts import rows_to_df
 from asset_portfolio.backend.services.manual_cost_basis_service import attach_manual_cost_basis
 from asset_portfolio.backend.services.portfolio_service import (
     calculate_asset_contributions,
@@ -17,6 +22,30 @@ from asset_portfolio.backend.services.portfolio_weight_service import load_lates
 
 ALL_ACCOUNT_TOKEN = "__ALL__"
 
+# ✅ 자주 바뀌지 않는 lookup 테이블(계좌/자산)을 프로세스 안에서 재사용하는 기간(초)
+# - 모바일 API는 요청마다 이 테이블을 다시 조회했기 때문에, 짧은 TTL로 왕복을 줄입니다.
+# - 자산 TTL은 대시보드 load_assets_lookup(st.cache_data ttl=3600)과 맞춥니다.
+ACCOUNTS_LOOKUP_TTL_SECONDS = 60
+ASSETS_LOOKUP_TTL_SECONDS = 3600
+
+# 이름 -> (저장 시각, 값)
+_lookup_cache: Dict[str, Tuple[float, object]] = {}
+_lookup_cache_lock = threading.Lock()
+
+
+def _get_cached_lookup(name: str, ttl_seconds: float):
+    """TTL 안에 저장된 lookup 값이 있으면 반환하고, 없으면 None을 반환합니다."""
+    with _lookup_cache_lock:
+        hit = _lookup_cache.get(name)
+    if hit is not None and time.monotonic() - hit[0] < ttl_seconds:
+        return hit[1]
+    return None
+
+
+def _set_cached_lookup(name: str, value) -> None:
+    with _lookup_cache_lock:
+        _lookup_cache[name] = (time.monotonic(), value)
+
 
 def _date_range_from_days(days: int) -> Tuple[str, str]:
     """최근 n일 범위를 (start, end) 문자열로 반환합니다."""
@@ -38,29 +67,39 @@ def _json_safe_records(df: pd.DataFrame) -> List[Dict]:
 
 
 def list_accounts() -> List[Dict]:
-    """계좌 목록을 조회합니다."""
-    supabase = get_supabase_client()
-    response = (
-        supabase.table("accounts")
-        .select("id, name, brokerage, owner, type")
-        .order("brokerage")
-        .execute()
-    )
-    return response.data or []
+    """계좌 목록을 조회합니다. (ACCOUNTS_LOOKUP_TTL_SECONDS 동안 재사용)"""
+    cached = _get_cached_lookup("accounts", ACCOUNTS_LOOKUP_TTL_SECONDS)
+    if cached is None:
+        supabase = get_supabase_client()
+        response = (
+            supabase.table("accounts")
+            .select("id, name, brokerage, owner, type")
+            .order("brokerage")
+            .execute()
+        )
+        cached = response.data or []
+        _set_cached_lookup("accounts", cached)
+    # 호출자가 dict를 수정해도 캐시가 바뀌지 않도록 복사본을 돌려줍니다.
+    return [dict(row) for row in cached]
 
 
 def load_assets_lookup() -> pd.DataFrame:
-    """자산 정보 lookup을 조회합니다."""
-    supabase = get_supabase_client()
-    response = (
-        supabase.table("assets")
-        .select("id, name_kr, ticker, asset_type, currency, market")
-        .execute()
-    )
-    rows = response.data or []
-    if not rows:
-        return pd.DataFrame(columns=["asset_id", "name_kr", "ticker", "asset_type", "currency", "market"])
-    return pd.DataFrame(rows).rename(columns={"id": "asset_id"})
+    """자산 정보 lookup을 조회합니다. (ASSETS_LOOKUP_TTL_SECONDS 동안 재사용)"""
+    cached = _get_cached_lookup("assets", ASSETS_LOOKUP_TTL_SECONDS)
+    if cached is None:
+        supabase = get_supabase_client()
+        response = (
+            supabase.table("assets")
+            .select("id, name_kr, ticker, asset_type, currency, market")
+            .execute()
+        )
+        rows = response.data or []
+        if not rows:
+            # 빈 결과는 캐시하지 않습니다. (자산 등록 직후 바로 보이도록)
+            return pd.DataFrame(columns=["asset_id", "name_kr", "ticker", "asset_type", "currency", "market"])
+        cached = rows_to_df(rows).rename(columns={"id": "asset_id"})
+        _set_cached_lookup("assets", cached)
+    return cached.copy()
 
 
 def get_kpi_summary(account_id: str, days: int) -> Dict[str, Optional[float]]:
@@ -147,10 +186,9 @@ def get_latest_snapshot_table(account_id: str) -> Dict[str, Optional[List[Dict]]
     # ✅ manual 자산 원금(cost basis) 정보 붙이기
     df = attach_manual_cost_basis(df)
 
-    df["purchase_amount"] = pd.to_numeric(df["purchase_amount"], errors="coerce")
-    df["valuation_amount"] = pd.to_numeric(df["valuation_amount"], errors="coerce")
-    if "manual_principal" in df.columns:
-        df["manual_principal"] = pd.to_numeric(df["manual_principal"], errors="coerce")
+    # ✅ 숫자 컬럼은 컬럼 목록 기준으로 한 번의 assign으로 변환
+    num_cols = [c for c in ["purchase_amount", "valuation_amount", "manual_principal"] if c in df.columns]
+    df = df.assign(**{c: pd.to_numeric(df[c], errors="coerce") for c in num_cols})
 
     # 초보자 설명:
     # - manual 자산은 manual_principal(원금) 기준으로 수익률을 계산합니다.
@@ -160,12 +198,10 @@ def get_latest_snapshot_table(account_id: str) -> Dict[str, Optional[List[Dict]]
     df.loc[manual_mask, "profit_base_amount"] = df.loc[manual_mask, "manual_principal"]
 
     df["profit_amount"] = df["valuation_amount"] - df["profit_base_amount"]
-    df["profit_rate"] = df.apply(
-        lambda r: (r["profit_amount"] / r["profit_base_amount"] * 100)
-        if float(r["profit_base_amount"] or 0) > 0
-        else 0.0,
-        axis=1,
-    )
+    # ✅ 행 단위 apply 대신 컬럼 전체를 한 번에 계산 (원금 0/결측이면 수익률 0)
+    base = df["profit_base_amount"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["profit_rate"] = np.where(base > 0, df["profit_amount"].to_numpy(dtype=float) / base * 100, 0.0)
 
     df = df.rename(
         columns={
@@ -240,13 +276,16 @@ def get_recent_transactions(account_id: str, days: int) -> List[Dict]:
         "INIT": "초기",
     }
 
-    df["transaction_date"] = pd.to_datetime(df["transaction_date"]).dt.date
+    df["transaction_date"] = pd.to_datetime(df["transaction_date"], format="ISO8601").dt.date
     df["trade_type"] = df["trade_type"].map(trade_type_map).fillna(df["trade_type"])
 
-    df["ticker"] = df["assets"].apply(lambda x: (x or {}).get("ticker"))
-    df["asset_name"] = df["assets"].apply(lambda x: (x or {}).get("name_kr"))
-    df["asset_currency"] = df["assets"].apply(lambda x: (x or {}).get("currency"))
-    df["account_name"] = df["accounts"].apply(lambda x: (x or {}).get("name"))
+    # 초보자 설명:
+    # - assets/accounts 컬럼에는 join 결과가 dict로 들어 있습니다.
+    # - 행마다 lambda를 호출하지 않고 .str.get으로 필드를 컬럼 단위로 꺼냅니다. (None이면 None)
+    df["ticker"] = df["assets"].str.get("ticker")
+    df["asset_name"] = df["assets"].str.get("name_kr")
+    df["asset_currency"] = df["assets"].str.get("currency")
+    df["account_name"] = df["accounts"].str.get("name")
 
     df = df.drop(columns=["assets", "accounts"], errors="ignore")
 
@@ -271,13 +310,18 @@ def get_top_contributions(account_id: str, days: int, top_k: int) -> List[Dict]:
     """최근 n일 누적 기여도 기준 Top K 종목을 반환합니다."""
     start_date, end_date = _date_range_from_days(days)
 
-    snapshots = load_asset_contribution_data(account_id, start_date, end_date)
+    # 초보자 설명:
+    # - 스냅샷 조회와 자산 lookup 조회는 서로 의존하지 않으므로 동시에 요청합니다.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        assets_future = ex.submit(load_assets_lookup)
+        snapshots = load_asset_contribution_data(account_id, start_date, end_date)
+        assets = assets_future.result()
+
     df = calculate_asset_contributions(snapshots)
 
     if df.empty:
         return []
 
-    assets = load_assets_lookup()
     df = df.merge(
         assets[["asset_id", "name_kr", "asset_type", "market"]],
         on="asset_id",
@@ -305,11 +349,14 @@ def get_portfolio_treemap(account_id: str, days: int) -> Dict[str, Optional[List
     """포트폴리오 Treemap용 데이터를 반환합니다."""
     start_date, end_date = _date_range_from_days(days)
 
-    df = load_latest_asset_weights(account_id, start_date, end_date)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        assets_future = ex.submit(load_assets_lookup)
+        df = load_latest_asset_weights(account_id, start_date, end_date)
+        assets = assets_future.result()
+
     if df.empty:
         return {"latest_date": None, "rows": []}
 
-    assets = load_assets_lookup()
     df = df.merge(assets[["asset_id", "name_kr", "asset_type", "market"]], on="asset_id", how="left")
     df["name_kr"] = df["name_kr"].fillna(df["asset_id"].astype(str))
 
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from asset_portfolio.backend.services import benchmark_service
+
+
+def test_sp500_series_is_reused_for_same_range(monkeypatch):
+    calls = []
+
+    def fake_download(s, e):
+        calls.append((s, e))
+        return pd.DataFrame({"date": [s.date()], "benchmark_return": [0.1]})
+
+    monkeypatch.setattr(benchmark_service, "_sp500_cache", {})
+    monkeypatch.setattr(benchmark_service, "_download_sp500_benchmark_series", fake_download)
+
+    first = benchmark_service.load_sp500_benchmark_series("2026-01-02", "2026-02-01")
+    first["benchmark_return"] = 9.0
+    second = benchmark_service.load_sp500_benchmark_series("2026-01-02 10:00", "2026-02-01")
+
+    assert len(calls) == 1
+    assert second["benchmark_return"].tolist() == [0.1]
+
+
+def test_sp500_cache_evicts_oldest_ranges(monkeypatch):
+    monkeypatch.setattr(benchmark_service, "_sp500_cache", {})
+    monkeypatch.setattr(benchmark_service, "BENCHMARK_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(
+        benchmark_service,
+        "_download_sp500_benchmark_series",
+        lambda s, e: pd.DataFrame({"date": [s.date()], "benchmark_return": [0.0]}),
+    )
+
+    for end in ["2026-02-01", "2026-02-02", "2026-02-03"]:
+        benchmark_service.load_sp500_benchmark_series("2026-01-02", end)
+
+    assert [e.strftime("%Y-%m-%d") for _, e in benchmark_service._sp500_cache] == ["2026-02-02", "2026-02-03"]
+
+
+def test_merge_ffill_matches_portfolio_to_benchmark_trading_days():
+    portfolio = pd.DataFrame({
+        "date": ["2026-01-01", "2026-01-06"],
+        "portfolio_return": [0.1, 0.2],
+    })
+    benchmark = pd.DataFrame({
+        "date": ["2026-01-05", "2026-01-02", "2026-01-06", "2026-01-07"],
+        "benchmark_return": [0.05, 0.0, 0.1, 0.15],
+    })
+
+    df = benchmark_service.merge_portfolio_and_benchmark_ffill(portfolio, benchmark)
+
+    assert list(df.columns[:3]) == ["date", "portfolio_return", "benchmark_return"]
+    assert df["date"].dt.strftime("%Y-%m-%d").tolist() == ["2026-01-02", "2026-01-05", "2026-01-06", "2026-01-07"]
+    assert df["portfolio_return"].tolist() == [0.1, 0.1, 0.2, 0.2]
+    assert df["benchmark_return_pct"].tolist() == [0.0, 5.0, 10.0, 15.0]
+
+
+def test_merge_ffill_keeps_overlapping_columns_with_suffixes():
+    portfolio = pd.DataFrame({"date": ["2026-01-02"], "portfolio_return": [0.1], "source": ["p"]})
+    benchmark = pd.DataFrame({"date": ["2026-01-02"], "benchmark_return": [0.0], "source": ["b"]})
+
+    df = benchmark_service.merge_portfolio_and_benchmark_ffill(portfolio, benchmark)
+
+    assert list(df.columns[:5]) == ["date", "portfolio_return", "source_x", "benchmark_return", "source_y"]
+    assert df[["source_x", "source_y"]].iloc[0].tolist() == ["p", "b"]
@@ -7,6 +7,8 @@ from asset_portfolio.backend.services.data_contracts import (
     normalize_weight_df,
     normalize_benchmark_df,
     normalize_contribution_df,
+    rows_to_df,
+    rows_to_typed_df,
 )
 from asset_portfolio.backend.services.portfolio_service import calculate_asset_contributions
 
@@ -60,3 +62,29 @@ def test_normalize_contribution_df_handles_missing_pct():
     df = normalize_contribution_df(raw)
     assert list(df.columns) == CONTRIBUTION_COLUMNS
     assert df.loc[0, "contribution_pct"] == 10.0
+
+
+def test_rows_to_df_types_numeric_and_falls_back_on_mixed_types():
+    df = rows_to_df([{"asset_id": 1, "valuation_amount": 10}, {"asset_id": 2, "valuation_amount": 1.5}])
+    assert df["valuation_amount"].dtype == "float64"
+
+    mixed = rows_to_df([{"v": 1}, {"v": "x"}])
+    assert mixed["v"].tolist() == [1, "x"]
+
+    assert rows_to_df([]).empty
+
+
+def test_rows_to_typed_df_fixes_columns_and_dtypes():
+    schema = {"asset_id": "Int64", "valuation_amount": "float64"}
+    df = rows_to_typed_df(
+        [{"asset_id": 1, "valuation_amount": "100.5"}, {"asset_id": None}],
+        schema,
+    )
+    assert list(df.columns) == list(schema)
+    assert str(df["asset_id"].dtype) == "Int64"
+    assert df["valuation_amount"].dtype == "float64"
+    assert df.loc[0, "valuation_amount"] == 100.5
+
+    empty = rows_to_typed_df([], schema)
+    assert empty.empty
+    assert list(empty.columns) == list(schema)
@@ -0,0 +1,55 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from asset_portfolio.backend.services import fx_service
+from asset_portfolio.backend.services.fx_service import FxRate, FxService
+
+
+def _reset_cache(monkeypatch):
+    monkeypatch.setattr(FxService, "_cached", None)
+    monkeypatch.setattr(FxService, "_cached_at", 0.0)
+    monkeypatch.setattr(FxService, "_refreshing", False)
+
+
+def test_get_usdkrw_returns_stale_rate_and_refreshes_in_background(monkeypatch):
+    _reset_cache(monkeypatch)
+    rates = iter([1300.0, 1400.0])
+    refreshed = threading.Event()
+
+    def _fetch():
+        rate = next(rates)
+        if rate == 1400.0:
+            refreshed.set()
+        return FxRate(pair="USDKRW", rate=rate, asof=datetime.now(timezone.utc), source="test")
+
+    monkeypatch.setattr(FxService, "fetch_usdkrw", staticmethod(_fetch))
+
+    assert FxService.get_usdkrw().rate == 1300.0
+
+    # TTL 만료 → 이전 값을 즉시 반환하고 백그라운드에서 갱신
+    monkeypatch.setattr(fx_service, "FX_CACHE_TTL_SECONDS", 0)
+    assert FxService.get_usdkrw().rate == 1300.0
+    assert refreshed.wait(timeout=5)
+
+    monkeypatch.setattr(fx_service, "FX_CACHE_TTL_SECONDS", 3600)
+    for _ in range(100):
+        if FxService._cached.rate == 1400.0:
+            break
+        time.sleep(0.01)
+    assert FxService.get_usdkrw().rate == 1400.0
+
+
+def test_get_usdkrw_does_not_cache_fallback(monkeypatch):
+    _reset_cache(monkeypatch)
+    calls = []
+
+    def _fetch():
+        calls.append(1)
+        return FxRate(pair="USDKRW", rate=1300.0, asof=datetime.now(timezone.utc), source="fallback")
+
+    monkeypatch.setattr(FxService, "fetch_usdkrw", staticmethod(_fetch))
+
+    FxService.get_usdkrw()
+    FxService.get_usdkrw()
+    assert len(calls) == 2
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from asset_portfolio.backend.services.krx_price_fetcher import KRXPriceFetcher
+
+
+def test_reference_price_reuses_downloaded_csv_across_codes(monkeypatch):
+    calls = []
+
+    def fake_download(bld, params):
+        calls.append((bld, dict(params)))
+        return pd.DataFrame({"종목코드": [69500, "0064K0"], "종가": ["35,000", "9,800"]})
+
+    monkeypatch.setattr(KRXPriceFetcher, "_csv_cache", {})
+    monkeypatch.setattr(KRXPriceFetcher, "_download_csv", staticmethod(fake_download))
+    source_params = {"bld": "dbms/MDC/STAT/standard/MDCSTAT04301", "query_params": {"mktId": "ALL"}}
+
+    first = KRXPriceFetcher.fetch_reference_price(code="069500", source_params=source_params)
+    second = KRXPriceFetcher.fetch_reference_price(code="0064K0", source_params=source_params)
+
+    assert first.price == 35000.0
+    assert second.price == 9800.0
+    assert len(calls) == 1
+
+
+def test_csv_cache_skips_empty_results_and_is_bounded(monkeypatch):
+    from asset_portfolio.backend.services import krx_price_fetcher
+
+    def fake_download(bld, params):
+        if params["trdDd"] == "holiday":
+            return pd.DataFrame()
+        return pd.DataFrame({"종목코드": ["069500"], "종가": ["1"]})
+
+    monkeypatch.setattr(KRXPriceFetcher, "_csv_cache", {})
+    monkeypatch.setattr(KRXPriceFetcher, "_download_csv", staticmethod(fake_download))
+    monkeypatch.setattr(krx_price_fetcher, "KRX_CSV_CACHE_MAX_ENTRIES", 2)
+
+    KRXPriceFetcher._get_csv_cached("bld", {"trdDd": "holiday"})
+    for day in ["d1", "d2", "d3"]:
+        KRXPriceFetcher._get_csv_cached("bld", {"trdDd": day})
+
+    assert [k[1] for k in KRXPriceFetcher._csv_cache] == ['{"trdDd": "d2"}', '{"trdDd": "d3"}']
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from asset_portfolio.backend.services import manual_cost_basis_service
+
+
+def test_attach_manual_cost_basis_maps_only_manual_rows(monkeypatch):
+    monkeypatch.setattr(
+        manual_cost_basis_service,
+        "fetch_cost_basis_current",
+        lambda user_id, account_ids, asset_ids: {("acc1", 10): {"cost_basis_amount": 5000.0}},
+    )
+    df = pd.DataFrame({
+        "account_id": ["acc1", "acc1", "acc2"],
+        "asset_id": [10, 11, 10],
+        "assets.price_source": ["manual", "yfinance", " Manual "],
+    })
+
+    out = manual_cost_basis_service.attach_manual_cost_basis(df, user_id="u1")
+
+    assert out.loc[0, "manual_principal"] == 5000.0
+    assert pd.isna(out.loc[1, "manual_principal"])
+    assert pd.isna(out.loc[2, "manual_principal"])
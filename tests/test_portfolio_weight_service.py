@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from asset_portfolio.backend.services import portfolio_weight_service
+from asset_portfolio.backend.services.data_contracts import WEIGHT_COLUMNS
+from asset_portfolio.backend.services.fx_service import FxRate
+
+
+def _fixed_fx(monkeypatch, rate: float = 1000.0):
+    monkeypatch.setattr(
+        portfolio_weight_service.FxService,
+        "get_usdkrw",
+        staticmethod(lambda: FxRate(pair="USDKRW", rate=rate, asof=datetime.now(timezone.utc), source="test")),
+    )
+
+
+def test_build_asset_weight_df_converts_usd_and_weights(monkeypatch):
+    _fixed_fx(monkeypatch)
+    rows = [
+        {"date": "2024-01-01", "asset_id": 1, "valuation_amount": 1000.0, "assets": {"name_kr": "A", "currency": "KRW"}},
+        {"date": "2024-01-01", "asset_id": 2, "valuation_amount": 3.0, "assets": {"name_kr": "B", "currency": "USD"}},
+    ]
+    df = portfolio_weight_service.build_asset_weight_df(rows)
+
+    assert set(WEIGHT_COLUMNS) <= set(df.columns)
+    by_id = df.set_index("asset_id")
+    assert by_id.loc[2, "valuation_amount_krw"] == 3000.0
+    assert by_id.loc[1, "valuation_amount_krw"] == 1000.0
+    assert by_id.loc[2, "weight"] == 0.75
+    assert by_id.loc[1, "weight_krw"] == 0.25
+
+
+def test_build_asset_weight_df_zero_total_has_zero_weight(monkeypatch):
+    _fixed_fx(monkeypatch)
+    rows = [
+        {"date": "2024-01-01", "asset_id": 1, "valuation_amount": 0.0, "assets": {"name_kr": "A", "currency": "krw"}},
+    ]
+    df = portfolio_weight_service.build_asset_weight_df(rows)
+    assert df.loc[0, "weight"] == 0.0
+    assert not pd.isna(df.loc[0, "weight"])
+
+
+def test_build_asset_weight_df_uses_given_rate_without_fetching(monkeypatch):
+    def _fail():
+        raise AssertionError("fx should not be fetched")
+
+    monkeypatch.setattr(portfolio_weight_service.FxService, "get_usdkrw", staticmethod(_fail))
+    rows = [
+        {"date": "2024-01-01", "asset_id": 2, "valuation_amount": 2.0, "assets": {"name_kr": "B", "currency": "usd"}},
+    ]
+    df = portfolio_weight_service.build_asset_weight_df(rows, usdkrw=1350.5)
+    assert df.loc[0, "valuation_amount_krw"] == 2701.0
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+from asset_portfolio.backend.services import price_updater_service
+from asset_portfolio.backend.services.price_updater_service import PriceUpdaterService
+
+
+class _FakeSelect:
+    def __init__(self, rows, updates=None):
+        self.rows = rows
+        self.updates = updates
+        self.payload = None
+
+    def select(self, *_):
+        return self
+
+    def update(self, payload, returning=None):
+        self.payload = payload
+        return self
+
+    def in_(self, _col, ids):
+        if self.payload is not None:
+            self.updates.append((self.payload, sorted(ids)))
+            return self
+        self.rows = [r for r in self.rows if r["id"] in ids]
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+def _asset(asset_id, **kw):
+    row = {
+        "id": asset_id,
+        "ticker": f"T{asset_id}",
+        "name_kr": f"자산{asset_id}",
+        "asset_type": "stock",
+        "currency": "USD",
+        "underlying_asset_class": "Equity",
+        "economic_exposure_region": "US",
+        "vehicle_type": "stock",
+        "market": "us",
+        "current_price": 10.0,
+        "price_source": None,
+        "price_update_error": "old error",
+    }
+    row.update(kw)
+    return row
+
+
+def test_update_many_batches_writes_and_updates_only_price_columns(monkeypatch):
+    rows = [
+        _asset(1),
+        _asset(2, price_source="manual"),
+        _asset(3),
+        _asset(4, ticker="0064K0", market="korea", currency="KRW"),
+        _asset(5, ticker="T3"),
+    ]
+    updates = []
+    monkeypatch.setattr(
+        price_updater_service,
+        "get_supabase_client",
+        lambda: SimpleNamespace(table=lambda _name: _FakeSelect(list(rows), updates)),
+    )
+    # T1과 한국 종목(.KQ 후보)은 일괄 조회(yf.download)에서, T3은 개별 조회에서 처리된다.
+    batch_calls = []
+    monkeypatch.setattr(
+        PriceUpdaterService,
+        "_batch_fetch_last_closes",
+        staticmethod(lambda tickers: batch_calls.append(tickers) or {"T1": 12.5, "0064K0.KQ": 9800.0}),
+    )
+    prices = {"T3": (None, None, "no data")}
+    single_calls = []
+    monkeypatch.setattr(
+        PriceUpdaterService,
+        "fetch_price_from_yfinance",
+        staticmethod(lambda t, m=None: single_calls.append(t) or prices[t]),
+    )
+    writes = {}
+    monkeypatch.setattr(
+        price_updater_service,
+        "upsert_in_chunks",
+        lambda table, payload, on_conflict=None: writes.setdefault(table, []).append(payload),
+    )
+
+    results = PriceUpdaterService.update_many([1, 2, 3, 4, 99, 5])
+
+    assert [r.ok for r in results] == [True, False, False, True, False, False]
+    assert single_calls == ["T3"]  # 같은 ticker(T3)를 가진 자산 3, 5는 개별 조회 1번을 공유
+    # manual 자산(T2)은 일괄 조회 대상에서 제외
+    assert batch_calls == [["0064K0", "0064K0.KQ", "0064K0.KS", "T1", "T3"]]
+    assert results[3].reason == "used=0064K0.KQ"
+    assert results[4].reason == "asset not found"
+
+    # assets는 upsert가 아니라 UPDATE로, 같은 payload(실패한 3, 5)는 한 번에 묶어서 보낸다.
+    assert "assets" not in writes and len(writes["asset_prices"]) == 1
+    assert len(updates) == 4
+    by_ids = {tuple(ids): payload for payload, ids in updates}
+    assert set(by_ids) == {(1,), (2,), (3, 5), (4,)}
+    for payload in by_ids.values():
+        assert not {"ticker", "name_kr", "asset_type", "currency", "price_source"} & set(payload)
+
+    assert by_ids[(1,)]["current_price"] == 12.5 and by_ids[(1,)]["price_update_error"] is None
+    # 스킵/실패 자산은 current_price(와 스킵이면 오류 메시지)를 건드리지 않는다.
+    assert by_ids[(2,)]["price_update_status"] == "skipped" and "price_update_error" not in by_ids[(2,)]
+    assert by_ids[(3, 5)]["price_update_status"] == "failed" and "current_price" not in by_ids[(3, 5)]
+    assert by_ids[(3, 5)]["price_update_error"] == "no data"
+    assert writes["asset_prices"][0][0]["currency"] == "USD"
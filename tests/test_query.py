@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+from asset_portfolio.backend.infra.query import fetch_all_pagination
+
+
+class _FakeRequest:
+    def __init__(self):
+        self.offset = None
+        self.headers = {}
+
+
+class _FakeQuery:
+    """range()가 빌더를 변경하는 postgrest 빌더 흉내"""
+
+    def __init__(self, total: int, with_count: bool = False):
+        self.total = total
+        self.with_count = with_count
+        self.request = _FakeRequest()
+        self.calls = []
+
+    def range(self, start, end):
+        self.request.offset = (start, end)
+        return self
+
+    def execute(self):
+        start, end = self.request.offset
+        self.calls.append(start)
+        counted = self.with_count and self.request.headers.get("Prefer") == "count=exact"
+        return SimpleNamespace(
+            data=[{"i": i} for i in range(start, min(end + 1, self.total))],
+            count=self.total if counted else None,
+        )
+
+
+def test_fetch_all_pagination_single_page():
+    q = _FakeQuery(total=3)
+    rows = fetch_all_pagination(q, batch_size=10)
+    assert [r["i"] for r in rows] == [0, 1, 2]
+
+
+def test_fetch_all_pagination_parallel_pages_keep_order():
+    q = _FakeQuery(total=95)
+    rows = fetch_all_pagination(q, batch_size=10, max_workers=3)
+    assert [r["i"] for r in rows] == list(range(95))
+
+
+def test_fetch_all_pagination_exact_multiple():
+    q = _FakeQuery(total=40)
+    rows = fetch_all_pagination(q, batch_size=10, max_workers=4)
+    assert len(rows) == 40
+
+
+def test_fetch_all_pagination_uses_count_to_fetch_only_needed_pages():
+    q = _FakeQuery(total=40, with_count=True)
+    rows = fetch_all_pagination(q, batch_size=10, max_workers=3)
+    assert [r["i"] for r in rows] == list(range(40))
+    assert sorted(q.calls) == [0, 10, 20, 30]
+
+
+class _FakeUpsertTable:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def upsert(self, rows, on_conflict=None, returning=None):
+        self.sink.append((list(rows), on_conflict))
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[])
+
+
+def test_upsert_in_chunks_sends_every_row_once(monkeypatch):
+    from asset_portfolio.backend.infra import query
+
+    sink = []
+    client = SimpleNamespace(table=lambda name: _FakeUpsertTable(sink))
+    monkeypatch.setattr(query, "get_supabase_client", lambda: client)
+
+    rows = [{"i": i} for i in range(23)]
+    n = query.upsert_in_chunks("daily_snapshots", rows, on_conflict="date", chunk_size=5, max_workers=3)
+
+    assert n == 23
+    assert sorted(len(chunk) for chunk, _ in sink) == [3, 5, 5, 5, 5]
+    assert sorted(r["i"] for chunk, _ in sink for r in chunk) == list(range(23))
+    assert {oc for _, oc in sink} == {"date"}
+
+
+def test_build_daily_snapshots_query_filters_all_accounts_by_user_on_server(monkeypatch):
+    from postgrest import SyncPostgrestClient
+
+    from asset_portfolio.backend.infra import query
+
+    client = SimpleNamespace(table=SyncPostgrestClient("http://localhost").from_)
+    monkeypatch.setattr(query, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(query, "get_account_ids", lambda user_id: (_ for _ in ()).throw(AssertionError))
+
+    q = query.build_daily_snapshots_query(
+        select_cols="date, valuation_amount",
+        start_date="2026-01-01",
+        end_date="2026-01-31",
+        user_id="u1",
+        account_id=query.ALL_ACCOUNT_TOKEN,
+    )
+    params = dict(q.request.params)
+
+    assert params["select"] == "date,valuation_amount,accounts!inner(user_id)"
+    assert params["accounts.user_id"] == "eq.u1"
+    assert "account_id" not in params
+
+
+class _FakeAccountsTable:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def select(self, cols):
+        return self
+
+    def eq(self, col, value):
+        self.calls.append(value)
+        return self
+
+    def order(self, col):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[{"id": "a1", "name": "A"}, {"id": "a2", "name": "B"}])
+
+
+def test_accounts_are_reused_within_ttl(monkeypatch):
+    from asset_portfolio.backend.infra import query
+
+    calls = []
+    client = SimpleNamespace(table=lambda name: _FakeAccountsTable(calls))
+    monkeypatch.setattr(query, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(query, "_accounts_cache", {})
+
+    accounts = query.get_accounts("u1")
+    accounts[0]["name"] = "mutated"
+    assert query.get_accounts("u1")[0]["name"] == "A"
+    assert query.get_account_ids("u1") == ["a1", "a2"]
+    assert calls == ["u1"]
+
+    query.clear_accounts_cache()
+    query.get_account_ids("u1")
+    assert calls == ["u1", "u1"]
+
+
+def test_asset_contribution_data_skips_query_for_empty_range(monkeypatch):
+    from asset_portfolio.backend.infra import query
+
+    def fail(*args, **kwargs):
+        raise AssertionError("should not query")
+
+    monkeypatch.setattr(query, "build_daily_snapshots_query", fail)
+    assert query.load_asset_contribution_data("u", "a", "2026-02-01", "2026-01-01") == []
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from asset_portfolio.backend.services.snapshot_frame import _strict_numeric, to_snapshot_df
+
+
+def test_strict_numeric_strips_locale_noise_and_keeps_nan():
+    df = pd.DataFrame({"v": [" 1,234 ", "₩5,000", "$3.5", "None", "nan", "", "abc", 1.5]})
+    out = _strict_numeric(df, "v")
+    assert out.iloc[:3].tolist() == [1234.0, 5000.0, 3.5]
+    assert out.iloc[3:7].isna().all()
+    assert out.iloc[7] == 1.5
+
+
+def test_to_snapshot_df_normalizes_dates():
+    rows = [
+        {"date": "2024-01-02", "valuation_amount": 1},
+        {"date": "2024-01-03T09:00:00", "valuation_amount": 2},
+        {"date": None, "valuation_amount": 3},
+    ]
+    df = to_snapshot_df(rows, min_non_null_ratio=0.0)
+    assert df["date"].tolist() == ["2024-01-02", "2024-01-03", None]
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from asset_portfolio.backend.infra import supabase_client
+
+
+def test_get_supabase_client_builds_one_client_per_process(monkeypatch):
+    created = []
+
+    def fake_create_client(url, key, options=None):
+        created.append((url, key, options))
+        return object()
+
+    monkeypatch.setattr(supabase_client, "_client", None)
+    monkeypatch.setattr(supabase_client, "create_client", fake_create_client)
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", "anon-key")
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        clients = list(ex.map(lambda _: supabase_client.get_supabase_client(), range(32)))
+
+    assert len(created) == 1
+    assert all(c is clients[0] for c in clients)
+
+
+def test_get_supabase_client_requires_env(monkeypatch):
+    monkeypatch.setattr(supabase_client, "_client", None)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+
+    with pytest.raises(RuntimeError):
+        supabase_client.get_supabase_client()
@@ -0,0 +1,112 @@
+import io
+from datetime import date
+
+import pandas as pd
+
+from asset_portfolio.backend.services.transaction_service import CreateTransactionRequest
+from asset_portfolio.dashboard import transaction_importer
+from asset_portfolio.dashboard.transaction_importer import (
+    PreparedTransaction,
+    _build_account_lookup,
+    _build_asset_lookup,
+    _clean_text_column,
+    _drop_existing_duplicates,
+    _get_account_id_by_name,
+    _get_asset_row_by_ticker,
+    _read_uploaded_file,
+)
+
+
+def test_account_lookup_detects_missing_and_duplicate_names():
+    accounts = pd.DataFrame({"id": ["a1", "a2", "a3"], "name": ["ISA", "연금", "연금"]})
+    lookup = _build_account_lookup(accounts)
+
+    assert _get_account_id_by_name(lookup, "ISA") == ("a1", None)
+    assert _get_account_id_by_name(lookup, "없음")[0] is None
+    account_id, error = _get_account_id_by_name(lookup, "연금")
+    assert account_id is None and "중복" in error
+
+
+def test_asset_lookup_matches_upper_ticker_and_keeps_first_row():
+    assets = pd.DataFrame({"id": [1, 2, 3], "ticker": ["spy", "SPY", None], "currency": ["usd", "usd", "krw"]})
+    lookup = _build_asset_lookup(assets)
+
+    assert _get_asset_row_by_ticker(lookup, "SPY")["id"] == 1
+    assert _get_asset_row_by_ticker(lookup, "QQQ") is None
+
+
+def test_clean_text_column_blanks_missing_values_and_strips():
+    df = pd.DataFrame({"account_name": ["  ISA ", None, float("nan"), "연금"]})
+
+    assert _clean_text_column(df, "account_name").tolist() == ["ISA", "", "", "연금"]
+    assert _clean_text_column(df, "ticker").tolist() == ["", "", "", ""]
+
+
+def test_read_uploaded_csv_keeps_leading_zero_tickers():
+    uploaded = io.BytesIO("계좌명,티커,수량\nISA,005930,10\n".encode("utf-8"))
+    uploaded.name = "trades.csv"
+
+    df = _read_uploaded_file(uploaded)
+
+    assert df.loc[0, "티커"] == "005930"
+    assert float(df.loc[0, "수량"]) == 10.0
+
+
+def test_drop_existing_duplicates_matches_db_rows_in_one_lookup(monkeypatch):
+    calls = []
+
+    def fake_fetch_all(query_builder):
+        calls.append(query_builder)
+        return [{
+            "account_id": "a1",
+            "asset_id": 7,
+            "transaction_date": "2024-12-31T00:00:00+00:00",
+            "trade_type": "BUY",
+            "quantity": 10,
+            "price": 150.5,
+        }]
+
+    class FakeQuery:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+    class FakeClient:
+        def table(self, name):
+            return FakeQuery()
+
+    monkeypatch.setattr(transaction_importer, "fetch_all_pagination", fake_fetch_all)
+    monkeypatch.setattr(transaction_importer, "get_supabase_client", lambda: FakeClient())
+
+    def _item(asset_id, quantity, created=None):
+        return PreparedTransaction(
+            request=CreateTransactionRequest(
+                account_id="a1",
+                asset_id=asset_id,
+                transaction_date=date(2024, 12, 31),
+                trade_type="BUY",
+                quantity=quantity,
+                price=150.5,
+            ),
+            created_asset_payload=created,
+        )
+
+    pending = [
+        (2, _item(7, 10.0)),
+        (3, _item(7, 5.0)),
+        (4, _item(-1, 10.0, created={"ticker": "NEW"})),
+    ]
+    prepared, errors = _drop_existing_duplicates(pending, "dup")
+
+    assert len(calls) == 1
+    assert errors == ["2행: dup"]
+    assert [p.request.quantity for p in prepared] == [5.0, 10.0]
+
+
+def test_sort_errors_by_row_interleaves_duplicate_errors():
+    errors = ["2행: 티커가 비어 있습니다.", "10행: 계좌명이 비어 있습니다."]
+    duplicate_errors = ["3행: dup"]
+    assert transaction_importer._sort_errors_by_row(errors + duplicate_errors) == [
+        "2행: 티커가 비어 있습니다.",
+        "3행: dup",
+        "10행: 계좌명이 비어 있습니다.",
+    ]